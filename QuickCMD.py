@@ -6,73 +6,3838 @@
 """
 
 import sys
+import argparse
+import ast
+import codecs
+import csv
+import functools
+import hashlib
+import locale
+import operator
+import queue
 import subprocess
+import tempfile
 import platform
 import json
 import os
+import bisect
+import heapq
+import importlib.util
+import itertools
+import random
+import re
+import shutil
+import signal
+import socket
+import stat
+import threading
+import time
+import traceback
+from array import array
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QTextEdit, QLabel, 
                              QTabWidget, QScrollArea, QMessageBox, QGroupBox,
                              QGridLayout, QDialog, QLineEdit, QDialogButtonBox,
-                             QListWidget, QListWidgetItem, QSplitter)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QPropertyAnimation, QEasingCurve, QTimer, QSize
-from PyQt6.QtGui import QFont, QPalette, QColor, QIcon
+                             QListWidget, QListWidgetItem, QSplitter, QComboBox,
+                             QSpinBox, QCheckBox, QFileDialog, QFormLayout, QMenu, QProgressBar,
+                             QListView, QStackedWidget, QTableView, QHeaderView)
+from PyQt6.QtCore import (Qt, QObject, QThread, QProcess, pyqtSignal, QAbstractListModel,
+                          QAbstractTableModel, QModelIndex, QPoint, QPropertyAnimation,
+                          QEasingCurve, QTimer, QSize)
+from PyQt6.QtNetwork import QAbstractSocket, QLocalServer, QLocalSocket
+from PyQt6.QtGui import (QFont, QPalette, QColor, QIcon, QTextCursor, QTextCharFormat,
+                         QShortcut, QKeySequence)
+
+@functools.lru_cache(maxsize=None)
+def detect_system_encoding():
+    """探测系统输出编码：Windows 取控制台代码页，其他系统取 locale 设置"""
+    if platform.system() == "Windows":
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            code_page = kernel32.GetConsoleOutputCP() or kernel32.GetOEMCP()
+            encoding = 'utf-8' if code_page == 65001 else f'cp{code_page}'
+            codecs.lookup(encoding)
+            return encoding
+        except (OSError, AttributeError, LookupError):
+            return 'gbk'
+    encoding = locale.getpreferredencoding(False) or 'utf-8'
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return 'utf-8'
+
+
+class SlotTimings:
+    """关键槽函数的调用次数和耗时统计，供卡顿检测面板和跟踪文件使用"""
+    MAX_CALLS = 20000
+    
+    def __init__(self):
+        self.stats = {}
+        self.calls = deque(maxlen=self.MAX_CALLS)
+    
+    def record(self, name, start, duration):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += duration
+        if duration > stats[2]:
+            stats[2] = duration
+        self.calls.append((name, start, duration))
+    
+    def clear(self):
+        self.stats.clear()
+        self.calls.clear()
+
+
+slot_timings = SlotTimings()
+
+
+def timed_slot(func):
+    """记录槽函数耗时的装饰器（多余的信号参数会被丢弃，与 PyQt 直接连接时一致）"""
+    name = func.__qualname__
+    argcount = func.__code__.co_argcount
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args[:argcount], **kwargs)
+        finally:
+            slot_timings.record(name, start, time.perf_counter() - start)
+    return wrapper
+
+
+class StreamDecoder:
+    """把原始字节流增量解码为文本行
+    
+    编码识别顺序：BOM -> UTF-16 特征 -> UTF-8 合法性 -> 系统编码。
+    纯 ASCII 内容在所有候选编码下结果相同，因此识别会推迟到第一个非 ASCII 块；
+    跨块截断的多字节字符由 codecs 增量解码器保证正确，无法解码的字节显示为 �。
+    """
+    BOMS = [
+        (codecs.BOM_UTF8, 'utf-8-sig'),
+        (codecs.BOM_UTF16_LE, 'utf-16'),
+        (codecs.BOM_UTF16_BE, 'utf-16'),
+    ]
+    
+    def __init__(self, fallback_encoding=None):
+        self.fallback_encoding = fallback_encoding or detect_system_encoding()
+        self.encoding = None
+        self._decoder = None
+        self._at_start = True
+        self._pending = b''
+        self._tail = ''
+    
+    def feed(self, data, final=False):
+        """输入一块字节，返回其中的完整行（不含末尾换行符）"""
+        text = self._tail + self._decode(data, final)
+        if final:
+            self._tail = ''
+            return text.replace('\r\n', '\n').rstrip('\r\n')
+        idx = text.rfind('\n')
+        if idx < 0:
+            self._tail = text
+            return ''
+        self._tail = text[idx + 1:]
+        return text[:idx].replace('\r\n', '\n').rstrip('\r')
+    
+    def finish(self):
+        """流结束，返回剩余的不完整行"""
+        return self.feed(b'', final=True)
+    
+    def _decode(self, data, final):
+        if self._decoder is None:
+            data = self._pending + data
+            self._pending = b''
+            if self._at_start and data:
+                self._at_start = False
+                encoding = self._sniff_start(data)
+                if encoding:
+                    self._set_encoding(encoding)
+            if self._decoder is None:
+                if data.isascii():
+                    return data.decode('ascii')
+                encoding = self._guess(data, final)
+                if encoding is None:
+                    # 非 ASCII 内容太少无法判断，等待下一块
+                    self._pending = data
+                    return ''
+                self._set_encoding(encoding)
+        return self._decoder.decode(data, final)
+    
+    def _set_encoding(self, encoding):
+        self.encoding = encoding
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    
+    def _sniff_start(self, data):
+        for bom, encoding in self.BOMS:
+            if data.startswith(bom):
+                return encoding
+        # 没有 BOM 的 UTF-16：ASCII 字符的高位字节为 0
+        sample = data[:512]
+        if len(sample) >= 4 and sample.count(0) * 3 >= len(sample):
+            if sample[1::2].count(0) > sample[0::2].count(0):
+                return 'utf-16-le'
+            return 'utf-16-be'
+        return None
+    
+    def _guess(self, data, final):
+        try:
+            data.decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError as e:
+            # 块末尾被截断的多字节字符：之前至少有一个完整的非 ASCII 字符才下结论
+            if e.reason == 'unexpected end of data' and not final:
+                return None if data[:e.start].isascii() else 'utf-8'
+        return self.fallback_encoding
+
+
+class ResourceLimits:
+    """单条命令的资源限制，对应 custom_commands.json 中的 "limits" 字段
+    
+    POSIX 下由 LIMITS_LAUNCHER 在 exec shell 前用 setrlimit/setpriority/ioprio_set 设置，只能收紧不能放宽：
+    限制值不超过本进程的硬限制，nice 只能调低优先级。rlimit 对 shell 启动的每个进程
+    分别生效（每个进程各自计算 CPU 时间和地址空间）。Windows 下只支持 nice（换算为
+    进程优先级类）和最大输出字节数。
+    """
+    FIELDS = {
+        'cpu_seconds': "CPU 时间",
+        'memory_mb': "地址空间",
+        'open_files': "打开文件数",
+        'nice': "nice",
+        'ionice': "I/O 优先级",
+        'max_output_bytes': "输出大小",
+    }
+    IONICE_CLASSES = {'low': (2, 7), 'idle': (3, 0)}  # (IOPRIO_CLASS_BE, 7) / IOPRIO_CLASS_IDLE
+    IOPRIO_SET = {'x86_64': 251, 'i686': 289, 'aarch64': 30, 'armv7l': 314,
+                  'ppc64le': 273, 's390x': 282, 'riscv64': 30}
+    # 程序因达到限制而失败时常见的错误信息
+    FAILURE_MARKERS = {
+        'memory_mb': ("Cannot allocate memory", "MemoryError", "out of memory",
+                      "bad_alloc", "无法分配内存"),
+        'open_files': ("Too many open files", "打开的文件过多"),
+    }
+    
+    def __init__(self, limits=None):
+        limits = limits or {}
+        self.values = {}
+        for key in self.FIELDS:
+            value = limits.get(key)
+            if key == 'ionice':
+                if value in self.IONICE_CLASSES:
+                    self.values[key] = value
+            elif isinstance(value, (int, float)) and value > 0:
+                self.values[key] = min(int(value), 19) if key == 'nice' else int(value)
+    
+    def __bool__(self):
+        return bool(self.values)
+    
+    def get(self, key):
+        return self.values.get(key)
+    
+    def describe(self):
+        parts = []
+        for key, value in self.values.items():
+            if key == 'cpu_seconds':
+                value = f"{value} 秒"
+            elif key == 'memory_mb':
+                value = f"{value} MB"
+            elif key == 'max_output_bytes':
+                value = format_size(value)
+            elif key == 'ionice':
+                value = "空闲" if value == 'idle' else "低"
+            parts.append(f"{self.FIELDS[key]} {value}")
+        return " · ".join(parts)
+    
+    def unsupported(self):
+        """当前系统无法实施的限制"""
+        if platform.system() == "Windows":
+            return [key for key in self.values if key not in ('nice', 'max_output_bytes')]
+        if platform.system() != "Linux":
+            return [key for key in self.values if key == 'ionice']
+        return []
+    
+    def child_settings(self):
+        """在父进程中算好子进程需要设置的值（仅 POSIX）：rlimit、nice 和 ioprio_set 的系统调用参数"""
+        import resource
+        rlimits = []
+        for key, rlimit, value in (('cpu_seconds', 'RLIMIT_CPU', self.values.get('cpu_seconds')),
+                                   ('memory_mb', 'RLIMIT_AS', (self.values.get('memory_mb') or 0) * 1024 * 1024),
+                                   ('open_files', 'RLIMIT_NOFILE', self.values.get('open_files'))):
+            if not value or not hasattr(resource, rlimit):
+                continue
+            rlimit = getattr(resource, rlimit)
+            hard = resource.getrlimit(rlimit)[1]
+            # CPU 超过软限制时收到 SIGXCPU，再超过 1 秒由内核 SIGKILL
+            new_hard = value + 1 if key == 'cpu_seconds' else value
+            if hard != resource.RLIM_INFINITY:
+                value, new_hard = min(value, hard), min(new_hard, hard)
+            rlimits.append([rlimit, value, new_hard])
+        nice = self.values.get('nice') or 0
+        if nice:
+            nice = max(nice, os.getpriority(os.PRIO_PROCESS, 0))
+        ioprio = None
+        syscall = self.IOPRIO_SET.get(platform.machine()) if platform.system() == "Linux" else None
+        if self.values.get('ionice') and syscall:
+            io_class, level = self.IONICE_CLASSES[self.values['ionice']]
+            ioprio = [syscall, 1, 0, (io_class << 13) | level]  # IOPRIO_WHO_PROCESS, 当前进程
+        return {'rlimits': rlimits, 'nice': nice, 'ioprio': ioprio}
+    
+    def popen_args(self, command):
+        """返回传给 Popen 的 (参数, 关键字参数)
+        
+        POSIX 下有需要设置的限制时经 LIMITS_LAUNCHER 启动；不使用 preexec_fn，
+        本进程总有其他线程在运行，在 fork 与 exec 之间执行 Python 代码可能死锁。
+        """
+        if platform.system() == "Windows":
+            nice = self.values.get('nice')
+            if not nice:
+                return command, {'shell': True}
+            return command, {'shell': True,
+                             'creationflags': subprocess.IDLE_PRIORITY_CLASS if nice >= 10
+                             else subprocess.BELOW_NORMAL_PRIORITY_CLASS}
+        settings = self.child_settings() if self.values else None
+        if settings and any(settings.values()):
+            return limits_launcher_args(settings, command), {}
+        return command, {'shell': True}
+    
+    def fired(self, returncode, stats, output_tail):
+        """根据退出状态、CPU 时间和输出末尾的错误信息判断触发了哪项限制"""
+        if returncode is None or returncode == 0:
+            return None
+        # shell 直接 exec 时返回 -信号，否则 shell 以 128+信号 退出
+        sig = -returncode if returncode < 0 else returncode - 128 if returncode > 128 else 0
+        cpu_limit = self.values.get('cpu_seconds')
+        if cpu_limit:
+            cpu_used = ((stats or {}).get('user') or 0) + ((stats or {}).get('sys') or 0)
+            if sig == getattr(signal, 'SIGXCPU', None) or (sig == signal.SIGKILL and cpu_used >= cpu_limit):
+                return 'cpu_seconds'
+        for key, markers in self.FAILURE_MARKERS.items():
+            if key in self.values and any(marker in output_tail for marker in markers):
+                return key
+        if 'memory_mb' in self.values and sig in (signal.SIGSEGV, signal.SIGABRT):
+            return 'memory_mb'
+        return None
+
+
+def kill_process_tree(pid):
+    """强制终止进程及其子进程（POSIX 下 pid 须为进程组组长）"""
+    try:
+        if platform.system() == "Windows":
+            subprocess.run(f"taskkill /T /F /PID {pid}", shell=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(pid, signal.SIGKILL)
+    except (OSError, ProcessLookupError):
+        pass
+
 
 class CommandExecutor(QThread):
     """后台执行命令的线程"""
     output_signal = pyqtSignal(str)
     finished_signal = pyqtSignal(bool)
     
-    def __init__(self, command):
+    CHUNK_SIZE = 64 * 1024
+    TAIL_CHARS = 4096
+    
+    def __init__(self, command, limits=None):
+        super().__init__()
+        self.command = command
+        self.limits = limits if isinstance(limits, ResourceLimits) else ResourceLimits(limits)
+        self.limit_hit = None
+        self.process = None
+        self.killed = False
+        self.timed_out = False
+        self.output_slots = None
+        self.discard_output = False
+        self.stats = None
+    
+    def enable_backpressure(self, max_in_flight=8):
+        """限制已发送但尚未被处理的输出块数量，界面处理不过来时暂停读取管道"""
+        self.output_slots = threading.Semaphore(max_in_flight)
+    
+    def output_consumed(self):
+        """由接收方在处理完一块输出后调用"""
+        if self.output_slots is not None:
+            self.output_slots.release()
+    
+    def _emit_output(self, text):
+        slots = self.output_slots
+        if slots is not None:
+            while not slots.acquire(timeout=0.2):
+                if self.killed:
+                    break
+        self.output_signal.emit(text)
+    
+    def kill(self):
+        """终止正在执行的命令（包括 shell 启动的子进程）"""
+        self.killed = True
+        self._kill_tree()
+    
+    def _kill_tree(self):
+        process = self.process
+        if process is not None and process.poll() is None:
+            kill_process_tree(process.pid)
+    
+    def _wait_process(self, process, started, timeout=30):
+        """等待进程结束，记录耗时和资源占用到 self.stats
+        
+        POSIX 下用阻塞的 wait4 回收进程，得到 shell 及其已回收子进程的 CPU 时间和峰值内存；
+        其他平台只有耗时。fork/exec 会把本进程的内存峰值带给子进程，
+        因此不超过本进程峰值的 max_rss 无法区分，记为 None。
+        超过 timeout 秒仍未结束时由定时器终止进程，然后抛出 TimeoutExpired。
+        """
+        stats = {'wall': None, 'user': None, 'sys': None, 'max_rss': None}
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, self._timeout_kill, args=(process.pid,))
+            timer.daemon = True
+            timer.start()
+        try:
+            if hasattr(os, 'wait4'):
+                try:
+                    _, status, usage = os.wait4(process.pid, 0)
+                    stats['wall'] = time.perf_counter() - started
+                    process.returncode = os.waitstatus_to_exitcode(status)
+                    import resource
+                    # ru_maxrss 在 macOS 上是字节，在 Linux 上是 KB
+                    scale = 1 if sys.platform == 'darwin' else 1024
+                    own_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                    stats.update(user=usage.ru_utime, sys=usage.ru_stime,
+                                 max_rss=usage.ru_maxrss * scale if usage.ru_maxrss > own_rss else None)
+                except ChildProcessError:
+                    # 已被 kill() 中的 poll() 回收
+                    process.wait()
+            else:
+                process.wait()
+        finally:
+            if timer is not None:
+                timer.cancel()
+        if self.timed_out:
+            raise subprocess.TimeoutExpired(process.args, timeout)
+        if stats['wall'] is None:
+            stats['wall'] = time.perf_counter() - started
+        stats['returncode'] = process.returncode
+        self.stats = stats
+    
+    def _timeout_kill(self, pid):
+        # 进程在被 wait4 回收之前 pid 不会被复用，可以直接终止
+        self.timed_out = True
+        kill_process_tree(pid)
+    
+    def run(self):
+        try:
+            popen_kwargs = {}
+            if platform.system() != "Windows":
+                # 独立进程组，便于 kill() 一并终止子进程
+                popen_kwargs['start_new_session'] = True
+            args, limit_kwargs = self.limits.popen_args(self.command)
+            popen_kwargs.update(limit_kwargs)
+            if self.discard_output:
+                # 性能测试不关心输出，直接丢弃（与 hyperfine 相同）
+                popen_kwargs.update(stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            else:
+                # 读取原始字节，stderr 合并到 stdout，避免两个管道互相阻塞
+                popen_kwargs.update(stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            started = time.perf_counter()
+            process = subprocess.Popen(
+                args,
+                bufsize=0,
+                **popen_kwargs
+            )
+            self.process = process
+            if self.killed:
+                self.kill()
+            
+            # 按块读取并增量解码，每次发送若干完整行
+            has_output = self.discard_output
+            tail = ''
+            if not self.discard_output:
+                decoder = StreamDecoder()
+                read = process.stdout.read
+                remaining = self.limits.get('max_output_bytes')
+                while True:
+                    chunk = read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        if len(chunk) > remaining:
+                            chunk = chunk[:remaining]
+                            self.limit_hit = 'max_output_bytes'
+                            self._kill_tree()
+                        remaining -= len(chunk)
+                    text = decoder.feed(chunk)
+                    if text:
+                        has_output = True
+                        tail = (tail + text)[-self.TAIL_CHARS:]
+                        self._emit_output(text)
+                    if self.limit_hit:
+                        break
+                text = decoder.finish()
+                if text:
+                    has_output = True
+                    tail = (tail + text)[-self.TAIL_CHARS:]
+                    self._emit_output(text)
+            
+            self._wait_process(process, started, None if self.discard_output else 30)
+            
+            if self.killed:
+                self.output_signal.emit("⛔ 命令已被终止")
+                self.finished_signal.emit(False)
+                return
+            
+            self.limit_hit = self.limit_hit or self.limits.fired(process.returncode, self.stats, tail)
+            if self.limit_hit:
+                fired = ResourceLimits({self.limit_hit: self.limits.get(self.limit_hit)})
+                self.output_signal.emit(f"\n🚧 已达到资源限制: {fired.describe()}")
+                self.finished_signal.emit(False)
+                return
+            
+            if not has_output:
+                self.output_signal.emit("✅ 命令执行成功！")
+            
+            self.finished_signal.emit(process.returncode == 0)
+        except subprocess.TimeoutExpired:
+            self.output_signal.emit("⚠️ 命令执行超时")
+            self.finished_signal.emit(False)
+        except Exception as e:
+            self.output_signal.emit(f"❌ 错误: {str(e)}")
+            self.finished_signal.emit(False)
+
+
+# 在新会话中设置资源限制后 exec /bin/sh；参数为 child_settings() 的 JSON 和命令
+LIMITS_LAUNCHER = """
+import json, os, resource, signal, sys
+settings = json.loads(sys.argv[1])
+# 已是进程组组长时 setsid 会失败，kill_process_tree 也已能终止整个进程组
+if os.getpgid(0) != os.getpid():
+    os.setsid()
+for rlimit, soft, hard in settings['rlimits']:
+    resource.setrlimit(rlimit, (soft, hard))
+if settings['nice']:
+    os.setpriority(os.PRIO_PROCESS, 0, settings['nice'])
+if settings['ioprio']:
+    import ctypes
+    ctypes.CDLL(None).syscall(*settings['ioprio'])
+# Python 启动时忽略的信号在 exec 后仍被忽略，需要恢复默认处理
+for name in ('SIGPIPE', 'SIGXFSZ', 'SIGXCPU'):
+    if hasattr(signal, name):
+        signal.signal(getattr(signal, name), signal.SIG_DFL)
+os.execv('/bin/sh', ['/bin/sh', '-c', sys.argv[2]])
+"""
+# 打包后的程序没有独立的 Python 解释器，用自身加上这个参数运行 LIMITS_LAUNCHER
+LIMITS_LAUNCHER_FLAG = '--limits-launcher'
+
+
+def limits_launcher_args(settings, command):
+    """经 LIMITS_LAUNCHER 设置限制后执行命令的完整参数列表（第一项是程序）"""
+    payload = json.dumps(settings)
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, LIMITS_LAUNCHER_FLAG, payload, command]
+    return [sys.executable, '-I', '-S', '-c', LIMITS_LAUNCHER, payload, command]
+
+
+def run_limits_launcher():
+    """打包后的程序以 LIMITS_LAUNCHER_FLAG 启动时执行启动器（成功时不返回）"""
+    sys.argv = sys.argv[1:]
+    exec(LIMITS_LAUNCHER, {'__name__': '__main__'})
+
+
+class ProcessExecutor(QObject):
+    """基于 QProcess 的命令执行器，信号和主要接口与 CommandExecutor 相同
+    
+    不创建线程：输出由所在线程的事件循环在 readyRead 时非阻塞读取，
+    同时运行数百条命令也只需要一个线程。有资源限制时先启动 LIMITS_LAUNCHER
+    设置限制再 exec shell。子进程由 Qt 回收，stats 中只有耗时和退出码。
+    QProcess 在进程结束前不会通知输出管道已关闭，因此没有 CommandExecutor 那样
+    "输出结束后 30 秒仍未退出即超时" 的判断，命令一直运行到结束或被终止。
+    """
+    output_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(bool)
+    finished = pyqtSignal()
+    
+    TAIL_CHARS = CommandExecutor.TAIL_CHARS
+    
+    def __init__(self, command, limits=None, parent=None):
+        super().__init__(parent)
+        self.command = command
+        self.limits = limits if isinstance(limits, ResourceLimits) else ResourceLimits(limits)
+        self.limit_hit = None
+        self.process = None
+        self.killed = False
+        self.discard_output = False
+        self.stats = None
+        self._decoder = StreamDecoder()
+        self._tail = ''
+        self._has_output = False
+        self._remaining = None
+        self._started = None
+        self._done = False
+    
+    @staticmethod
+    def supports(limits):
+        """能否实施这些限制：Windows 下的 nice 需要 CreateProcess 参数"""
+        limits = limits if isinstance(limits, ResourceLimits) else ResourceLimits(limits)
+        if platform.system() == "Windows":
+            return not limits.get('nice')
+        return True
+    
+    def enable_backpressure(self, max_in_flight=8):
+        """输出在读取它的线程中同步处理，不需要流控"""
+    
+    def output_consumed(self):
+        pass
+    
+    def start(self):
+        process = QProcess(self)
+        self.process = process
+        process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+        if self.discard_output:
+            process.setStandardOutputFile(QProcess.nullDevice())
+        process.readyReadStandardOutput.connect(self._read)
+        process.finished.connect(self._on_finished)
+        process.errorOccurred.connect(self._on_error)
+        self._remaining = self.limits.get('max_output_bytes')
+        if platform.system() == "Windows":
+            # 与 subprocess 的 shell=True 相同
+            process.setProgram(os.environ.get('COMSPEC', 'cmd.exe'))
+            process.setNativeArguments(f'/c "{self.command}"')
+        else:
+            settings = self.limits.child_settings() if self.limits else None
+            if (settings and any(settings.values())) or not hasattr(process, 'setUnixProcessParameters'):
+                program, *arguments = limits_launcher_args(
+                    settings or {'rlimits': [], 'nice': 0, 'ioprio': None}, self.command)
+                process.setProgram(program)
+                process.setArguments(arguments)
+            else:
+                process.setProgram('/bin/sh')
+                process.setArguments(['-c', self.command])
+            if hasattr(process, 'setUnixProcessParameters'):
+                # 独立会话便于 kill() 一并终止子进程；恢复 Python 忽略的 SIGPIPE 等信号
+                # PyQt6 中 UnixProcessFlag 是普通枚举，不支持 | 运算，按数值组合
+                flags = QProcess.UnixProcessFlag
+                process.setUnixProcessParameters(flags(flags.CreateNewSession.value
+                                                       | flags.ResetSignalHandlers.value))
+        self._started = time.perf_counter()
+        process.start()
+    
+    def wait(self, msecs=-1):
+        """阻塞等待命令结束，返回是否已结束"""
+        if self.process is not None and self.process.state() != QProcess.ProcessState.NotRunning:
+            self.process.waitForFinished(msecs)
+        return self._done
+    
+    def kill(self):
+        """终止正在执行的命令（包括 shell 启动的子进程）"""
+        self.killed = True
+        self._kill_tree()
+    
+    def _kill_tree(self):
+        process = self.process
+        if process is not None and process.state() != QProcess.ProcessState.NotRunning:
+            kill_process_tree(process.processId())
+    
+    def _emit_output(self, text):
+        if text:
+            self._has_output = True
+            self._tail = (self._tail + text)[-self.TAIL_CHARS:]
+            self.output_signal.emit(text)
+    
+    def _read(self):
+        data = self.process.readAllStandardOutput().data()
+        if not data or self.limit_hit == 'max_output_bytes':
+            return
+        if self._remaining is not None:
+            if len(data) > self._remaining:
+                data = data[:self._remaining]
+                self.limit_hit = 'max_output_bytes'
+                self._kill_tree()
+            self._remaining -= len(data)
+        self._emit_output(self._decoder.feed(data))
+    
+    def _on_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            # 可能在 start() 内部同步发出，此时调用方还没有连接信号，推迟到下一轮事件循环
+            message = f"❌ 错误: {self.process.errorString()}"
+            QTimer.singleShot(0, lambda: self._finish(False, message))
+    
+    def _on_finished(self, exit_code, exit_status):
+        self._read()
+        self._emit_output(self._decoder.finish())
+        # 被信号终止时 Qt 给出的 exitCode 是信号编号
+        if exit_status == QProcess.ExitStatus.CrashExit:
+            returncode = -(exit_code or signal.SIGKILL)
+        else:
+            returncode = exit_code
+        self.stats = {'wall': time.perf_counter() - self._started, 'user': None, 'sys': None,
+                      'max_rss': None, 'returncode': returncode}
+        if self.killed:
+            self._finish(False, "⛔ 命令已被终止")
+            return
+        self.limit_hit = self.limit_hit or self.limits.fired(returncode, self.stats, self._tail)
+        if self.limit_hit:
+            fired = ResourceLimits({self.limit_hit: self.limits.get(self.limit_hit)})
+            self._finish(False, f"\n🚧 已达到资源限制: {fired.describe()}")
+            return
+        self._finish(returncode == 0, None if self._has_output or self.discard_output else "✅ 命令执行成功！")
+    
+    def _finish(self, success, message):
+        if self._done:
+            return
+        self._done = True
+        if message:
+            self.output_signal.emit(message)
+        self.finished_signal.emit(success)
+        # 推迟到 QProcess 的信号处理结束之后，接收方此时释放执行器是安全的
+        QTimer.singleShot(0, lambda: self.finished.emit())
+
+
+EXECUTOR_BACKENDS = {'process': ProcessExecutor, 'thread': CommandExecutor}
+# 默认每条命令一个线程；--executor process 改用 ProcessExecutor
+executor_backend = 'thread'
+
+
+def create_executor(command, limits=None, backend=None):
+    """按 executor_backend 创建执行器；ProcessExecutor 无法实施的限制改用 CommandExecutor"""
+    backend = backend or executor_backend
+    if backend == 'process' and not ProcessExecutor.supports(limits):
+        backend = 'thread'
+    return EXECUTOR_BACKENDS[backend](command, limits)
+
+
+class AnsiParser:
+    """流式 ANSI 转义序列解析器，把 SGR 颜色代码转换为 (文本, 样式) 片段
+    
+    样式是不可变元组 (前景色, 背景色, 粗体, 斜体, 下划线, 反色)，可直接作为缓存键。
+    其他转义序列（光标移动、清屏、窗口标题、字符集切换等）直接丢弃。
+    """
+    # 整个转义序列作为捕获组，re.split 后文本与转义序列交替出现
+    # 依次是 CSI、OSC，以及 ESC [ -/]* 加一个结尾字节的其他序列（如 tput sgr0 输出的 ESC ( B）；
+    # 最后一种排除 [ 和 ]，被截断的 CSI/OSC 才会留到下一次解析
+    ESCAPE_RE = re.compile(r'(\x1b(?:\[[0-9;:?<=>]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[ -/]*[0-Z\\^-~]))')
+    DEFAULT_STATE = (None, None, False, False, False, False)
+    
+    # 标准 16 色（在深色输出区域上保持可读）
+    BASIC_COLORS = [
+        '#4b5563', '#ef4444', '#22c55e', '#eab308', '#3b82f6', '#d946ef', '#06b6d4', '#e5e7eb',
+        '#6b7280', '#f87171', '#4ade80', '#facc15', '#60a5fa', '#e879f9', '#22d3ee', '#ffffff',
+    ]
+    
+    def __init__(self):
+        self.state = self.DEFAULT_STATE
+        self._pending = ''
+        # (样式, 转义序列) -> 新样式，同一种颜色代码只解析一次
+        self._transitions = {}
+    
+    def reset(self):
+        self.state = self.DEFAULT_STATE
+        self._pending = ''
+    
+    def parse(self, text):
+        """解析一段文本，返回合并后的 [(文本, 样式), ...]"""
+        if self._pending:
+            text = self._pending + text
+            self._pending = ''
+        if '\x1b' not in text:
+            return [(text, self.state)] if text else []
+        
+        # 被截断的转义序列留到下一次解析
+        esc = text.rfind('\x1b')
+        if len(text) - esc < 64 and not self.ESCAPE_RE.match(text, esc):
+            self._pending = text[esc:]
+            text = text[:esc]
+        
+        runs = []
+        pieces = []
+        state = self.state
+        transitions = self._transitions
+        parts = self.ESCAPE_RE.split(text)
+        # split 结果为 文本, 转义序列, 文本, 转义序列, ... 交替排列
+        for i in range(1, len(parts), 2):
+            piece = parts[i - 1]
+            if piece:
+                pieces.append(piece)
+            escape = parts[i]
+            if escape[-1] != 'm' or escape[1] != '[':
+                continue
+            key = (state, escape)
+            new_state = transitions.get(key)
+            if new_state is None:
+                new_state = transitions[key] = self._apply_sgr(state, escape[2:-1])
+            if new_state != state:
+                if pieces:
+                    runs.append((''.join(pieces), state))
+                    pieces = []
+                state = new_state
+        if parts[-1]:
+            pieces.append(parts[-1])
+        if pieces:
+            runs.append((''.join(pieces), state))
+        self.state = state
+        return runs
+    
+    def _apply_sgr(self, state, params):
+        fg, bg, bold, italic, underline, inverse = state
+        codes = [int(p) if p.isdigit() else 0 for p in params.replace(':', ';').split(';')] if params else [0]
+        i = 0
+        while i < len(codes):
+            code = codes[i]
+            if code == 0:
+                fg, bg, bold, italic, underline, inverse = self.DEFAULT_STATE
+            elif code == 1:
+                bold = True
+            elif code == 3:
+                italic = True
+            elif code == 4:
+                underline = True
+            elif code == 7:
+                inverse = True
+            elif code == 22:
+                bold = False
+            elif code == 23:
+                italic = False
+            elif code == 24:
+                underline = False
+            elif code == 27:
+                inverse = False
+            elif 30 <= code <= 37:
+                fg = self.BASIC_COLORS[code - 30]
+            elif 90 <= code <= 97:
+                fg = self.BASIC_COLORS[code - 90 + 8]
+            elif code == 39:
+                fg = None
+            elif 40 <= code <= 47:
+                bg = self.BASIC_COLORS[code - 40]
+            elif 100 <= code <= 107:
+                bg = self.BASIC_COLORS[code - 100 + 8]
+            elif code == 49:
+                bg = None
+            elif code in (38, 48):
+                color, i = self._extended_color(codes, i)
+                if code == 38:
+                    fg = color
+                else:
+                    bg = color
+            i += 1
+        return (fg, bg, bold, italic, underline, inverse)
+    
+    def _extended_color(self, codes, i):
+        """解析 38;5;n 与 38;2;r;g;b，返回 (颜色, 最后一个已用参数的下标)"""
+        if i + 2 < len(codes) and codes[i + 1] == 5:
+            n = codes[i + 2]
+            if n < 16:
+                return self.BASIC_COLORS[n], i + 2
+            if n < 232:
+                n -= 16
+                levels = [0, 95, 135, 175, 215, 255]
+                r, g, b = levels[n // 36 % 6], levels[n // 6 % 6], levels[n % 6]
+            else:
+                r = g = b = 8 + (min(n, 255) - 232) * 10
+            return f'#{r:02x}{g:02x}{b:02x}', i + 2
+        if i + 1 < len(codes) and codes[i + 1] == 2 and i + 4 < len(codes):
+            r, g, b = (min(c, 255) for c in codes[i + 2:i + 5])
+            return f'#{r:02x}{g:02x}{b:02x}', i + 4
+        return None, len(codes)
+
+
+class AnsiTextRenderer:
+    """把带 ANSI 颜色的输出批量写入 QTextEdit，样式对应的 QTextCharFormat 会被缓存复用"""
+    # insertText 遇到 \r、\r\n 和 U+2029 也会开始新段落，统一换成 \n，
+    # 使 OutputBuffer 的行号与段落号保持一致（U+2028 显示为换行，也一并换掉）
+    LINE_BREAK_RE = re.compile('\r\n?|[\u2028\u2029]')
+    
+    def __init__(self, text_edit):
+        self.text_edit = text_edit
+        self.parser = AnsiParser()
+        self._formats = {}
+        self._at_start = True
+    
+    def clear_cache(self):
+        """主题切换后默认颜色改变，需要重新生成格式"""
+        self._formats.clear()
+    
+    def reset(self):
+        self.parser.reset()
+    
+    def clear(self):
+        self.text_edit.clear()
+        self.parser.reset()
+        self._at_start = True
+    
+    def append(self, text):
+        """与 QTextEdit.append 相同，在新段落中追加文本，返回去掉转义序列、换行统一为 \n 后的纯文本"""
+        text = self.LINE_BREAK_RE.sub('\n', text)
+        runs = self.parser.parse(text)
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        prefix = '' if self._at_start else '\n'
+        self._at_start = False
+        if not runs:
+            cursor.insertText(prefix, self._format(AnsiParser.DEFAULT_STATE))
+        for run_text, state in runs:
+            cursor.insertText(prefix + run_text, self._format(state))
+            prefix = ''
+        cursor.endEditBlock()
+        if len(runs) == 1:
+            return runs[0][0]
+        return ''.join(run_text for run_text, _ in runs)
+    
+    def _format(self, state):
+        fmt = self._formats.get(state)
+        if fmt is None:
+            fmt = QTextCharFormat()
+            fg, bg, bold, italic, underline, inverse = state
+            if inverse:
+                palette = self.text_edit.palette()
+                fg, bg = (bg or palette.color(QPalette.ColorRole.Base).name(),
+                          fg or palette.color(QPalette.ColorRole.Text).name())
+            if fg:
+                fmt.setForeground(QColor(fg))
+            if bg:
+                fmt.setBackground(QColor(bg))
+            if bold:
+                fmt.setFontWeight(QFont.Weight.Bold)
+            if italic:
+                fmt.setFontItalic(True)
+            if underline:
+                fmt.setFontUnderline(True)
+            self._formats[state] = fmt
+        return fmt
+
+
+class OutputFlowController(QObject):
+    """执行器与输出区域之间的流控
+    
+    - 连续相同的行折叠为 “×N” 标记
+    - 每 FLUSH_INTERVAL 毫秒最多渲染 MAX_LINES_PER_FLUSH 行
+    - 积压超过 MAX_BACKLOG 行时只渲染最新部分，并提示省略的行数
+    - 无论是否渲染，完整输出都以 UTF-8 字节块保存在 captured 中
+    """
+    render_ready = pyqtSignal(str)
+    
+    FLUSH_INTERVAL = 50
+    MAX_LINES_PER_FLUSH = 2000
+    MAX_BACKLOG = 20000
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.FLUSH_INTERVAL)
+        self._timer.timeout.connect(self._flush)
+        self.start_run()
+    
+    def start_run(self, display=True):
+        """开始新的一次执行；display 为 False 时只保存完整输出，不渲染"""
+        self.display = display
+        self.captured = []
+        self.captured_lines = 0
+        self.dropped = 0
+        self._pending = []
+        self._last_line = None
+        self._repeat = 0
+    
+    def feed(self, text):
+        """接收执行器输出的若干完整行"""
+        self.captured.append(text.encode('utf-8', 'surrogatepass'))
+        lines = text.split('\n')
+        self.captured_lines += len(lines)
+        if not self.display:
+            return
+        pending = self._pending
+        if lines[0] != self._last_line and not any(map(operator.eq, lines, itertools.islice(lines, 1, None))):
+            # 常见情况：没有连续重复的行
+            if self._repeat:
+                pending.append(self._repeat_marker(self._repeat))
+                self._repeat = 0
+            pending.extend(lines)
+            self._last_line = lines[-1]
+        else:
+            last = self._last_line
+            repeat = self._repeat
+            for line in lines:
+                if line == last:
+                    repeat += 1
+                    continue
+                if repeat:
+                    pending.append(self._repeat_marker(repeat))
+                    repeat = 0
+                pending.append(line)
+                last = line
+            self._last_line = last
+            self._repeat = repeat
+        if not self._timer.isActive():
+            self._timer.start()
+    
+    def finish(self):
+        """执行结束，立即渲染剩余内容"""
+        if self._repeat:
+            self._pending.append(self._repeat_marker(self._repeat))
+            self._repeat = 0
+        self._last_line = None
+        self._flush(final=True)
+        self._timer.stop()
+    
+    def full_output(self):
+        return b'\n'.join(self.captured).decode('utf-8', 'surrogatepass')
+    
+    @staticmethod
+    def _repeat_marker(count):
+        return f"  ⋯ 上一行重复 ×{count}"
+    
+    @timed_slot
+    def _flush(self, final=False):
+        pending = self._pending
+        # 持续刷屏的相同内容（如 yes）定期显示一次计数
+        if self._repeat >= self.MAX_LINES_PER_FLUSH:
+            pending.append(self._repeat_marker(self._repeat))
+            self._repeat = 0
+        if not pending:
+            if not self._repeat:
+                self._timer.stop()
+            return
+        if len(pending) > self.MAX_BACKLOG:
+            # 渲染跟不上：丢弃较早的积压，只显示最新的部分
+            skipped = len(pending) - self.MAX_LINES_PER_FLUSH
+            del pending[:skipped]
+            self.dropped += skipped
+            self.render_ready.emit(f"⚠️ {skipped} 行未显示（输出过快），完整输出已保留，可点击 “💾 完整输出” 保存")
+        count = len(pending) if final else self.MAX_LINES_PER_FLUSH
+        self.render_ready.emit('\n'.join(pending[:count]))
+        del pending[:count]
+
+
+class OutputBuffer:
+    """输出区域纯文本的行索引，行号与 QTextEdit 的段落号一一对应
+    
+    文本以 UTF-8 编码按 BLOCK_LINES 行封存为一个 bytes，并用 array 记录每行的起始字节偏移；
+    最后一个未满的块是 bytearray。每行只占其 UTF-8 字节数加 4 字节偏移，没有单独的 str 对象，
+    也不会因为一行中有 emoji 而使整块文本变为每字符 4 字节。
+    搜索时把整块解码后直接运行正则，再用二分查找把匹配位置换算为行号。
+    """
+    BLOCK_LINES = 4096
+    
+    def __init__(self):
+        self.clear()
+    
+    def clear(self):
+        self._blocks = []
+        self._block_offsets = []
+        self._open = bytearray()
+        self._open_offsets = array('I')
+        self.line_count = 0
+    
+    def append(self, text):
+        """追加一个或多个段落（与 QTextEdit.append 对应）"""
+        # UTF-8 的多字节序列中不会出现 0x0A，可以直接按字节拆分
+        lines = text.encode('utf-8', 'surrogatepass').split(b'\n')
+        self.line_count += len(lines)
+        start = 0
+        while start < len(lines):
+            offsets = self._open_offsets
+            part = lines[start:start + self.BLOCK_LINES - len(offsets)]
+            start += len(part)
+            if offsets:
+                self._open += b'\n'
+            offsets.extend(itertools.accumulate((len(line) + 1 for line in part[:-1]), initial=len(self._open)))
+            self._open += b'\n'.join(part)
+            if len(offsets) == self.BLOCK_LINES:
+                self._blocks.append(bytes(self._open))
+                self._block_offsets.append(offsets)
+                self._open = bytearray()
+                self._open_offsets = array('I')
+    
+    def _block(self, index):
+        if index < len(self._blocks):
+            return self._blocks[index], self._block_offsets[index]
+        return self._open, self._open_offsets
+    
+    def line(self, number):
+        """返回第 number 行的文本"""
+        index, row = divmod(number, self.BLOCK_LINES)
+        data, offsets = self._block(index)
+        end = offsets[row + 1] - 1 if row + 1 < len(offsets) else len(data)
+        return data[offsets[row]:end].decode('utf-8', 'surrogatepass')
+    
+    def search_block(self, regex, start_line, lines, cols, lengths):
+        """搜索 start_line 所在块中从该行开始的部分，匹配结果追加到三个数组，返回下一个待搜索的行号"""
+        index = start_line // self.BLOCK_LINES
+        first = index * self.BLOCK_LINES
+        data, offsets = self._block(index)
+        end_line = first + len(offsets)
+        if start_line >= end_line:
+            return end_line
+        text = data.decode('utf-8', 'surrogatepass')
+        if len(text) != len(data):
+            # 含非 ASCII 字符时字节偏移与字符偏移不同，按字符重新计算
+            offsets = array('I', itertools.accumulate((len(line) + 1 for line in text.split('\n')), initial=0))
+            offsets.pop()
+        for match in regex.finditer(text, offsets[start_line - first]):
+            start, end = match.span()
+            if start == end:
+                continue
+            row = bisect.bisect_right(offsets, start) - 1
+            line_end = offsets[row + 1] - 1 if row + 1 < len(offsets) else len(text)
+            lines.append(first + row)
+            cols.append(start - offsets[row])
+            lengths.append(min(end, line_end) - start)
+        return end_line
+
+
+class OutputSearch(QObject):
+    """在 OutputBuffer 上增量搜索
+    
+    搜索按块分片执行，每片最多占用 TIME_SLICE 秒，剩余部分交给下一轮事件循环；
+    新输出追加后只搜索新增的行。
+    """
+    matches_changed = pyqtSignal()
+    TIME_SLICE = 0.02
+    
+    def __init__(self, buffer, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+        self.regex = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._step)
+        self.reset()
+    
+    def reset(self):
+        """清空匹配结果（输出被清空或搜索条件改变）"""
+        self.lines = array('I')
+        self.cols = array('I')
+        self.lengths = array('I')
+        self._next_line = 0
+        self._timer.stop()
+        self.matches_changed.emit()
+    
+    def set_pattern(self, text, use_regex=False, case_sensitive=False):
+        """设置搜索条件，正则表达式无效时抛出 re.error"""
+        regex = None
+        if text:
+            flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+            regex = re.compile(text if use_regex else re.escape(text), flags)
+        self.regex = regex
+        self.reset()
+        self.notify_appended()
+    
+    def notify_appended(self):
+        if self.regex is not None and not self._timer.isActive():
+            self._timer.start()
+    
+    def is_complete(self):
+        return self.regex is None or self._next_line >= self.buffer.line_count
+    
+    def _step(self):
+        deadline = time.perf_counter() + self.TIME_SLICE
+        while self._next_line < self.buffer.line_count and time.perf_counter() < deadline:
+            self._next_line = self.buffer.search_block(
+                self.regex, self._next_line, self.lines, self.cols, self.lengths)
+        self.matches_changed.emit()
+        if self._next_line < self.buffer.line_count:
+            self._timer.start()
+
+
+class FilteredLinesModel(QAbstractListModel):
+    """“仅显示匹配行”视图的数据模型，只保存行号，文本按需从 OutputBuffer 读取"""
+    def __init__(self, search, parent=None):
+        super().__init__(parent)
+        self.search = search
+        self.rows = array('I')
+        self._consumed = 0
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            number = self.rows[index.row()]
+            return f"{number + 1:>7}  {self.search.buffer.line(number)}"
+        return None
+    
+    def line_number(self, row):
+        return self.rows[row]
+    
+    def sync(self):
+        """把搜索新增的匹配行追加到模型"""
+        lines = self.search.lines
+        if len(lines) < self._consumed:
+            self.beginResetModel()
+            self.rows = array('I')
+            self._consumed = 0
+            self.endResetModel()
+        if len(lines) == self._consumed:
+            return
+        new_rows = array('I')
+        last = self.rows[-1] if self.rows else -1
+        for number in lines[self._consumed:]:
+            if number != last:
+                new_rows.append(number)
+                last = number
+        self._consumed = len(lines)
+        if new_rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(new_rows) - 1)
+            self.rows.extend(new_rows)
+            self.endInsertRows()
+
+
+class WhitespaceTableParser:
+    """按空白拆分列的解析器，第一行非空文本为表头，最后一列吸收剩余内容（如 ps 的 COMMAND）
+    
+    aliases 用于把含空格的表头（如 df 的 "Mounted on"）合并为一列。
+    """
+    def __init__(self, aliases=None, skip_prefixes=()):
+        self.aliases = aliases or {}
+        self.skip_prefixes = skip_prefixes
+        self.headers = None
+    
+    def feed(self, line):
+        """输入一行，返回解析出的数据行（列表），表头或无效行返回 None"""
+        if not line.strip() or line.lstrip().startswith(self.skip_prefixes):
+            return None
+        if self.headers is None:
+            for alias, name in self.aliases.items():
+                line = line.replace(alias, name)
+            self.headers = line.split()
+            return None
+        values = line.split(None, len(self.headers) - 1)
+        if len(values) < len(self.headers):
+            values += [''] * (len(self.headers) - len(values))
+        return values
+
+
+class FixedWidthTableParser:
+    """按表头位置切分列的解析器，适用于 wmic、tasklist 等左对齐输出
+    
+    如果表头下一行是 "===== ====" 形式的分隔线，则以分隔线确定列宽。
+    """
+    def __init__(self):
+        self.headers = None
+        self._header_line = None
+        self._starts = None
+        self._rows_seen = False
+    
+    def feed(self, line):
+        line = line.rstrip()
+        if not line.strip():
+            return None
+        if self._header_line is None:
+            self._header_line = line
+            # 表头中以两个以上空格分隔列，列名内部允许单个空格
+            self._set_columns(r'\S+(?: \S+)*', line)
+            return None
+        if not self._rows_seen and set(line.strip()) <= {'=', '-', ' '}:
+            # 分隔线：按分隔段重新确定列边界
+            self._set_columns(r'\S+', line)
+            return None
+        self._rows_seen = True
+        starts = self._starts
+        values = []
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else None
+            values.append(line[start:end].strip())
+        return values
+    
+    def _set_columns(self, pattern, line):
+        self._starts = [m.start() for m in re.finditer(pattern, line)]
+        header = self._header_line
+        self.headers = []
+        for i, start in enumerate(self._starts):
+            end = self._starts[i + 1] if i + 1 < len(self._starts) else None
+            self.headers.append(header[start:end].strip() or f"列{i + 1}")
+
+
+class NetstatTableParser(WhitespaceTableParser):
+    """Windows netstat -ano：跳过标题行，UDP 行没有 State 列
+    
+    中文系统的表头（协议 本地地址 外部地址 状态 PID）本身不含空格，不需要合并。
+    """
+    def __init__(self):
+        super().__init__(aliases={'Local Address': 'Local_Address', 'Foreign Address': 'Foreign_Address'},
+                         skip_prefixes=('Active', '活动'))
+    
+    def feed(self, line):
+        values = super().feed(line)
+        if values and values[0].upper() == 'UDP' and len(self.headers) == 5 and values[4] == '':
+            values = values[:3] + [''] + values[3:4]
+        return values
+
+
+# 命令 -> 表格解析器，按顺序匹配第一个
+TABLE_PARSERS = [
+    (re.compile(r'^\s*ps\s+(aux|-ef)'), WhitespaceTableParser),
+    (re.compile(r'^\s*df\b'), lambda: WhitespaceTableParser(aliases={'Mounted on': 'Mounted_on'})),
+    (re.compile(r'^\s*ss\s'), lambda: WhitespaceTableParser(
+        aliases={'Local Address:Port': 'Local_Address:Port', 'Peer Address:Port': 'Peer_Address:Port'})),
+    (re.compile(r'^\s*netstat\s+-ano'), NetstatTableParser),
+    (re.compile(r'^\s*tasklist\b'), FixedWidthTableParser),
+    (re.compile(r'^\s*wmic\b'), FixedWidthTableParser),
+]
+
+
+def create_table_parser(command):
+    """返回适用于该命令的表格解析器，没有则返回 None"""
+    for pattern, factory in TABLE_PARSERS:
+        if pattern.search(command):
+            return factory()
+    return None
+
+
+class CommandTableModel(QAbstractTableModel):
+    """表格视图的数据模型
+    
+    原始行只追加不修改；排序和过滤只生成行号数组 view，
+    排序键按列缓存（数字列转为 float，其余转为小写字符串）。
+    """
+    NUMBER_RE = re.compile(r'^([-+]?\d+(?:\.\d+)?)\s*([KMGTP]?)(?:i?B)?%?$', re.IGNORECASE)
+    UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4, 'P': 1024 ** 5}
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.headers = []
+        self.rows = []
+        self.view = array('I')
+        self.filters = {}
+        self.sort_column = -1
+        self.sort_order = Qt.SortOrder.AscendingOrder
+        self._keys = {}
+    
+    def reset(self, headers=None):
+        self.beginResetModel()
+        self.headers = list(headers or [])
+        self.rows = []
+        self.view = array('I')
+        self.filters = {}
+        self._keys = {}
+        self.endResetModel()
+    
+    def set_headers(self, headers):
+        self.beginResetModel()
+        self.headers = list(headers)
+        self.endResetModel()
+    
+    def set_rows(self, rows):
+        """整体替换数据（定时刷新的视图使用），保留当前的排序和过滤条件"""
+        self.beginResetModel()
+        self.rows = rows
+        self._keys = {}
+        self.view = array('I', (i for i in range(len(rows)) if self._accept(i)))
+        self._sort_view()
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.view)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            row = self.rows[self.view[index.row()]]
+            column = index.column()
+            return row[column] if column < len(row) else ''
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return section + 1
+    
+    def add_rows(self, rows):
+        """追加一批数据行；排序状态下新行先放在末尾，调用 apply_sort 后归位"""
+        if not rows:
+            return
+        first = len(self.rows)
+        self.rows.extend(rows)
+        new_view = array('I', (i for i in range(first, len(self.rows)) if self._accept(i)))
+        if new_view:
+            self.beginInsertRows(QModelIndex(), len(self.view), len(self.view) + len(new_view) - 1)
+            self.view.extend(new_view)
+            self.endInsertRows()
+    
+    def _accept(self, i):
+        row = self.rows[i]
+        for column, text in self.filters.items():
+            if column >= len(row) or text not in row[column].lower():
+                return False
+        return True
+    
+    def set_filter(self, column, text):
+        """设置某一列的过滤文本（不区分大小写的子串匹配），空文本取消过滤"""
+        text = text.strip().lower()
+        if text:
+            self.filters[column] = text
+        else:
+            self.filters.pop(column, None)
+        self.layoutAboutToBeChanged.emit()
+        self.view = array('I', (i for i in range(len(self.rows)) if self._accept(i)))
+        self._sort_view()
+        self.layoutChanged.emit()
+    
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self.apply_sort()
+    
+    def apply_sort(self):
+        self.layoutAboutToBeChanged.emit()
+        self._sort_view()
+        self.layoutChanged.emit()
+    
+    def _sort_view(self):
+        if 0 <= self.sort_column < len(self.headers):
+            keys = self._column_keys(self.sort_column)
+            self.view = array('I', sorted(self.view, key=keys.__getitem__,
+                                          reverse=self.sort_order == Qt.SortOrder.DescendingOrder))
+        else:
+            self.view = array('I', sorted(self.view))
+    
+    def _column_keys(self, column):
+        """返回该列的排序键（数字列为 array('d')，文本列为 list），新追加的行增量计算"""
+        keys = self._keys.get(column)
+        if keys is not None and len(keys) == len(self.rows):
+            return keys
+        start = len(keys) if keys is not None else 0
+        values = [row[column] if column < len(row) else '' for row in self.rows[start:]]
+        if keys is None or isinstance(keys, array):
+            numbers = [self._parse_number(value) for value in values]
+            if None not in numbers:
+                numbers = array('d', (float('-inf') if number == '' else number for number in numbers))
+                if keys is None:
+                    keys = numbers
+                else:
+                    keys.extend(numbers)
+                self._keys[column] = keys
+                return keys
+            if keys is not None:
+                # 数字列中出现了文本，整列改为按文本排序
+                values = [row[column] if column < len(row) else '' for row in self.rows]
+                keys = None
+        text_keys = [value.lower() for value in values]
+        if keys is None:
+            keys = text_keys
+        else:
+            keys.extend(text_keys)
+        self._keys[column] = keys
+        return keys
+    
+    def _parse_number(self, value):
+        value = value.strip().replace(',', '')
+        if not value:
+            return ''
+        match = self.NUMBER_RE.match(value)
+        if not match:
+            return None
+        return float(match.group(1)) * self.UNITS[match.group(2).upper()]
+    
+    def export_csv(self, path):
+        """按当前排序和过滤结果导出 CSV"""
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.headers)
+            rows = self.rows
+            writer.writerows(rows[i] for i in self.view)
+
+
+def format_size(size):
+    """以 du -h 的风格格式化字节数"""
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if size < 1024 or unit == 'T':
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+class DirectoryScanner(QThread):
+    """并行扫描目录树，统计各子项大小、最大的文件和最近修改的文件
+    
+    每个目录是线程池中的一个任务，扫描完成后再提交其子目录；
+    结果用定长堆保存前 TOP_N 项，并每隔 PROGRESS_INTERVAL 秒发出一次快照。
+    启用缓存时，mtime 未变化的目录直接使用上次的统计结果，不再 scandir。
+    注意目录 mtime 只在增删、改名时变化，文件内容变化不会使缓存失效。
+    """
+    progress_signal = pyqtSignal(object)
+    finished_signal = pyqtSignal(object)
+    
+    TOP_N = 20
+    RECENT_SECONDS = 24 * 3600
+    PROGRESS_INTERVAL = 0.3
+    CACHE_FILE = 'scan_cache.json'
+    
+    def __init__(self, root, use_cache=False):
+        super().__init__()
+        self.root = os.path.abspath(root)
+        self.use_cache = use_cache
+        # 目录扫描以 I/O 等待为主，线程数多于 CPU 核数
+        self.workers = min(32, (os.cpu_count() or 1) + 4)
+        self._cancel = threading.Event()
+        self._cache = {}
+    
+    def cancel(self):
+        self._cancel.set()
+    
+    def _scan_dir(self, path):
+        """扫描单个目录的直接内容（在线程池中执行）"""
+        if self._cancel.is_set():
+            return None
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        is_root = path == self.root
+        cached = self._cache.get(path)
+        if cached and not is_root and cached['mtime'] == mtime:
+            return dict(cached, cached=True)
+        
+        top_n = self.TOP_N
+        size = count = 0
+        dirs = []
+        big = []
+        recent = []
+        files = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.name)
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    size += st.st_size
+                    count += 1
+                    if is_root:
+                        files.append((st.st_size, entry.name))
+                    if len(big) < top_n:
+                        heapq.heappush(big, (st.st_size, entry.name))
+                    elif st.st_size > big[0][0]:
+                        heapq.heapreplace(big, (st.st_size, entry.name))
+                    if len(recent) < top_n:
+                        heapq.heappush(recent, (st.st_mtime, entry.name))
+                    elif st.st_mtime > recent[0][0]:
+                        heapq.heapreplace(recent, (st.st_mtime, entry.name))
+        except OSError:
+            return None
+        return {'mtime': mtime, 'size': size, 'count': count, 'dirs': dirs,
+                'big': big, 'recent': recent, 'files': files, 'cached': False}
+    
+    def run(self):
+        started = time.time()
+        if self.use_cache:
+            self._cache = self._load_cache()
+        children = {}
+        big = []
+        recent = []
+        stats = {'dirs': 0, 'files': 0, 'size': 0, 'errors': 0, 'cache_hits': 0}
+        seen = {}
+        top_n = self.TOP_N
+        
+        def push(heap, item):
+            if len(heap) < top_n:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        
+        def snapshot(done):
+            cutoff = time.time() - self.RECENT_SECONDS
+            return dict(
+                stats,
+                root=self.root,
+                done=done,
+                cancelled=self._cancel.is_set(),
+                elapsed=time.time() - started,
+                children=heapq.nlargest(top_n, ((size, name) for name, size in children.items())),
+                big=sorted(big, reverse=True),
+                recent=sorted((item for item in recent if item[0] >= cutoff), reverse=True),
+            )
+        
+        # 任务完成后把结果放入队列，主循环按完成顺序汇总
+        results = queue.SimpleQueue()
+        
+        def scan_task(path, top):
+            results.put((path, top, self._scan_dir(path)))
+        
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        pool.submit(scan_task, self.root, None)
+        outstanding = 1
+        last_progress = time.time()
+        try:
+            while outstanding and not self._cancel.is_set():
+                try:
+                    done = [results.get(timeout=self.PROGRESS_INTERVAL)]
+                except queue.Empty:
+                    done = []
+                for path, top, info in done:
+                    outstanding -= 1
+                    if info is None:
+                        stats['errors'] += 1
+                        continue
+                    seen[path] = info
+                    stats['dirs'] += 1
+                    stats['files'] += info['count']
+                    stats['size'] += info['size']
+                    stats['cache_hits'] += info['cached']
+                    if top is None:
+                        for size, name in info['files']:
+                            children[name] = size
+                    else:
+                        children[top] += info['size']
+                    for size, name in info['big']:
+                        push(big, (size, os.path.join(path, name)))
+                    for mtime, name in info['recent']:
+                        push(recent, (mtime, os.path.join(path, name)))
+                    for name in info['dirs']:
+                        child_path = os.path.join(path, name)
+                        child_top = name if top is None else top
+                        children.setdefault(child_top, 0)
+                        pool.submit(scan_task, child_path, child_top)
+                        outstanding += 1
+                if time.time() - last_progress >= self.PROGRESS_INTERVAL:
+                    last_progress = time.time()
+                    self.progress_signal.emit(snapshot(False))
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        
+        if self.use_cache and not self._cancel.is_set():
+            self._save_cache(seen)
+        self.finished_signal.emit(snapshot(True))
+    
+    def _load_cache(self):
+        try:
+            with open(self.CACHE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_cache(self, seen):
+        cache = self._cache
+        # 删除本次扫描范围内已不存在的目录
+        prefix = os.path.join(self.root, '')
+        for path in [path for path in cache if path.startswith(prefix) and path not in seen]:
+            del cache[path]
+        for path, info in seen.items():
+            if path != self.root:
+                cache[path] = {key: info[key] for key in ('mtime', 'size', 'count', 'dirs', 'big', 'recent')}
+        try:
+            with open(self.CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False, separators=(',', ':'))
+        except OSError:
+            pass
+
+
+def format_scan_report(result, mode):
+    """把扫描结果格式化为文本报告，mode: 0 目录大小 / 1 大文件 / 2 最近文件"""
+    summary = (f"共 {result['dirs']} 个目录, {result['files']} 个文件, {format_size(result['size'])}, "
+               f"耗时 {result['elapsed']:.2f} 秒")
+    if result['cache_hits']:
+        summary += f", 缓存命中 {result['cache_hits']} 个目录"
+    if result['errors']:
+        summary += f", {result['errors']} 个目录无法访问"
+    lines = [f"📂 {result['root']}", summary]
+    if result['cancelled']:
+        lines.append("⚠️ 扫描已取消，结果不完整")
+    lines.append("")
+    lines.extend(scan_result_lines(result, mode))
+    return '\n'.join(lines)
+
+
+def scan_result_lines(result, mode):
+    lines = []
+    if mode == 0:
+        for size, name in result['children']:
+            lines.append(f"{format_size(size):>8}  {name}")
+    elif mode == 1:
+        for size, path in result['big']:
+            lines.append(f"{format_size(size):>8}  {os.path.relpath(path, result['root'])}")
+    else:
+        for mtime, path in result['recent']:
+            modified = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S")
+            lines.append(f"{modified}  {os.path.relpath(path, result['root'])}")
+        if not result['recent']:
+            lines.append("最近 24 小时内没有修改过的文件")
+    return lines
+
+
+class DirectoryScanDialog(QDialog):
+    """内置目录扫描对话框：目录大小、大文件、最近文件"""
+    report_ready = pyqtSignal(str, str)
+    
+    MODES = ["📊 目录大小", "🔍 大文件", "🔎 最近文件"]
+    
+    def __init__(self, parent=None, path='.', mode=0):
+        super().__init__(parent)
+        self.setWindowTitle("目录扫描")
+        self.setMinimumSize(700, 500)
+        self.scanner = None
+        self.result = None
+        
+        layout = QVBoxLayout(self)
+        
+        path_row = QHBoxLayout()
+        self.path_input = QLineEdit(os.path.abspath(path))
+        path_row.addWidget(self.path_input)
+        browse_btn = QPushButton("📂")
+        browse_btn.setMaximumWidth(50)
+        browse_btn.clicked.connect(self.browse_path)
+        path_row.addWidget(browse_btn)
+        self.cache_check = QCheckBox("使用缓存")
+        self.cache_check.setToolTip("只重新扫描 mtime 变化过的目录（文件内容变化不会被发现）")
+        path_row.addWidget(self.cache_check)
+        self.scan_btn = QPushButton("▶️ 开始扫描")
+        self.scan_btn.setMaximumWidth(130)
+        self.scan_btn.clicked.connect(self.toggle_scan)
+        path_row.addWidget(self.scan_btn)
+        layout.addLayout(path_row)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #64748b; padding: 5px; font-size: 12px;")
+        layout.addWidget(self.status_label)
+        
+        self.result_tabs = QTabWidget()
+        self.result_lists = []
+        for title in self.MODES:
+            result_list = QListWidget()
+            result_list.setFont(QFont("Consolas", 10))
+            self.result_lists.append(result_list)
+            self.result_tabs.addTab(result_list, title)
+        self.result_tabs.setCurrentIndex(mode)
+        layout.addWidget(self.result_tabs)
+        
+        self.start_scan()
+    
+    def browse_path(self):
+        path = QFileDialog.getExistingDirectory(self, "选择目录", self.path_input.text())
+        if path:
+            self.path_input.setText(path)
+    
+    def toggle_scan(self):
+        if self.scanner is not None:
+            self.scanner.cancel()
+        else:
+            self.start_scan()
+    
+    def start_scan(self):
+        path = self.path_input.text().strip()
+        if not os.path.isdir(path):
+            QMessageBox.warning(self, "错误", f"目录不存在: {path}")
+            return
+        self.scanner = DirectoryScanner(path, self.cache_check.isChecked())
+        self.scanner.progress_signal.connect(self.show_result)
+        self.scanner.finished_signal.connect(self.scan_finished)
+        self.scan_btn.setText("⏹️ 取消")
+        self.status_label.setText("正在扫描...")
+        self.scanner.start()
+    
+    def show_result(self, result):
+        self.result = result
+        state = "完成" if result['done'] else "扫描中"
+        self.status_label.setText(
+            f"{state}: {result['dirs']} 个目录, {result['files']} 个文件, "
+            f"{format_size(result['size'])}, {result['elapsed']:.1f} 秒")
+        for mode, result_list in enumerate(self.result_lists):
+            result_list.clear()
+            result_list.addItems(scan_result_lines(result, mode))
+    
+    def scan_finished(self, result):
+        self.scanner.wait()
+        self.scanner = None
+        self.scan_btn.setText("▶️ 开始扫描")
+        self.show_result(result)
+        mode = self.result_tabs.currentIndex()
+        self.report_ready.emit(self.MODES[mode], format_scan_report(result, mode))
+    
+    def done(self, result):
+        if self.scanner is not None:
+            self.scanner.finished_signal.disconnect()
+            self.scanner.cancel()
+            self.scanner.wait()
+            self.scanner = None
+        super().done(result)
+
+
+class TableViewPanel(QWidget):
+    """带列过滤和 CSV 导出的表格视图"""
+    def __init__(self, parent=None, model=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.toolbar = QHBoxLayout()
+        self.toolbar.addWidget(QLabel("过滤列:"))
+        self.filter_column = QComboBox()
+        self.filter_column.currentIndexChanged.connect(self.filter_column_changed)
+        self.toolbar.addWidget(self.filter_column)
+        
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("输入过滤文本...")
+        self.filter_input.textChanged.connect(lambda: self.filter_timer.start())
+        self.toolbar.addWidget(self.filter_input)
+        
+        export_btn = QPushButton("💾 导出 CSV")
+        export_btn.setMaximumWidth(120)
+        export_btn.setMinimumHeight(30)
+        export_btn.clicked.connect(self.export_csv)
+        self.toolbar.addWidget(export_btn)
+        layout.addLayout(self.toolbar)
+        
+        self.model = model or CommandTableModel(self)
+        self.model.modelReset.connect(self.refresh_columns)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setWordWrap(False)
+        self.view.setAlternatingRowColors(True)
+        self.view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        # 固定行高，避免逐行计算尺寸
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.view.verticalHeader().setDefaultSectionSize(22)
+        self.view.horizontalHeader().setResizeContentsPrecision(50)
+        self.view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.view.setSortingEnabled(True)
+        layout.addWidget(self.view)
+        self.refresh_columns()
+    
+    def refresh_columns(self):
+        headers = self.model.headers
+        if [self.filter_column.itemText(i) for i in range(self.filter_column.count())] == headers:
+            return
+        self.filter_column.blockSignals(True)
+        self.filter_column.clear()
+        self.filter_column.addItems(headers)
+        self.filter_column.blockSignals(False)
+        self.filter_input.blockSignals(True)
+        self.filter_input.clear()
+        self.filter_input.blockSignals(False)
+    
+    def filter_column_changed(self, column):
+        self.filter_input.blockSignals(True)
+        self.filter_input.setText(self.model.filters.get(column, ''))
+        self.filter_input.blockSignals(False)
+    
+    def apply_filter(self):
+        column = self.filter_column.currentIndex()
+        if column >= 0:
+            self.model.set_filter(column, self.filter_input.text())
+    
+    def export_csv(self):
+        if not self.model.headers:
+            QMessageBox.warning(self, "提示", "当前没有表格数据")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "导出 CSV", "output.csv", "CSV 文件 (*.csv)")
+        if path:
+            try:
+                self.model.export_csv(path)
+            except OSError as e:
+                QMessageBox.warning(self, "错误", f"导出失败: {e}")
+
+
+SocketEntry = namedtuple('SocketEntry', 'proto local local_port remote remote_port state inode pid process')
+
+
+class SocketInspector:
+    """读取 /proc/net/{tcp,tcp6,udp,udp6} 的套接字列表，并通过 /proc/*/fd 找到所属进程
+    
+    inode -> PID 的映射在多次刷新之间保留：新出现的进程才扫描 fd，
+    退出的进程直接删除；遇到未知 inode 时才重新扫描全部进程（有最短间隔限制）。
+    """
+    PROTOCOLS = ('tcp', 'tcp6', 'udp', 'udp6')
+    TCP_STATES = {
+        '01': 'ESTABLISHED', '02': 'SYN_SENT', '03': 'SYN_RECV', '04': 'FIN_WAIT1',
+        '05': 'FIN_WAIT2', '06': 'TIME_WAIT', '07': 'CLOSE', '08': 'CLOSE_WAIT',
+        '09': 'LAST_ACK', '0A': 'LISTEN', '0B': 'CLOSING', '0C': 'NEW_SYN_RECV',
+    }
+    UDP_STATES = {'01': 'ESTABLISHED', '07': 'UNCONN'}
+    HEADERS = ["协议", "本地地址", "本地端口", "远程地址", "远程端口", "状态", "PID", "进程"]
+    MIN_RESCAN_INTERVAL = 2
+    FULL_RESCAN_INTERVAL = 10
+    
+    def __init__(self, proc_root='/proc'):
+        self.proc_root = proc_root
+        self._addresses = {}
+        self._entries = {}
+        self._pid_inodes = {}
+        self._inode_pid = {}
+        self._names = {}
+        self._unresolved = set()
+        self._last_full_scan = 0
+    
+    @classmethod
+    def available(cls, proc_root='/proc'):
+        return os.path.exists(os.path.join(proc_root, 'net', 'tcp'))
+    
+    def _address(self, value):
+        """把内核的十六进制地址（按主机字节序存储）转换为 (ip, port)"""
+        result = self._addresses.get(value)
+        if result is None:
+            host, port = value.split(':')
+            raw = bytes.fromhex(host)
+            if len(raw) == 4:
+                ip = socket.inet_ntop(socket.AF_INET, raw[::-1])
+            else:
+                raw = b''.join(raw[i:i + 4][::-1] for i in range(0, 16, 4))
+                ip = socket.inet_ntop(socket.AF_INET6, raw)
+            result = self._addresses[value] = (ip, int(port, 16))
+        return result
+    
+    def _read_sockets(self, listening_only):
+        """返回 [(proto, local, remote, state, inode)]，字段保持原始字符串"""
+        sockets = []
+        for proto in self.PROTOCOLS:
+            try:
+                with open(os.path.join(self.proc_root, 'net', proto), encoding='ascii') as f:
+                    lines = f.read().splitlines()[1:]
+            except OSError:
+                continue
+            wanted = ('0A' if proto.startswith('tcp') else '07') if listening_only else None
+            for line in lines:
+                fields = line.split(None, 10)
+                if len(fields) < 10 or (wanted and fields[3] != wanted):
+                    continue
+                sockets.append((proto, fields[1], fields[2], fields[3], fields[9]))
+        return sockets
+    
+    def _scan_pid(self, pid):
+        inodes = set()
+        fd_dir = os.path.join(self.proc_root, pid, 'fd')
+        try:
+            with os.scandir(fd_dir) as it:
+                for entry in it:
+                    try:
+                        target = os.readlink(entry.path)
+                    except OSError:
+                        continue
+                    if target.startswith('socket:['):
+                        inodes.add(target[8:-1])
+        except OSError:
+            pass
+        old = self._pid_inodes.get(pid)
+        if old:
+            for inode in old - inodes:
+                if self._inode_pid.get(inode) == pid:
+                    del self._inode_pid[inode]
+        for inode in inodes:
+            self._inode_pid[inode] = pid
+        self._pid_inodes[pid] = inodes
+    
+    def _update_pids(self, inodes):
+        """增量更新 inode -> PID 映射"""
+        try:
+            live = {name for name in os.listdir(self.proc_root) if name.isdigit()}
+        except OSError:
+            return
+        for pid in set(self._pid_inodes) - live:
+            for inode in self._pid_inodes.pop(pid):
+                if self._inode_pid.get(inode) == pid:
+                    del self._inode_pid[inode]
+            self._names.pop(pid, None)
+        for pid in live - set(self._pid_inodes):
+            self._scan_pid(pid)
+        
+        now = time.monotonic()
+        unknown = {inode for inode in inodes
+                   if inode != '0' and inode not in self._inode_pid and inode not in self._unresolved}
+        elapsed = now - self._last_full_scan
+        if (unknown and elapsed >= self.MIN_RESCAN_INTERVAL) or elapsed >= self.FULL_RESCAN_INTERVAL:
+            for pid in live:
+                self._scan_pid(pid)
+            self._last_full_scan = now
+            # 其他用户的进程没有权限读取 fd，记下来避免每次都触发全量扫描
+            self._unresolved = {inode for inode in inodes if inode not in self._inode_pid}
+        else:
+            self._unresolved &= inodes
+    
+    def _process_name(self, pid):
+        name = self._names.get(pid)
+        if name is None:
+            try:
+                with open(os.path.join(self.proc_root, pid, 'comm'), encoding='utf-8', errors='replace') as f:
+                    name = f.read().strip()
+            except OSError:
+                name = ''
+            self._names[pid] = name
+        return name
+    
+    def snapshot(self, listening_only=False):
+        """返回当前的套接字列表 [SocketEntry]"""
+        sockets = self._read_sockets(listening_only)
+        self._update_pids({item[4] for item in sockets})
+        entries = {}
+        result = []
+        for key in sockets:
+            pid = self._inode_pid.get(key[4], '')
+            entry = self._entries.get(key)
+            if entry is None or entry.pid != pid:
+                proto, local, remote, state, inode = key
+                local_ip, local_port = self._address(local)
+                remote_ip, remote_port = self._address(remote)
+                states = self.TCP_STATES if proto.startswith('tcp') else self.UDP_STATES
+                entry = SocketEntry(proto, local_ip, str(local_port), remote_ip, str(remote_port),
+                                    states.get(state, state), inode, pid,
+                                    self._process_name(pid) if pid else '')
+            entries[key] = entry
+            result.append(entry)
+        self._entries = entries
+        return result
+    
+    @staticmethod
+    def table_row(entry):
+        return [entry.proto, entry.local, entry.local_port, entry.remote, entry.remote_port,
+                entry.state, entry.pid, entry.process]
+
+
+class SocketInspectorDialog(QDialog):
+    """内置端口 / 网络连接查看器"""
+    report_ready = pyqtSignal(str, str)
+    
+    REFRESH_INTERVAL = 2000
+    
+    def __init__(self, parent=None, listening_only=False):
+        super().__init__(parent)
+        self.setWindowTitle("网络连接")
+        self.setMinimumSize(900, 550)
+        self.inspector = SocketInspector()
+        self.entries = []
+        
+        layout = QVBoxLayout(self)
+        
+        control_row = QHBoxLayout()
+        self.listen_check = QCheckBox("仅监听端口")
+        self.listen_check.setChecked(listening_only)
+        self.listen_check.toggled.connect(self.refresh)
+        control_row.addWidget(self.listen_check)
+        self.auto_check = QCheckBox("自动刷新")
+        self.auto_check.setChecked(True)
+        self.auto_check.toggled.connect(self.toggle_auto_refresh)
+        control_row.addWidget(self.auto_check)
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #64748b; padding: 5px; font-size: 12px;")
+        control_row.addWidget(self.status_label)
+        control_row.addStretch()
+        refresh_btn = QPushButton("🔄 刷新")
+        refresh_btn.setMaximumWidth(100)
+        refresh_btn.clicked.connect(self.refresh)
+        control_row.addWidget(refresh_btn)
+        report_btn = QPushButton("📋 写入输出")
+        report_btn.setMaximumWidth(120)
+        report_btn.setToolTip("把当前（过滤、排序后的）列表写入输出区域")
+        report_btn.clicked.connect(self.emit_report)
+        control_row.addWidget(report_btn)
+        layout.addLayout(control_row)
+        
+        self.table_panel = TableViewPanel(self)
+        self.table_panel.model.set_headers(SocketInspector.HEADERS)
+        layout.addWidget(self.table_panel)
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh()
+        self.refresh_timer.start()
+    
+    def toggle_auto_refresh(self, enabled):
+        if enabled:
+            self.refresh_timer.start()
+        else:
+            self.refresh_timer.stop()
+    
+    def refresh(self):
+        start = time.perf_counter()
+        self.entries = self.inspector.snapshot(self.listen_check.isChecked())
+        scroll_bar = self.table_panel.view.verticalScrollBar()
+        position = scroll_bar.value()
+        self.table_panel.model.set_rows([SocketInspector.table_row(entry) for entry in self.entries])
+        scroll_bar.setValue(position)
+        elapsed = (time.perf_counter() - start) * 1000
+        model = self.table_panel.model
+        shown = f"（显示 {model.rowCount()} 个）" if model.filters else ""
+        self.status_label.setText(f"共 {len(self.entries)} 个套接字{shown}，刷新耗时 {elapsed:.1f} ms")
+    
+    def emit_report(self):
+        model = self.table_panel.model
+        rows = [model.rows[i] for i in model.view]
+        widths = [len(header) for header in model.headers]
+        for row in rows:
+            widths = [max(width, len(value)) for width, value in zip(widths, row)]
+        lines = ["  ".join(value.ljust(width) for width, value in zip(widths, row)).rstrip()
+                 for row in [model.headers] + rows]
+        lines.append(f"\n共 {len(rows)} 个套接字")
+        name = "🔌 端口占用" if self.listen_check.isChecked() else "🔗 网络连接"
+        self.report_ready.emit(name, "\n".join(lines))
+    
+    def done(self, result):
+        self.refresh_timer.stop()
+        super().done(result)
+
+
+ProcessEntry = namedtuple('ProcessEntry', 'pid user cpu mem rss vsz state threads command')
+
+
+class ProcessSampler:
+    """直接读取 /proc/[pid]/stat 的进程采样器
+    
+    CPU% 由两次采样之间的 utime + stime 差值计算（与 top 相同，多核可超过 100%）；
+    命令行、用户等不变的信息按 (pid, 启动时间) 缓存，每次只读取仍存活进程的 stat。
+    stat 内容没有变化的进程（大多数空闲进程）直接复用上一次的结果。
+    """
+    HEADERS = ["PID", "用户", "CPU%", "内存%", "RSS", "VSZ", "状态", "线程", "命令"]
+    
+    def __init__(self, proc_root='/proc'):
+        self.proc_root = proc_root
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.mem_total = self._mem_total()
+        self.summary = {}
+        self._info = {}
+        self._ticks = {}
+        self._samples = {}
+        self._rows = {}
+        self._users = {}
+        self._last_sample = None
+        self._last_cpu = None
+    
+    @classmethod
+    def available(cls, proc_root='/proc'):
+        return os.path.exists(os.path.join(proc_root, 'self', 'stat'))
+    
+    def _read(self, path, size=4096):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            return os.read(fd, size)
+        finally:
+            os.close(fd)
+    
+    def _mem_total(self):
+        try:
+            with open(os.path.join(self.proc_root, 'meminfo')) as f:
+                for line in f:
+                    if line.startswith('MemTotal:'):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            pass
+        return 0
+    
+    def _user(self, uid):
+        name = self._users.get(uid)
+        if name is None:
+            try:
+                import pwd
+                name = pwd.getpwuid(uid).pw_name
+            except (ImportError, KeyError):
+                name = str(uid)
+            self._users[uid] = name
+        return name
+    
+    def _static_info(self, pid, start_time, comm):
+        """命令行和用户只在进程第一次出现时读取"""
+        info = self._info.get(pid)
+        if info is not None and info[0] == start_time:
+            return info
+        path = os.path.join(self.proc_root, pid)
+        try:
+            user = self._user(os.stat(path).st_uid)
+            cmdline = self._read(os.path.join(path, 'cmdline'), 65536)
+        except OSError:
+            user, cmdline = '', b''
+        command = cmdline.rstrip(b'\0').replace(b'\0', b' ').decode('utf-8', 'replace')
+        info = self._info[pid] = (start_time, user, command or f"[{comm}]")
+        return info
+    
+    def _cpu_summary(self, now):
+        """整机 CPU 使用率（来自 /proc/stat 第一行）"""
+        try:
+            values = [int(value) for value in self._read(os.path.join(self.proc_root, 'stat'), 512).split(b'\n', 1)[0].split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = values[3] + (values[4] if len(values) > 4 else 0)
+        total = sum(values)
+        last = self._last_cpu
+        self._last_cpu = (total, idle)
+        if last is None or total == last[0]:
+            return None
+        return 100.0 * (1 - (idle - last[1]) / (total - last[0]))
+    
+    def sample(self):
+        """采样一次，返回 [ProcessEntry]"""
+        now = time.monotonic()
+        try:
+            uptime = float(self._read(os.path.join(self.proc_root, 'uptime')).split()[0])
+            pids = [name for name in os.listdir(self.proc_root) if name.isdigit()]
+        except (OSError, ValueError):
+            return []
+        elapsed = now - self._last_sample if self._last_sample is not None else None
+        self._last_sample = now
+        ticks_per_second = self.clock_ticks
+        page_size = self.page_size
+        mem_total = self.mem_total or 1
+        last_ticks = self._ticks
+        last_samples = self._samples
+        ticks = {}
+        samples = {}
+        entries = []
+        read = self._read
+        root = self.proc_root
+        for pid in pids:
+            try:
+                data = read(f"{root}/{pid}/stat")
+            except OSError:
+                continue
+            previous = last_samples.get(pid)
+            if previous is not None and previous[0] == data and previous[1].cpu == 0:
+                # 空闲且状态没变的进程，CPU 仍为 0，直接复用
+                ticks[pid] = last_ticks[pid]
+                samples[pid] = previous
+                entries.append(previous[1])
+                continue
+            # comm 可能包含空格和括号，以最后一个 ')' 为界
+            end = data.rfind(b')')
+            fields = data[end + 2:].split()
+            if len(fields) < 22:
+                continue
+            comm = data[data.find(b'(') + 1:end].decode('utf-8', 'replace')
+            cpu_ticks = int(fields[11]) + int(fields[12])
+            start_time = int(fields[19])
+            previous = last_ticks.get(pid)
+            if previous is not None and previous[0] == start_time and elapsed:
+                cpu = (cpu_ticks - previous[1]) / ticks_per_second / elapsed * 100
+            else:
+                # 第一次看到的进程使用整个生命周期的平均值（与 ps 相同）
+                lifetime = uptime - start_time / ticks_per_second
+                cpu = cpu_ticks / ticks_per_second / lifetime * 100 if lifetime > 0 else 0.0
+            ticks[pid] = (start_time, cpu_ticks)
+            rss = int(fields[21]) * page_size
+            _, user, command = self._static_info(pid, start_time, comm)
+            entry = ProcessEntry(pid, user, cpu, rss * 100 / mem_total, rss, int(fields[20]),
+                                 fields[0].decode('ascii', 'replace'), int(fields[17]), command)
+            samples[pid] = (data, entry)
+            entries.append(entry)
+        self._ticks = ticks
+        self._samples = samples
+        for pid in set(self._info) - set(ticks):
+            del self._info[pid]
+        
+        try:
+            load = self._read(os.path.join(self.proc_root, 'loadavg')).split()[:3]
+            load = ' '.join(value.decode('ascii') for value in load)
+        except OSError:
+            load = ''
+        self.summary = {'processes': len(entries), 'cpu': self._cpu_summary(now), 'load': load}
+        return entries
+    
+    @staticmethod
+    def table_row(entry):
+        return [entry.pid, entry.user, f"{entry.cpu:.1f}", f"{entry.mem:.1f}", format_size(entry.rss),
+                format_size(entry.vsz), entry.state, str(entry.threads), entry.command]
+    
+    def table_rows(self, entries):
+        """转换为表格行，复用的采样结果同时复用上一次的表格行"""
+        cache = self._rows
+        rows = {}
+        for entry in entries:
+            cached = cache.get(entry.pid)
+            rows[entry.pid] = cached if cached is not None and cached[0] is entry else (entry, self.table_row(entry))
+        self._rows = rows
+        return [row for _, row in rows.values()]
+
+
+class ProcessSamplerThread(QThread):
+    """在后台线程中定时采样，避免读取几千个 /proc 文件时阻塞界面"""
+    sample_signal = pyqtSignal(object)
+    
+    def __init__(self, interval=1.0):
+        super().__init__()
+        self.interval = interval
+        self.paused = False
+        self.sampler = ProcessSampler()
+        self._wake = threading.Event()
+        self._stopped = False
+    
+    def refresh_now(self):
+        self._wake.set()
+    
+    def set_paused(self, paused):
+        self.paused = paused
+        self._wake.set()
+    
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+    
+    def run(self):
+        resumed = True
+        while not self._stopped:
+            if resumed:
+                start = time.perf_counter()
+                entries = self.sampler.sample()
+                rows = self.sampler.table_rows(entries)
+                elapsed = (time.perf_counter() - start) * 1000
+                self.sample_signal.emit((rows, dict(self.sampler.summary), elapsed))
+            resumed = self._wake.wait(None if self.paused else self.interval) or not self.paused
+            self._wake.clear()
+
+
+class ProcessViewerDialog(QDialog):
+    """内置进程列表，每秒刷新"""
+    report_ready = pyqtSignal(str, str)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("进程列表")
+        self.setMinimumSize(1000, 600)
+        self._first_sample = True
+        
+        layout = QVBoxLayout(self)
+        
+        control_row = QHBoxLayout()
+        self.auto_check = QCheckBox("自动刷新")
+        self.auto_check.setChecked(True)
+        self.auto_check.toggled.connect(lambda enabled: self.sampler_thread.set_paused(not enabled))
+        control_row.addWidget(self.auto_check)
+        self.status_label = QLabel("正在采样...")
+        self.status_label.setStyleSheet("color: #64748b; padding: 5px; font-size: 12px;")
+        control_row.addWidget(self.status_label)
+        control_row.addStretch()
+        refresh_btn = QPushButton("🔄 刷新")
+        refresh_btn.setMaximumWidth(100)
+        refresh_btn.clicked.connect(lambda: self.sampler_thread.refresh_now())
+        control_row.addWidget(refresh_btn)
+        report_btn = QPushButton("📋 写入输出")
+        report_btn.setMaximumWidth(120)
+        report_btn.setToolTip("把当前（过滤、排序后的）列表写入输出区域")
+        report_btn.clicked.connect(self.emit_report)
+        control_row.addWidget(report_btn)
+        layout.addLayout(control_row)
+        
+        self.table_panel = TableViewPanel(self)
+        model = self.table_panel.model
+        model.set_headers(ProcessSampler.HEADERS)
+        # 默认按 CPU% 降序
+        model.sort_column = 2
+        model.sort_order = Qt.SortOrder.DescendingOrder
+        self.table_panel.view.horizontalHeader().setSortIndicator(2, Qt.SortOrder.DescendingOrder)
+        self.table_panel.view.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table_panel)
+        
+        self.sampler_thread = ProcessSamplerThread()
+        self.sampler_thread.sample_signal.connect(self.show_sample)
+        self.sampler_thread.start()
+    
+    def show_sample(self, sample):
+        rows, summary, sample_ms = sample
+        start = time.perf_counter()
+        view = self.table_panel.view
+        model = self.table_panel.model
+        selected = view.currentIndex()
+        selected_pid = model.data(selected.siblingAtColumn(0)) if selected.isValid() else None
+        position = view.verticalScrollBar().value()
+        model.set_rows(rows)
+        view.verticalScrollBar().setValue(position)
+        if selected_pid is not None:
+            # 刷新后按 PID 恢复选中行
+            for row, index in enumerate(model.view):
+                if model.rows[index][0] == selected_pid:
+                    view.setCurrentIndex(model.index(row, selected.column()))
+                    break
+        if self._first_sample:
+            self._first_sample = False
+            view.resizeColumnsToContents()
+        update_ms = (time.perf_counter() - start) * 1000
+        cpu = f"CPU {summary['cpu']:.1f}%，" if summary.get('cpu') is not None else ""
+        self.status_label.setText(
+            f"{summary.get('processes', 0)} 个进程，{cpu}负载 {summary.get('load', '')}，"
+            f"采样 {sample_ms:.0f} ms / 刷新表格 {update_ms:.0f} ms")
+    
+    def emit_report(self):
+        model = self.table_panel.model
+        rows = [model.rows[i] for i in model.view]
+        widths = [len(header) for header in model.headers[:-1]]
+        for row in rows:
+            widths = [max(width, len(value)) for width, value in zip(widths, row)]
+        lines = ["  ".join([value.ljust(width) for width, value in zip(widths, row)] + [row[-1]])
+                 for row in [model.headers] + rows]
+        lines.append(f"\n共 {len(rows)} 个进程")
+        self.report_ready.emit("📋 进程列表", "\n".join(lines))
+    
+    def done(self, result):
+        self.sampler_thread.sample_signal.disconnect()
+        self.sampler_thread.stop()
+        self.sampler_thread.wait()
+        super().done(result)
+
+
+def format_duration(seconds):
+    """按量级选择 s / ms / µs 显示耗时"""
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 0.001:
+        return f"{seconds * 1000:.1f} ms"
+    return f"{seconds * 1000000:.0f} µs"
+
+
+def percentile(ordered, p):
+    """已排序序列的百分位数（线性插值）"""
+    position = (len(ordered) - 1) * p / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def benchmark_statistics(values):
+    """均值、标准差、最值、p50/p95，以及按修正 Z 分数（基于 MAD）判定的离群值"""
+    ordered = sorted(values)
+    count = len(ordered)
+    mean = sum(ordered) / count
+    stddev = (sum((value - mean) ** 2 for value in ordered) / (count - 1)) ** 0.5 if count > 1 else 0.0
+    median = percentile(ordered, 50)
+    mad = percentile(sorted(abs(value - median) for value in ordered), 50)
+    outliers = [value for value in values if mad > 0 and 0.6745 * abs(value - median) / mad > 3.5]
+    return {'mean': mean, 'stddev': stddev, 'min': ordered[0], 'max': ordered[-1],
+            'p50': median, 'p95': percentile(ordered, 95), 'outliers': outliers}
+
+
+class CommandBenchmark(QThread):
+    """多次运行同一命令并记录每次的耗时、CPU 时间和峰值内存
+    
+    每次运行都通过 CommandExecutor 在工作线程中同步执行，输出直接丢弃。
+    """
+    progress_signal = pyqtSignal(int, int)
+    finished_signal = pyqtSignal(object)
+    
+    RESULTS_FILE = 'benchmark_results.json'
+    MAX_RESULTS = 500
+    
+    def __init__(self, name, command, runs=10, warmup=1, concurrency=1, limits=None):
         super().__init__()
+        self.name = name
         self.command = command
+        self.limits = limits
+        self.runs = runs
+        self.warmup = warmup
+        self.concurrency = concurrency
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._active = set()
+    
+    def cancel(self):
+        self._cancelled = True
+        with self._lock:
+            for executor in self._active:
+                executor.kill()
+    
+    def _run_once(self):
+        if self._cancelled:
+            return None
+        executor = CommandExecutor(self.command, self.limits)
+        executor.discard_output = True
+        with self._lock:
+            self._active.add(executor)
+        try:
+            # 直接在当前线程中调用 run()，不启动新的 QThread
+            executor.run()
+        finally:
+            with self._lock:
+                self._active.discard(executor)
+        return None if executor.killed else executor.stats
     
     def run(self):
+        total = self.warmup + self.runs
+        done = 0
+        for _ in range(self.warmup):
+            self._run_once()
+            done += 1
+            self.progress_signal.emit(done, total)
+        results = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for stats in pool.map(lambda _: self._run_once(), range(self.runs)):
+                done += 1
+                self.progress_signal.emit(done, total)
+                if stats is not None:
+                    results.append(stats)
+        record = {
+            'name': self.name,
+            'command': self.command,
+            'host': platform.node(),
+            'platform': platform.platform(),
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'runs': len(results),
+            'warmup': self.warmup,
+            'concurrency': self.concurrency,
+            'cancelled': self._cancelled,
+        }
+        for key in ('wall', 'user', 'sys', 'max_rss', 'returncode'):
+            record[key] = [stats[key] for stats in results]
+        if results and not self._cancelled:
+            self.save_result(record)
+        self.finished_signal.emit(record)
+    
+    @classmethod
+    def load_results(cls):
+        try:
+            with open(cls.RESULTS_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+    
+    @classmethod
+    def save_result(cls, record):
+        results = cls.load_results()
+        results.append(record)
         try:
-            # Windows 需要设置编码
-            if platform.system() == "Windows":
-                # 使用 gbk 编码处理中文
-                process = subprocess.Popen(
-                    self.command,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    encoding='gbk',
-                    errors='ignore',
-                    bufsize=1
-                )
+            with open(cls.RESULTS_FILE, 'w', encoding='utf-8') as f:
+                json.dump(results[-cls.MAX_RESULTS:], f, ensure_ascii=False, indent=1)
+        except OSError:
+            pass
+
+
+def format_benchmark_report(record, history=()):
+    """性能测试报告；history 为同一命令之前的记录（可来自其他机器），用于对比"""
+    lines = [f"命令: {record['command']}",
+             f"主机: {record['host']} ({record['platform']})",
+             f"运行 {record['runs']} 次（预热 {record['warmup']} 次，并发 {record['concurrency']}）"]
+    if record.get('cancelled'):
+        lines.append("⛔ 已取消，结果不完整（未保存）")
+    if not record['wall']:
+        lines.append("没有完成的运行")
+        return "\n".join(lines)
+    wall = benchmark_statistics(record['wall'])
+    lines += [
+        "",
+        f"  耗时     {format_duration(wall['mean'])} ± {format_duration(wall['stddev'])}",
+        f"  范围     {format_duration(wall['min'])} … {format_duration(wall['max'])}",
+        f"  p50/p95  {format_duration(wall['p50'])} / {format_duration(wall['p95'])}",
+    ]
+    if record['user'] and None not in record['user']:
+        user = sum(record['user']) / len(record['user'])
+        system = sum(record['sys']) / len(record['sys'])
+        lines.append(f"  CPU      用户态 {format_duration(user)}，内核态 {format_duration(system)}（平均）")
+        peaks = [value for value in record['max_rss'] if value is not None]
+        if peaks:
+            lines.append(f"  峰值内存 {format_size(max(peaks))}")
+        else:
+            lines.append("  峰值内存 不超过 QuickCMD 自身，无法单独测量")
+    if wall['outliers']:
+        lines.append(f"\n⚠️ {len(wall['outliers'])} 个离群值: "
+                     + ", ".join(format_duration(value) for value in wall['outliers'])
+                     + "（可能受到其他进程或缓存影响，可增加预热次数后重试）")
+    failed = sum(1 for code in record['returncode'] if code != 0)
+    if failed:
+        lines.append(f"❌ {failed} 次运行返回非零退出码")
+    
+    history = [item for item in history if item.get('wall')][-10:]
+    if history:
+        lines.append("\n历史结果（同一命令）:")
+        for item in history:
+            stats = benchmark_statistics(item['wall'])
+            ratio = stats['mean'] / wall['mean'] if wall['mean'] else 0
+            lines.append(f"  {item['time'].replace('T', ' ')}  {item['host']:<16} "
+                         f"{format_duration(stats['mean'])} ± {format_duration(stats['stddev'])}  "
+                         f"（本次的 {ratio:.2f} 倍）")
+    return "\n".join(lines)
+
+
+class BenchmarkDialog(QDialog):
+    """命令性能测试对话框"""
+    report_ready = pyqtSignal(str, str)
+    
+    def __init__(self, parent, name, command, limits=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"性能测试 - {name}")
+        self.setMinimumWidth(450)
+        self.name = name
+        self.command = command
+        self.limits = limits
+        self.benchmark = None
+        
+        layout = QVBoxLayout(self)
+        command_label = QLabel(f"命令: {command}")
+        command_label.setWordWrap(True)
+        layout.addWidget(command_label)
+        
+        form = QFormLayout()
+        self.runs_spin = QSpinBox()
+        self.runs_spin.setRange(1, 10000)
+        self.runs_spin.setValue(10)
+        form.addRow("运行次数:", self.runs_spin)
+        self.warmup_spin = QSpinBox()
+        self.warmup_spin.setRange(0, 100)
+        self.warmup_spin.setValue(1)
+        form.addRow("预热次数:", self.warmup_spin)
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 64)
+        self.concurrency_spin.setValue(1)
+        self.concurrency_spin.setToolTip("同时运行的实例数（并发时每次运行的耗时会相互影响）")
+        form.addRow("并发数:", self.concurrency_spin)
+        layout.addLayout(form)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #64748b; padding: 5px; font-size: 12px;")
+        layout.addWidget(self.status_label)
+        
+        self.start_btn = QPushButton("▶️ 开始测试")
+        self.start_btn.clicked.connect(self.toggle_benchmark)
+        layout.addWidget(self.start_btn)
+    
+    def toggle_benchmark(self):
+        if self.benchmark is not None:
+            self.benchmark.cancel()
+            return
+        self.benchmark = CommandBenchmark(self.name, self.command, self.runs_spin.value(),
+                                          self.warmup_spin.value(), self.concurrency_spin.value(),
+                                          self.limits)
+        self.benchmark.progress_signal.connect(self.show_progress)
+        self.benchmark.finished_signal.connect(self.benchmark_finished)
+        self.start_btn.setText("⏹️ 取消")
+        self.status_label.setText("正在运行...")
+        self.benchmark.start()
+    
+    def show_progress(self, done, total):
+        self.status_label.setText(f"已完成 {done}/{total} 次")
+    
+    def benchmark_finished(self, record):
+        self.benchmark.wait()
+        self.benchmark = None
+        self.start_btn.setText("▶️ 开始测试")
+        history = [item for item in CommandBenchmark.load_results()
+                   if item.get('command') == record['command']
+                   and (item.get('time'), item.get('host')) != (record['time'], record['host'])]
+        self.status_label.setText("已取消" if record['cancelled'] else "完成，结果已写入输出区域")
+        self.report_ready.emit(f"⏱️ 性能测试: {self.name}", format_benchmark_report(record, history))
+    
+    def done(self, result):
+        if self.benchmark is not None:
+            self.benchmark.finished_signal.disconnect()
+            self.benchmark.cancel()
+            self.benchmark.wait()
+            self.benchmark = None
+        super().done(result)
+
+
+class StallWatchdog(QObject):
+    """主线程卡顿检测
+    
+    主线程的心跳定时器记录事件循环延迟；后台线程发现心跳超过阈值没有到来时，
+    每隔 SAMPLE_INTERVAL 采样一次主线程的 Python 调用栈，卡顿结束后汇总为一条记录。
+    只在有使用者（打开的卡顿检测面板或 QUICKCMD_STALL_DEBUG 环境变量）时运行，空闲时没有定时器和线程。
+    """
+    stall_detected = pyqtSignal(object)
+    
+    HEARTBEAT_INTERVAL = 50
+    SAMPLE_INTERVAL = 0.025
+    MAX_SAMPLES = 80
+    MAX_STALLS = 50
+    MAX_DEPTH = 25
+    
+    def __init__(self, parent=None, threshold=0.2):
+        super().__init__(parent)
+        self.threshold = threshold
+        self.stalls = []
+        self.latencies = deque(maxlen=200)
+        self._main_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._samples = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._users = 0
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(self.HEARTBEAT_INTERVAL)
+        self.timer.timeout.connect(self._beat)
+    
+    def acquire(self):
+        """增加一个使用者，第一个使用者出现时开始检测"""
+        self._users += 1
+        if self._users == 1:
+            self.start()
+    
+    def release(self):
+        """减少一个使用者，没有使用者时停止检测"""
+        self._users = max(0, self._users - 1)
+        if self._users == 0:
+            self.stop()
+    
+    def start(self):
+        self._last_beat = time.perf_counter()
+        self.timer.start()
+        # 每次启动使用新的事件，上一次的线程即使还没退出也不会继续采样
+        self._stopped = threading.Event()
+        threading.Thread(target=self._watch, args=(self._stopped,), name="stall-watchdog", daemon=True).start()
+    
+    def stop(self):
+        self.timer.stop()
+        self._stopped.set()
+        with self._lock:
+            self._samples = []
+    
+    def clear(self):
+        self.stalls = []
+        self.latencies.clear()
+    
+    def _beat(self):
+        now = time.perf_counter()
+        last = self._last_beat
+        gap = now - last
+        self._last_beat = now
+        self.latencies.append((now, max(0.0, gap - self.HEARTBEAT_INTERVAL / 1000)))
+        if not self._samples and gap < self.threshold:
+            return
+        with self._lock:
+            samples, self._samples = self._samples, []
+        if gap < self.threshold:
+            return
+        # 只保留这次卡顿期间的采样（采样时记录的心跳时间与本次相同）
+        stacks = Counter(stack for beat, stack in samples if beat == last)
+        stall = {
+            'time': datetime.now().isoformat(sep=' ', timespec='milliseconds'),
+            'start': last,
+            'duration': gap,
+            'samples': sum(stacks.values()),
+            'stacks': [{'count': count, 'stack': list(stack)} for stack, count in stacks.most_common()],
+        }
+        self.stalls.append(stall)
+        self.stalls.sort(key=lambda item: item['duration'], reverse=True)
+        del self.stalls[self.MAX_STALLS:]
+        self.stall_detected.emit(stall)
+    
+    def _watch(self, stopped):
+        while not stopped.wait(self.SAMPLE_INTERVAL):
+            beat = self._last_beat
+            if time.perf_counter() - beat < self.threshold or len(self._samples) >= self.MAX_SAMPLES:
+                continue
+            frame = sys._current_frames().get(self._main_id)
+            if frame is None:
+                continue
+            stack = tuple(f"{os.path.basename(item.filename)}:{item.lineno} {item.name}"
+                          for item in traceback.extract_stack(frame)[-self.MAX_DEPTH:])
+            del frame
+            with self._lock:
+                self._samples.append((beat, stack))
+    
+    def latency_summary(self, seconds=5):
+        """最近若干秒事件循环延迟的 (最大值, 平均值)，单位秒"""
+        since = time.perf_counter() - seconds
+        recent = [lateness for when, lateness in self.latencies if when >= since]
+        if not recent:
+            return 0.0, 0.0
+        return max(recent), sum(recent) / len(recent)
+    
+    def export_trace(self, path):
+        """导出 Chrome 跟踪格式（chrome://tracing 或 Perfetto 可打开）"""
+        events = [{'name': name, 'cat': 'slot', 'ph': 'X', 'pid': 1, 'tid': 1,
+                   'ts': start * 1e6, 'dur': duration * 1e6}
+                  for name, start, duration in slot_timings.calls]
+        for stall in self.stalls:
+            top = stall['stacks'][0]['stack'][-1] if stall['stacks'] else ''
+            events.append({'name': f"卡顿 {stall['duration'] * 1000:.0f} ms", 'cat': 'stall', 'ph': 'X',
+                           'pid': 1, 'tid': 2, 'ts': stall['start'] * 1e6, 'dur': stall['duration'] * 1e6,
+                           'args': {'time': stall['time'], 'top': top, 'stacks': stall['stacks']}})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+
+class StallDebugDialog(QDialog):
+    """卡顿检测面板：事件循环延迟、关键槽函数耗时和最严重的卡顿"""
+    def __init__(self, parent, watchdog):
+        super().__init__(parent)
+        self.setWindowTitle("卡顿检测")
+        self.setMinimumSize(900, 600)
+        self.watchdog = watchdog
+        # 面板打开期间才检测卡顿
+        watchdog.acquire()
+        self.finished.connect(watchdog.release)
+        
+        layout = QVBoxLayout(self)
+        
+        control_row = QHBoxLayout()
+        self.latency_label = QLabel("")
+        self.latency_label.setStyleSheet("color: #64748b; padding: 5px; font-size: 12px;")
+        control_row.addWidget(self.latency_label)
+        control_row.addStretch()
+        control_row.addWidget(QLabel("卡顿阈值 (ms):"))
+        self.threshold_spin = QSpinBox()
+        self.threshold_spin.setRange(50, 10000)
+        self.threshold_spin.setSingleStep(50)
+        self.threshold_spin.setValue(int(watchdog.threshold * 1000))
+        self.threshold_spin.valueChanged.connect(lambda value: setattr(self.watchdog, 'threshold', value / 1000))
+        control_row.addWidget(self.threshold_spin)
+        export_btn = QPushButton("💾 导出跟踪")
+        export_btn.setMaximumWidth(120)
+        export_btn.clicked.connect(self.export_trace)
+        control_row.addWidget(export_btn)
+        clear_btn = QPushButton("🗑️ 清空")
+        clear_btn.setMaximumWidth(100)
+        clear_btn.clicked.connect(self.clear)
+        control_row.addWidget(clear_btn)
+        layout.addLayout(control_row)
+        
+        self.slot_panel = TableViewPanel(self)
+        self.slot_panel.model.set_headers(["槽函数", "调用次数", "总耗时 (ms)", "平均 (ms)", "最大 (ms)"])
+        self.slot_panel.model.sort_column = 2
+        self.slot_panel.model.sort_order = Qt.SortOrder.DescendingOrder
+        self.slot_panel.view.horizontalHeader().setSortIndicator(2, Qt.SortOrder.DescendingOrder)
+        self.slot_panel.view.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.slot_panel, 1)
+        
+        stall_row = QHBoxLayout()
+        self.stall_list = QListWidget()
+        self.stall_list.currentRowChanged.connect(self.show_stall)
+        stall_row.addWidget(self.stall_list, 1)
+        self.stack_text = QTextEdit()
+        self.stack_text.setReadOnly(True)
+        self.stack_text.setFont(QFont("Consolas", 9))
+        self.stack_text.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        stall_row.addWidget(self.stack_text, 2)
+        layout.addLayout(stall_row, 2)
+        
+        self.stalls = []
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+        self.refresh()
+    
+    def refresh(self):
+        worst, average = self.watchdog.latency_summary()
+        self.latency_label.setText(
+            f"事件循环延迟（最近 5 秒）: 最大 {worst * 1000:.0f} ms，平均 {average * 1000:.1f} ms")
+        rows = [[name, str(count), f"{total * 1000:.1f}", f"{total * 1000 / count:.2f}", f"{peak * 1000:.1f}"]
+                for name, (count, total, peak) in slot_timings.stats.items()]
+        self.slot_panel.model.set_rows(rows)
+        
+        if self.stalls != self.watchdog.stalls:
+            self.stalls = list(self.watchdog.stalls)
+            row = self.stall_list.currentRow()
+            self.stall_list.blockSignals(True)
+            self.stall_list.clear()
+            for stall in self.stalls:
+                top = stall['stacks'][0]['stack'][-1] if stall['stacks'] else "（未采样到调用栈）"
+                self.stall_list.addItem(f"{stall['duration'] * 1000:6.0f} ms  {stall['time'][11:]}  {top}")
+            self.stall_list.blockSignals(False)
+            self.stall_list.setCurrentRow(min(max(row, 0), len(self.stalls) - 1))
+    
+    def show_stall(self, row):
+        if not 0 <= row < len(self.stalls):
+            self.stack_text.clear()
+            return
+        stall = self.stalls[row]
+        lines = [f"{stall['time']}  卡顿 {stall['duration'] * 1000:.0f} ms，采样 {stall['samples']} 次"]
+        for item in stall['stacks']:
+            lines.append(f"\n── {item['count']} 次采样 ──")
+            # 最内层的调用在最上面
+            lines.extend(f"  {frame}" for frame in reversed(item['stack']))
+        self.stack_text.setPlainText("\n".join(lines))
+    
+    def clear(self):
+        self.watchdog.clear()
+        slot_timings.clear()
+        self.refresh()
+    
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出跟踪", "quickcmd_trace.json", "JSON 文件 (*.json)")
+        if path:
+            try:
+                self.watchdog.export_trace(path)
+            except OSError as e:
+                QMessageBox.warning(self, "错误", f"导出失败: {e}")
+    
+    def done(self, result):
+        self.refresh_timer.stop()
+        super().done(result)
+
+
+def diff_lines(a, b):
+    """Myers 差异算法（线性空间的 middle snake 版本），返回匹配块 [(a 起点, b 起点, 长度)]
+    
+    时间 O((N+M)·D)，D 为差异行数，输出大部分相同时接近线性。
+    只在一边出现的行必然是差异，先剔除后再比较；差异过多时整段按替换处理。
+    """
+    ids = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    common = set(a_ids).intersection(b_ids)
+    a_index = [i for i, line in enumerate(a_ids) if line in common]
+    b_index = [j for j, line in enumerate(b_ids) if line in common]
+    a_ids = [a_ids[i] for i in a_index]
+    b_ids = [b_ids[j] for j in b_index]
+    
+    blocks = []
+    pending = [(0, len(a_ids), 0, len(b_ids))]
+    while pending:
+        a0, a1, b0, b1 = pending.pop()
+        # 去掉公共前缀和后缀
+        start = a0
+        while a0 < a1 and b0 < b1 and a_ids[a0] == b_ids[b0]:
+            a0 += 1
+            b0 += 1
+        if a0 > start:
+            blocks.append((start, b0 - (a0 - start), a0 - start))
+        end = a1
+        while a1 > a0 and b1 > b0 and a_ids[a1 - 1] == b_ids[b1 - 1]:
+            a1 -= 1
+            b1 -= 1
+        if a1 < end:
+            blocks.append((a1, b1, end - a1))
+        if a0 == a1 or b0 == b1:
+            continue
+        snake = _middle_snake(a_ids, a0, a1, b_ids, b0, b1)
+        if snake is None:
+            continue
+        x0, y0, x1, y1 = snake
+        if x1 > x0:
+            blocks.append((x0, y0, x1 - x0))
+        pending.append((a0, x0, b0, y0))
+        pending.append((x1, a1, y1, b1))
+    
+    # 映射回原始行号，原始行号不连续的地方拆成多个块
+    result = []
+    for i, j, length in sorted(blocks):
+        for offset in range(length):
+            x = a_index[i + offset]
+            y = b_index[j + offset]
+            if result and result[-1][0] + result[-1][2] == x and result[-1][1] + result[-1][2] == y:
+                result[-1][2] += 1
             else:
-                process = subprocess.Popen(
-                    self.command,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    bufsize=1
-                )
-            
-            # 实时读取输出
-            output_lines = []
-            for line in process.stdout:
-                output_lines.append(line)
-                self.output_signal.emit(line.rstrip())
-            
-            for line in process.stderr:
-                output_lines.append(line)
-                self.output_signal.emit(line.rstrip())
-            
-            process.wait(timeout=30)
-            
-            if not output_lines:
-                self.output_signal.emit("✅ 命令执行成功！")
-            
-            self.finished_signal.emit(process.returncode == 0)
-        except subprocess.TimeoutExpired:
-            self.output_signal.emit("⚠️ 命令执行超时")
-            self.finished_signal.emit(False)
-        except Exception as e:
-            self.output_signal.emit(f"❌ 错误: {str(e)}")
-            self.finished_signal.emit(False)
+                result.append([x, y, 1])
+    return [tuple(block) for block in result]
+
+
+DIFF_MAX_COST = 1000
+
+
+def _middle_snake(a, a0, a1, b, b0, b1):
+    """在 a[a0:a1] 与 b[b0:b1] 的最短编辑路径中间找一段公共片段，差异超过 DIFF_MAX_COST 时返回 None"""
+    n = a1 - a0
+    m = b1 - b0
+    delta = n - m
+    odd = delta & 1
+    size = n + m + 2
+    forward = [0] * (2 * size + 1)
+    backward = [0] * (2 * size + 1)
+    for d in range(min((n + m + 1) // 2, DIFF_MAX_COST) + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[k - 1 + size] < forward[k + 1 + size]):
+                x = forward[k + 1 + size]
+            else:
+                x = forward[k - 1 + size] + 1
+            y = x - k
+            sx, sy = x, y
+            while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                x += 1
+                y += 1
+            forward[k + size] = x
+            if odd and delta - (d - 1) <= k <= delta + (d - 1) and x + backward[delta - k + size] >= n:
+                return a0 + sx, b0 + sy, a0 + x, b0 + y
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[k - 1 + size] < backward[k + 1 + size]):
+                x = backward[k + 1 + size]
+            else:
+                x = backward[k - 1 + size] + 1
+            y = x - k
+            sx, sy = x, y
+            while x < n and y < m and a[a1 - 1 - x] == b[b1 - 1 - y]:
+                x += 1
+                y += 1
+            backward[k + size] = x
+            if not odd and -d <= delta - k <= d and x + forward[delta - k + size] >= n:
+                return a1 - x, b1 - y, a1 - sx, b1 - sy
+    return None
+
+
+def format_diff_report(old_lines, new_lines, blocks, previous_time, max_lines=2000):
+    """把匹配块转换为紧凑的变化视图（不含上下文，删除行红色、新增行绿色）"""
+    hunks = []
+    i = j = 0
+    for x, y, length in blocks + [(len(old_lines), len(new_lines), 0)]:
+        if x > i or y > j:
+            hunks.append((i, x, j, y))
+        i, j = x + length, y + length
+    removed = sum(x - i for i, x, _, _ in hunks)
+    added = sum(y - j for _, _, j, y in hunks)
+    if not hunks:
+        return f"🔀 与上次执行（{previous_time}）的结果相同，共 {len(new_lines)} 行"
+    lines = [f"🔀 与上次执行（{previous_time}）相比: \x1b[32m+{added}\x1b[0m 行, "
+             f"\x1b[31m-{removed}\x1b[0m 行, {len(hunks)} 处变化", ""]
+    shown = 0
+    for i, x, j, y in hunks:
+        if shown >= max_lines:
+            lines.append(f"⋯ 其余变化未显示（共 {added + removed} 行变化）")
+            break
+        lines.append(f"\x1b[36m@@ 上次第 {i + 1} 行 / 本次第 {j + 1} 行 @@\x1b[0m")
+        lines.extend(f"\x1b[31m- {line}\x1b[0m" for line in old_lines[i:x])
+        lines.extend(f"\x1b[32m+ {line}\x1b[0m" for line in new_lines[j:y])
+        shown += (x - i) + (y - j)
+    return "\n".join(lines)
+
+
+class OutputDiffWorker(QThread):
+    """在后台线程中比较两次执行的输出"""
+    finished_signal = pyqtSignal(str)
+    
+    def __init__(self, old_data, new_text, previous_time):
+        super().__init__()
+        self.old_data = old_data
+        self.new_text = new_text
+        self.previous_time = previous_time
+    
+    def run(self):
+        old_lines = self.old_data.decode('utf-8', 'surrogatepass').split('\n')
+        new_lines = self.new_text.split('\n')
+        blocks = diff_lines(old_lines, new_lines)
+        self.finished_signal.emit(format_diff_report(old_lines, new_lines, blocks, self.previous_time))
+
+
+@functools.lru_cache(maxsize=4096)
+def shared_record(value):
+    """返回与 value 相等的第一个对象（value 须可哈希），使重复出现的记录只保存一份"""
+    return value
+
+
+class CommandVariable(namedtuple('CommandVariable', 'name description default')):
+    """命令变量"""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, data):
+        return shared_record(cls(sys.intern(str(data.get('name') or '')),
+                                 sys.intern(str(data.get('description') or '')),
+                                 sys.intern(str(data.get('default') or ''))))
+    
+    def to_dict(self):
+        return {'name': self.name, 'description': self.description, 'default': self.default}
+
+
+class CommandRecord(namedtuple('CommandRecord', 'name command variables limits description extra')):
+    """一条命令（自定义命令或命令包中的命令）
+    
+    用不可变的命名元组代替嵌套字典：实例没有 __dict__，字符串经过 intern，
+    相同的变量定义（包括整个变量元组）在所有命令之间共享。
+    limits 和 extra（文件中其他未知字段，保存时原样写回）为空时是 None。
+    """
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, data):
+        variables = shared_record(tuple(CommandVariable.from_dict(var) for var in data.get('variables') or ()
+                                        if isinstance(var, dict) and var.get('name')))
+        limits = data.get('limits')
+        extra = {key: value for key, value in data.items() if key not in cls._fields}
+        return cls(sys.intern(str(data.get('name') or '')),
+                   sys.intern(str(data.get('command') or '')),
+                   variables,
+                   limits if isinstance(limits, dict) and limits else None,
+                   sys.intern(str(data.get('description') or '')),
+                   extra or None)
+    
+    def to_dict(self):
+        """转换为 custom_commands.json 中的格式"""
+        data = dict(self.extra or {})
+        data.update(name=self.name, command=self.command,
+                    variables=[var.to_dict() for var in self.variables])
+        if self.limits:
+            data['limits'] = self.limits
+        if self.description:
+            data['description'] = self.description
+        return data
+
+
+def fill_command(cmd_data, values=None):
+    """把变量值代入命令，未给出的变量使用默认值"""
+    command = cmd_data.command
+    for var in cmd_data.variables:
+        value = (values or {}).get(var.name, var.default)
+        command = command.replace(f"{{{var.name}}}", value)
+    return command
+
+
+class CommandPackRegistry:
+    """命令包：插件目录中的 .json / .py 文件，以及通过入口点安装的 Python 包
+    
+    只读取目录下的 index.json 就能列出所有包：其中缓存了每个包的元数据，
+    文件的 mtime 和大小未变化时不再打开包文件。包内的命令在第一次使用时才加载。
+    .py 包用字面量 PACK_INFO 描述元数据（用 ast 读取，不执行模块），
+    由 get_commands() 或 COMMANDS 提供命令；入口点指向的对象同样提供这两项。
+    .py 包和入口点加载过一次后，命令名称也记入索引，按名称查找时据此决定是否需要导入。
+    """
+    PACK_DIR = 'command_packs'
+    INDEX_FILE = 'index.json'
+    ENTRY_POINT_GROUP = 'quickcmd.command_packs'
+    
+    def __init__(self, pack_dir=PACK_DIR):
+        self.pack_dir = os.path.abspath(pack_dir)
+        self.packs = None
+        self.errors = {}
+        self._loaded = {}
+        self._entry_points = {}
+    
+    def scan(self, force=False):
+        """返回 {包标识: 元数据}（按名称排序），只重新读取新增或变化的包"""
+        if self.packs is None or force:
+            self.apply_scan(self.collect())
+        return self.packs
+    
+    def apply_scan(self, result):
+        """使用 collect() 的结果，已加载的命令随之失效"""
+        self.packs, self.errors, self._entry_points = result
+        self._loaded = {}
+    
+    def collect(self):
+        """读取索引、插件目录和入口点，返回 (包, 错误, 入口点)
+        
+        不修改本对象（只会更新索引文件），可以在后台线程中执行。
+        """
+        try:
+            with open(os.path.join(self.pack_dir, self.INDEX_FILE), 'r', encoding='utf-8') as f:
+                cached = json.load(f).get('packs', {})
+        except (OSError, ValueError, AttributeError):
+            cached = {}
+        packs = {}
+        errors = {}
+        try:
+            with os.scandir(self.pack_dir) as entries:
+                files = [entry for entry in entries
+                         if entry.name != self.INDEX_FILE and entry.name.endswith(('.json', '.py'))
+                         and entry.is_file()]
+        except OSError:
+            files = []
+        for entry in files:
+            key = f"file:{entry.name}"
+            try:
+                st = entry.stat()
+                info = cached.get(key)
+                if not info or info.get('mtime') != st.st_mtime_ns or info.get('size') != st.st_size:
+                    info = self._read_file_info(entry.path)
+                    info.update(mtime=st.st_mtime_ns, size=st.st_size)
+            except (OSError, ValueError, SyntaxError) as e:
+                errors[key] = str(e)
+                continue
+            packs[key] = info
+        entry_points = self._find_entry_points()
+        for ep in entry_points.values():
+            key = f"entry:{ep.name}"
+            version = ep.dist.version if ep.dist else ''
+            info = cached.get(key)
+            if not info or info.get('value') != ep.value or info.get('dist_version') != version:
+                try:
+                    # 入口点只能导入后读取元数据，结果同样写入索引
+                    info = self._pack_info(getattr(ep.load(), 'PACK_INFO', {}), ep.name)
+                except Exception as e:
+                    errors[key] = str(e)
+                    continue
+                info.update(value=ep.value, dist_version=version)
+            packs[key] = info
+        if packs != cached:
+            self._save_index(packs)
+        return dict(sorted(packs.items(), key=lambda item: item[1]['name'].lower())), errors, entry_points
+    
+    def find(self, match):
+        """返回第一个名称满足 match 的命令，找不到时返回 None
+        
+        .json 包直接读取；.py 包和入口点只有已加载过、或索引中记录的命令名称有匹配时才加载，
+        不会为了一次查找而导入执行所有模块。
+        """
+        for key, info in self.scan().items():
+            if key not in self._loaded and not key.endswith('.json'):
+                if not any(match(name) for name in info.get('names') or ()):
+                    continue
+            try:
+                commands = self.commands(key)
+            except Exception:
+                continue
+            for cmd_data in commands:
+                if match(cmd_data.name):
+                    return cmd_data
+        return None
+    
+    def commands(self, key):
+        """加载并返回包内的命令列表，失败时抛出异常"""
+        if key in self._loaded:
+            return self._loaded[key]
+        kind, _, name = key.partition(':')
+        if kind == 'file' and name.endswith('.json'):
+            with open(os.path.join(self.pack_dir, name), 'r', encoding='utf-8') as f:
+                raw = json.load(f).get('commands', [])
+        else:
+            if kind == 'file':
+                module_name = 'quickcmd_pack_' + re.sub(r'\W', '_', os.path.splitext(name)[0])
+                spec = importlib.util.spec_from_file_location(module_name, os.path.join(self.pack_dir, name))
+                source = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(source)
+            else:
+                source = self._entry_points[name].load()
+            get_commands = getattr(source, 'get_commands', None)
+            raw = get_commands() if get_commands else getattr(source, 'COMMANDS', [])
+        commands = [CommandRecord.from_dict(item) for item in raw
+                    if isinstance(item, dict) and item.get('name') and item.get('command')]
+        self._loaded[key] = commands
+        # .py 包和入口点的命令数和名称在第一次加载后才知道，补充到索引里
+        info = (self.packs or {}).get(key)
+        names = None if name.endswith('.json') else [cmd_data.name for cmd_data in commands]
+        if info is not None and (info.get('count') != len(commands) or info.get('names') != names):
+            info['count'] = len(commands)
+            if names is not None:
+                info['names'] = names
+            self._save_index(self.packs)
+        return commands
+    
+    def _read_file_info(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        fallback = os.path.splitext(os.path.basename(path))[0]
+        if path.endswith('.json'):
+            data = json.loads(source)
+            if not isinstance(data, dict) or not isinstance(data.get('commands'), list):
+                raise ValueError("缺少 commands 列表")
+            return self._pack_info(data, fallback, count=len(data['commands']))
+        for node in ast.parse(source, path).body:
+            if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                    and isinstance(node.targets[0], ast.Name) and node.targets[0].id == 'PACK_INFO'):
+                return self._pack_info(ast.literal_eval(node.value), fallback)
+        raise ValueError("缺少 PACK_INFO")
+    
+    @staticmethod
+    def _pack_info(raw, fallback, count=None):
+        if not isinstance(raw, dict):
+            raise ValueError("PACK_INFO 必须是字典")
+        return {'name': str(raw.get('name') or fallback),
+                'description': str(raw.get('description', '')),
+                'version': str(raw.get('version', '')),
+                'platforms': [str(name) for name in raw.get('platforms') or []],
+                'count': count}
+    
+    def _find_entry_points(self):
+        try:
+            from importlib.metadata import entry_points
+            return {ep.name: ep for ep in entry_points(group=self.ENTRY_POINT_GROUP)}
+        except Exception:
+            return {}
+    
+    def _save_index(self, packs):
+        if not os.path.isdir(self.pack_dir):
+            return
+        try:
+            with open(os.path.join(self.pack_dir, self.INDEX_FILE), 'w', encoding='utf-8') as f:
+                json.dump({'packs': packs}, f, ensure_ascii=False, indent=2)
+        except OSError:
+            pass
+
+
+class CommandPackScanner(QThread):
+    """在后台线程中扫描命令包（目录、索引和入口点元数据）"""
+    finished_signal = pyqtSignal(object)
+    
+    def __init__(self, registry):
+        super().__init__()
+        self.registry = registry
+    
+    def run(self):
+        self.finished_signal.emit(self.registry.collect())
+
+
+def validate_command_data(data):
+    """检查一条命令能否加载，返回错误信息，可以加载时返回 None
+    
+    只检查 CommandRecord.from_dict 需要的字段。没有 name 的变量会被忽略，
+    limits 中的小数、未知字段和无效值由 ResourceLimits 规整或忽略，都不会让整条命令被跳过。
+    """
+    if not isinstance(data, dict):
+        return "不是 JSON 对象"
+    for key in ('name', 'command'):
+        if not isinstance(data.get(key), str) or not data[key].strip():
+            return f"缺少 {key}"
+    if not isinstance(data.get('variables', []), list):
+        return "variables 必须是列表"
+    return None
+
+
+def command_hash(cmd_data):
+    """命令内容的摘要（命令文本和变量，不含名称），用于识别内容相同的命令"""
+    content = json.dumps([cmd_data.command, [[var.name, var.default] for var in cmd_data.variables]],
+                         ensure_ascii=False)
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=8).digest()
+
+
+def dump_commands(commands):
+    """把命令列表序列化为 custom_commands.json 的内容"""
+    return json.dumps([cmd_data.to_dict() for cmd_data in commands], ensure_ascii=False, indent=2)
+
+
+def parse_command_list(data):
+    """把 custom_commands.json 的内容转换为命令列表，返回 (命令列表, [(序号, 错误信息), ...])
+    
+    格式错误的条目逐条跳过，不影响其他命令。
+    """
+    if not isinstance(data, list):
+        return [], [(None, "文件内容不是列表")]
+    commands = []
+    errors = []
+    for index, cmd_data in enumerate(data):
+        error = validate_command_data(cmd_data)
+        if error:
+            errors.append((index, error))
+        else:
+            commands.append(CommandRecord.from_dict(cmd_data))
+    return commands, errors
+
+
+def export_command_library(path, commands):
+    """把命令逐行写入 JSON Lines 文件"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for cmd_data in commands:
+            f.write(json.dumps(cmd_data.to_dict(), ensure_ascii=False))
+            f.write('\n')
+
+
+class CommandLibraryImporter(QThread):
+    """在后台线程中逐行读取 JSON Lines 命令库并与现有命令合并
+    
+    每行解析、校验后立即转换为 CommandRecord，不在内存中保留整个文件。
+    合并后的命令列表及其序列化结果也在本线程中生成，主线程只需替换列表并写入文件。
+    同名冲突按 policy 处理：skip 保留原有命令，replace 覆盖，rename 以 “名称 (2)” 导入；
+    dedupe 为 True 时跳过内容（命令和变量）与已有命令相同的记录。
+    """
+    progress_signal = pyqtSignal(int, int)
+    finished_signal = pyqtSignal(object)
+    
+    CONFLICT_POLICIES = {
+        'skip': "保留原有命令",
+        'replace': "覆盖原有命令",
+        'rename': "重命名后导入",
+    }
+    MAX_ERRORS = 100
+    PROGRESS_INTERVAL = 0.1
+    
+    def __init__(self, path, existing, policy='skip', dedupe=True):
+        super().__init__()
+        self.path = path
+        self.policy = policy
+        self.dedupe = dedupe
+        # 在主线程中取快照（CommandRecord 不可变），工作线程不访问 custom_commands
+        self.existing = list(existing)
+        self.names = {cmd_data.name: ('existing', index) for index, cmd_data in enumerate(existing)}
+        self.hashes = {command_hash(cmd_data) for cmd_data in existing} if dedupe else set()
+        self._cancelled = False
+    
+    def cancel(self):
+        self._cancelled = True
+    
+    def _free_name(self, name):
+        number = 2
+        while f"{name} ({number})" in self.names:
+            number += 1
+        return f"{name} ({number})"
+    
+    def run(self):
+        result = {'added': [], 'replaced': {}, 'lines': 0, 'skipped': 0, 'duplicates': 0,
+                  'renamed': 0, 'errors': [], 'error_count': 0, 'cancelled': False, 'failed': False}
+        added = result['added']
+        
+        def error(line_no, message):
+            result['error_count'] += 1
+            if len(result['errors']) < self.MAX_ERRORS:
+                result['errors'].append((line_no, message))
+        
+        try:
+            total = os.path.getsize(self.path)
+            done = 0
+            last_progress = time.time()
+            with open(self.path, 'rb') as f:
+                for line_no, raw in enumerate(f, 1):
+                    if self._cancelled:
+                        result['cancelled'] = True
+                        break
+                    done += len(raw)
+                    if time.time() - last_progress >= self.PROGRESS_INTERVAL:
+                        last_progress = time.time()
+                        self.progress_signal.emit(done, total)
+                    if line_no == 1 and raw.startswith(codecs.BOM_UTF8):
+                        raw = raw[len(codecs.BOM_UTF8):]
+                    if not raw.strip():
+                        continue
+                    result['lines'] += 1
+                    try:
+                        data = json.loads(raw)
+                    except ValueError as e:
+                        error(line_no, f"JSON 格式错误: {e}")
+                        continue
+                    message = validate_command_data(data)
+                    if message:
+                        error(line_no, message)
+                        continue
+                    cmd_data = CommandRecord.from_dict(data)
+                    digest = command_hash(cmd_data) if self.dedupe else None
+                    if digest is not None and digest in self.hashes:
+                        result['duplicates'] += 1
+                        continue
+                    target = self.names.get(cmd_data.name)
+                    if target is not None and self.policy == 'skip':
+                        # 被跳过的记录没有导入，不记录其内容摘要
+                        result['skipped'] += 1
+                        continue
+                    if digest is not None:
+                        self.hashes.add(digest)
+                    if target is not None:
+                        if self.policy == 'rename':
+                            cmd_data = cmd_data._replace(name=self._free_name(cmd_data.name))
+                            result['renamed'] += 1
+                        elif target[0] == 'existing':
+                            result['replaced'][target[1]] = cmd_data
+                            continue
+                        else:
+                            added[target[1]] = cmd_data
+                            continue
+                    self.names[cmd_data.name] = ('added', len(added))
+                    added.append(cmd_data)
+            self.progress_signal.emit(done, total)
+        except OSError as e:
+            # 读到一半出错时与取消相同，不应用已读取的部分
+            error(0, f"读取失败: {e}")
+            result['failed'] = True
+        if not result['cancelled'] and not result['failed'] and (added or result['replaced']):
+            commands = self.existing
+            for index, cmd_data in result['replaced'].items():
+                commands[index] = cmd_data
+            commands.extend(added)
+            result['commands'] = commands
+            result['json'] = dump_commands(commands)
+        self.finished_signal.emit(result)
+
+
+class CommandImportDialog(QDialog):
+    """导入命令库对话框"""
+    import_ready = pyqtSignal(object)
+    
+    def __init__(self, parent, existing):
+        super().__init__(parent)
+        self.setWindowTitle("导入命令库")
+        self.setMinimumWidth(520)
+        # 导入期间不允许修改命令列表，替换时使用的是导入开始时的位置
+        self.setModal(True)
+        self.existing = existing
+        self.importer = None
+        
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        path_row = QHBoxLayout()
+        self.path_input = QLineEdit()
+        self.path_input.setPlaceholderText("JSON Lines 文件，每行一条命令")
+        path_row.addWidget(self.path_input)
+        browse_btn = QPushButton("📂")
+        browse_btn.setMaximumWidth(40)
+        browse_btn.clicked.connect(self.browse)
+        path_row.addWidget(browse_btn)
+        form.addRow("文件:", path_row)
+        self.policy_combo = QComboBox()
+        for key, label in CommandLibraryImporter.CONFLICT_POLICIES.items():
+            self.policy_combo.addItem(label, key)
+        form.addRow("名称冲突时:", self.policy_combo)
+        self.dedupe_check = QCheckBox("跳过内容与已有命令相同的记录")
+        self.dedupe_check.setChecked(True)
+        form.addRow("", self.dedupe_check)
+        layout.addLayout(form)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+        
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        self.status_label.setStyleSheet("color: #64748b; padding: 5px; font-size: 12px;")
+        layout.addWidget(self.status_label)
+        
+        self.error_view = QTextEdit()
+        self.error_view.setReadOnly(True)
+        self.error_view.setMaximumHeight(150)
+        self.error_view.hide()
+        layout.addWidget(self.error_view)
+        
+        self.start_btn = QPushButton("📥 开始导入")
+        self.start_btn.clicked.connect(self.toggle_import)
+        layout.addWidget(self.start_btn)
+    
+    def browse(self):
+        path, _ = QFileDialog.getOpenFileName(self, "选择命令库", "",
+                                              "JSON Lines (*.jsonl *.ndjson);;所有文件 (*)")
+        if path:
+            self.path_input.setText(path)
+    
+    def toggle_import(self):
+        if self.importer is not None:
+            self.importer.cancel()
+            return
+        path = self.path_input.text().strip()
+        if not os.path.isfile(path):
+            QMessageBox.warning(self, "提示", "请选择要导入的文件")
+            return
+        self.error_view.hide()
+        self.importer = CommandLibraryImporter(path, self.existing(), self.policy_combo.currentData(),
+                                               self.dedupe_check.isChecked())
+        self.importer.progress_signal.connect(self.show_progress)
+        self.importer.finished_signal.connect(self.import_finished)
+        self.start_btn.setText("⏹️ 取消")
+        self.status_label.setText("正在读取...")
+        self.importer.start()
+    
+    def show_progress(self, done, total):
+        self.progress_bar.setValue(int(done * 1000 / total) if total else 1000)
+    
+    def import_finished(self, result):
+        self.importer.wait()
+        self.importer = None
+        self.start_btn.setText("📥 开始导入")
+        summary = (f"读取 {result['lines']} 条，新增 {len(result['added'])} 条，"
+                   f"覆盖 {len(result['replaced'])} 条，重命名 {result['renamed']} 条，"
+                   f"跳过同名 {result['skipped']} 条，跳过重复 {result['duplicates']} 条，"
+                   f"错误 {result['error_count']} 条")
+        if result['errors']:
+            lines = [f"第 {line_no} 行: {message}" if line_no else message
+                     for line_no, message in result['errors']]
+            if result['error_count'] > len(lines):
+                lines.append(f"... 另有 {result['error_count'] - len(lines)} 条错误")
+            self.error_view.setPlainText('\n'.join(lines))
+            self.error_view.show()
+        if result['cancelled']:
+            self.status_label.setText(f"⛔ 已取消，未导入任何命令（{summary}）")
+            return
+        if result['failed']:
+            self.status_label.setText(f"❌ 读取失败，未导入任何命令（{summary}）")
+            return
+        self.status_label.setText(f"✅ {summary}")
+        if 'commands' in result:
+            self.import_ready.emit(result)
+    
+    def done(self, result):
+        if self.importer is not None:
+            self.importer.finished_signal.disconnect()
+            self.importer.cancel()
+            self.importer.wait()
+            self.importer = None
+        super().done(result)
+
+
+class CronSchedule:
+    """简化的 cron 表达式（分 时 日 月 周），支持 *、a-b、a,b 与 */n"""
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+    
+    def __init__(self, expr):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError("cron 表达式需要 5 个字段: 分 时 日 月 周")
+        self.expr = expr
+        parsed = [self._parse_field(field, lo, hi)
+                  for field, (lo, hi) in zip(fields, self.FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = parsed
+        # 周日既可以写 0 也可以写 7
+        if 7 in self.weekdays:
+            self.weekdays.discard(7)
+            self.weekdays.add(0)
+        # 与 cron 一致：日或周以 * 开头（包括 */n）时两者都要满足，否则满足其一即可
+        self.any_day = fields[2].startswith('*')
+        self.any_weekday = fields[4].startswith('*')
+    
+    @staticmethod
+    def _parse_field(field, lo, hi):
+        values = set()
+        try:
+            for part in field.split(','):
+                step = 1
+                if '/' in part:
+                    part, step_text = part.split('/', 1)
+                    step = int(step_text)
+                    if step <= 0:
+                        raise ValueError
+                if part == '*':
+                    start, end = lo, hi
+                elif '-' in part:
+                    start_text, end_text = part.split('-', 1)
+                    start, end = int(start_text), int(end_text)
+                else:
+                    start = int(part)
+                    end = hi if step > 1 else start
+                if start < lo or end > hi or start > end:
+                    raise ValueError
+                values.update(range(start, end + 1, step))
+        except ValueError:
+            raise ValueError(f"无效的 cron 字段: {field}")
+        return values
+    
+    def _day_matches(self, dt):
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        # 与 cron 一致：日和周都受限时满足其一即可
+        return day_ok or weekday_ok
+    
+    def next_after(self, timestamp):
+        """返回严格晚于 timestamp 的下一个触发时间（时间戳）"""
+        dt = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt.timestamp()
+        raise ValueError(f"cron 表达式永远不会触发: {self.expr}")
+
+
+class ScheduledJob:
+    """定时任务：固定间隔或 cron 时间触发的命令"""
+    OVERLAP_POLICIES = {
+        'skip': "跳过本次",
+        'queue': "排队等待",
+        'kill': "终止上一次",
+    }
+    
+    def __init__(self, data):
+        self.name = data.get('name', '')
+        self.command = data.get('command', '')
+        self.interval = int(data.get('interval') or 0)
+        self.cron = (data.get('cron') or '').strip()
+        self.jitter = max(0, int(data.get('jitter') or 0))
+        self.overlap = data.get('overlap', 'skip')
+        self.output_file = data.get('output_file', '')
+        self.enabled = data.get('enabled', True)
+        self.limits = data.get('limits') or {}
+        
+        if not self.name or not self.command:
+            raise ValueError("任务名称和命令不能为空")
+        if self.overlap not in self.OVERLAP_POLICIES:
+            raise ValueError(f"未知的重叠策略: {self.overlap}")
+        self.schedule = CronSchedule(self.cron) if self.cron else None
+        if self.schedule is None and self.interval <= 0:
+            raise ValueError("请设置执行间隔或 cron 表达式")
+        
+        # 运行时状态（不持久化）
+        self.base_due = None    # 不含抖动的计划时间
+        self.next_run = None    # 实际触发时间
+        self.generation = 0     # 调度堆中过期条目的判定依据
+        self.executor = None
+        self.pending = False
+        self.output = []
+        self.last_run = None
+        self.last_success = None
+        self.missed = 0
+        self.skipped = 0
+    
+    def to_dict(self):
+        data = {
+            'name': self.name,
+            'command': self.command,
+            'interval': self.interval,
+            'cron': self.cron,
+            'jitter': self.jitter,
+            'overlap': self.overlap,
+            'output_file': self.output_file,
+            'enabled': self.enabled,
+        }
+        if self.limits:
+            data['limits'] = self.limits
+        return data
+    
+    def describe(self):
+        if self.schedule:
+            return f"cron: {self.cron}"
+        return f"每 {self.interval} 秒"
+    
+    def plan_next(self, now, fired=False):
+        """计算下一次触发时间；错过的多次触发合并为一次"""
+        if self.schedule:
+            base = self.schedule.next_after(now)
+            if fired and self.base_due is not None:
+                due = self.schedule.next_after(self.base_due)
+                count = 0
+                while due <= now and count < 1000:
+                    count += 1
+                    due = self.schedule.next_after(due)
+                self.missed += count
+        elif fired and self.base_due is not None:
+            base = self.base_due + self.interval
+            if base <= now:
+                periods = int((now - base) // self.interval) + 1
+                self.missed += periods
+                base += periods * self.interval
+        else:
+            base = now + self.interval
+        self.base_due = base
+        self.next_run = base + (random.uniform(0, self.jitter) if self.jitter else 0)
+
+
+class CommandScheduler(QObject):
+    """定时任务调度器：所有任务共用一个最小堆和一个单次 QTimer"""
+    job_started = pyqtSignal(object)
+    job_finished = pyqtSignal(object, bool)
+    jobs_changed = pyqtSignal()
+    
+    # QTimer 的间隔上限为 int 毫秒，长等待分段进行
+    MAX_TIMER_MS = 3600 * 1000
+    
+    def __init__(self, parent=None, max_concurrent=4):
+        super().__init__(parent)
+        self.jobs = []
+        self.max_concurrent = max_concurrent
+        self._heap = []
+        self._seq = itertools.count()
+        self._running = set()
+        self._waiting = deque()
+        self._threads = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timer)
+    
+    def add_job(self, job):
+        self.jobs.append(job)
+        self._schedule(job, time.time())
+        self._arm()
+        self.jobs_changed.emit()
+    
+    def remove_job(self, job):
+        if job in self.jobs:
+            self.jobs.remove(job)
+        job.generation += 1
+        job.pending = False
+        if job in self._waiting:
+            self._waiting.remove(job)
+        self._arm()
+        self.jobs_changed.emit()
+    
+    def set_enabled(self, job, enabled):
+        job.enabled = enabled
+        job.base_due = None
+        if enabled:
+            self._schedule(job, time.time())
+        else:
+            job.generation += 1
+            job.next_run = None
+        self._arm()
+        self.jobs_changed.emit()
+    
+    def run_now(self, job):
+        """立即执行一次，不影响后续计划"""
+        self._trigger(job)
+        self.jobs_changed.emit()
+    
+    def set_max_concurrent(self, value):
+        self.max_concurrent = max(1, value)
+        self._start_waiting()
+    
+    def running_count(self):
+        return len(self._running)
+    
+    def _schedule(self, job, now, fired=False):
+        if not job.enabled:
+            return
+        job.generation += 1
+        job.plan_next(now, fired)
+        heapq.heappush(self._heap, (job.next_run, next(self._seq), job.generation, job))
+    
+    def _arm(self):
+        """只为最早到期的任务设置定时器，空闲时没有任何开销"""
+        while self._heap and self._heap[0][2] != self._heap[0][3].generation:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            self._timer.stop()
+            return
+        delay_ms = max(0, int((self._heap[0][0] - time.time()) * 1000) + 1)
+        self._timer.start(min(delay_ms, self.MAX_TIMER_MS))
+    
+    def _on_timer(self):
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, generation, job = heapq.heappop(self._heap)
+            if generation != job.generation:
+                continue
+            self._trigger(job)
+            self._schedule(job, now, fired=True)
+        self._arm()
+        self.jobs_changed.emit()
+    
+    def _trigger(self, job):
+        if job.executor is not None:
+            if job.overlap == 'skip':
+                job.skipped += 1
+            elif job.overlap == 'queue':
+                job.pending = True
+            else:
+                job.pending = True
+                job.executor.kill()
+            return
+        if job in self._waiting:
+            return
+        if len(self._running) >= self.max_concurrent:
+            self._waiting.append(job)
+            return
+        self._start(job)
+    
+    def _start(self, job):
+        executor = create_executor(job.command, job.limits)
+        job.executor = executor
+        job.output = []
+        job.last_run = time.time()
+        executor.output_signal.connect(job.output.append)
+        executor.finished_signal.connect(
+            lambda success, j=job, e=executor: self._on_finished(j, e, success))
+        # 保留线程引用直到线程真正结束
+        self._threads.add(executor)
+        executor.finished.connect(lambda e=executor: self._threads.discard(e))
+        self._running.add(job)
+        executor.start()
+        self.job_started.emit(job)
+    
+    def _on_finished(self, job, executor, success):
+        if job.executor is not executor:
+            return
+        job.executor = None
+        self._running.discard(job)
+        job.last_success = success and not executor.killed
+        self._save_output(job)
+        self.job_finished.emit(job, job.last_success)
+        
+        if job.pending:
+            job.pending = False
+            if job in self.jobs and job.enabled:
+                self._trigger(job)
+        self._start_waiting()
+        self.jobs_changed.emit()
+    
+    def _start_waiting(self):
+        while self._waiting and len(self._running) < self.max_concurrent:
+            job = self._waiting.popleft()
+            if job in self.jobs and job.executor is None:
+                self._start(job)
+    
+    def _save_output(self, job):
+        if not job.output_file:
+            return
+        try:
+            path = os.path.expanduser(job.output_file)
+            with open(path, 'a', encoding='utf-8') as f:
+                started = datetime.fromtimestamp(job.last_run).strftime("%Y-%m-%d %H:%M:%S")
+                f.write(f"{'='*60}\n")
+                f.write(f"⏰ {job.name} | {started} | {job.command}\n")
+                f.write(f"{'='*60}\n")
+                for line in job.output:
+                    f.write(line + "\n")
+        except OSError as e:
+            job.output.append(f"❌ 保存输出失败: {e}")
 
 
 class AddCommandDialog(QDialog):
@@ -170,6 +3935,28 @@ class AddCommandDialog(QDialog):
         
         layout.addWidget(var_container)
         
+        # 资源限制（0 表示不限制）
+        limits_group = QGroupBox("🚧 资源限制 (可选，0 表示不限制)")
+        limits_form = QFormLayout(limits_group)
+        self.limit_inputs = {}
+        self.output_limit_bytes = 0
+        for key, label, maximum, suffix in (('cpu_seconds', "CPU 时间:", 86400, " 秒"),
+                                            ('memory_mb', "地址空间:", 1024 * 1024, " MB"),
+                                            ('open_files', "打开文件数:", 1024 * 1024, ""),
+                                            ('nice', "nice:", 19, ""),
+                                            ('max_output_bytes', "最大输出:", 100 * 1024, " MB")):
+            spin = QSpinBox()
+            spin.setRange(0, maximum)
+            spin.setSuffix(suffix)
+            limits_form.addRow(label, spin)
+            self.limit_inputs[key] = spin
+        self.ionice_combo = QComboBox()
+        self.ionice_combo.addItem("不调整", None)
+        self.ionice_combo.addItem("低 (best-effort 7)", 'low')
+        self.ionice_combo.addItem("空闲 (idle)", 'idle')
+        limits_form.addRow("I/O 优先级:", self.ionice_combo)
+        layout.addWidget(limits_group)
+        
         # 说明文本
         help_text = QLabel(
             "💡 提示:\n"
@@ -204,6 +3991,17 @@ class AddCommandDialog(QDialog):
             self.command_input.setPlainText(command_data.get('command', ''))
             for var in command_data.get('variables', []):
                 self.add_variable_to_list(var)
+            limits = command_data.get('limits') or {}
+            # 文件中的限制可能不是整数或超出范围，按实际生效的值显示
+            effective = ResourceLimits(limits if isinstance(limits, dict) else None)
+            for key, spin in self.limit_inputs.items():
+                value = effective.get(key) or 0
+                if key == 'max_output_bytes':
+                    # 界面以 MB 为单位，未修改时保留原来的字节数
+                    self.output_limit_bytes = value
+                    value = -(-value // (1024 * 1024))
+                spin.setValue(value)
+            self.ionice_combo.setCurrentIndex(max(0, self.ionice_combo.findData(limits.get('ionice'))))
     
     def add_variable(self):
         """添加变量"""
@@ -321,11 +4119,133 @@ class AddCommandDialog(QDialog):
             item = self.var_list.item(i)
             variables.append(item.data(Qt.ItemDataRole.UserRole))
         
-        return {
+        limits = {key: spin.value() for key, spin in self.limit_inputs.items() if spin.value()}
+        if 'max_output_bytes' in limits:
+            mb = limits['max_output_bytes']
+            original = self.output_limit_bytes
+            limits['max_output_bytes'] = original if -(-original // (1024 * 1024)) == mb else mb * 1024 * 1024
+        if self.ionice_combo.currentData():
+            limits['ionice'] = self.ionice_combo.currentData()
+        
+        cmd_data = {
             'name': self.name_input.text(),
             'command': self.command_input.toPlainText(),
             'variables': variables
         }
+        if limits:
+            cmd_data['limits'] = limits
+        return cmd_data
+
+
+class ScheduleJobDialog(QDialog):
+    """添加定时任务对话框"""
+    def __init__(self, parent=None, job_data=None):
+        super().__init__(parent)
+        self.setWindowTitle("定时执行命令")
+        self.setModal(True)
+        self.setMinimumWidth(520)
+        job_data = job_data or {}
+        self.limits = job_data.get('limits') or {}
+        
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        form.setSpacing(10)
+        
+        self.name_input = QLineEdit(job_data.get('name', ''))
+        self.name_input.setPlaceholderText("例如: 磁盘空间巡检")
+        form.addRow("📝 任务名称:", self.name_input)
+        
+        self.command_input = QLineEdit(job_data.get('command', ''))
+        self.command_input.setPlaceholderText("例如: df -h")
+        form.addRow("💻 命令内容:", self.command_input)
+        
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(["固定间隔", "Cron 表达式"])
+        form.addRow("⏰ 调度方式:", self.mode_combo)
+        
+        self.interval_input = QSpinBox()
+        self.interval_input.setRange(1, 7 * 24 * 3600)
+        self.interval_input.setSuffix(" 秒")
+        self.interval_input.setValue(int(job_data.get('interval') or 600))
+        form.addRow("🔁 执行间隔:", self.interval_input)
+        
+        self.cron_input = QLineEdit(job_data.get('cron', ''))
+        self.cron_input.setPlaceholderText("分 时 日 月 周，例如: */10 * * * *")
+        form.addRow("📅 Cron:", self.cron_input)
+        
+        self.jitter_input = QSpinBox()
+        self.jitter_input.setRange(0, 3600)
+        self.jitter_input.setSuffix(" 秒")
+        self.jitter_input.setValue(int(job_data.get('jitter') or 0))
+        form.addRow("🎲 随机抖动:", self.jitter_input)
+        
+        self.overlap_combo = QComboBox()
+        for key, label in ScheduledJob.OVERLAP_POLICIES.items():
+            self.overlap_combo.addItem(label, key)
+        self.overlap_combo.setCurrentIndex(
+            max(0, self.overlap_combo.findData(job_data.get('overlap', 'skip'))))
+        form.addRow("⚠️ 上次未结束时:", self.overlap_combo)
+        
+        output_row = QHBoxLayout()
+        self.output_input = QLineEdit(job_data.get('output_file', ''))
+        self.output_input.setPlaceholderText("留空则显示在执行结果区域")
+        output_row.addWidget(self.output_input)
+        browse_btn = QPushButton("📂")
+        browse_btn.setMaximumWidth(50)
+        browse_btn.clicked.connect(self.browse_output_file)
+        output_row.addWidget(browse_btn)
+        form.addRow("💾 保存输出:", output_row)
+        
+        self.enabled_check = QCheckBox("启用")
+        self.enabled_check.setChecked(job_data.get('enabled', True))
+        form.addRow("", self.enabled_check)
+        
+        layout.addLayout(form)
+        
+        self.mode_combo.currentIndexChanged.connect(self.update_mode)
+        self.mode_combo.setCurrentIndex(1 if job_data.get('cron') else 0)
+        self.update_mode()
+        
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | 
+            QDialogButtonBox.StandardButton.Cancel
+        )
+        buttons.accepted.connect(self.validate_and_accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+    
+    def update_mode(self):
+        use_cron = self.mode_combo.currentIndex() == 1
+        self.interval_input.setEnabled(not use_cron)
+        self.cron_input.setEnabled(use_cron)
+    
+    def browse_output_file(self):
+        path, _ = QFileDialog.getSaveFileName(self, "保存输出到", self.output_input.text(),
+                                              "文本文件 (*.txt *.log);;所有文件 (*)")
+        if path:
+            self.output_input.setText(path)
+    
+    def validate_and_accept(self):
+        try:
+            ScheduledJob(self.get_job_data())
+        except ValueError as e:
+            QMessageBox.warning(self, "错误", str(e))
+            return
+        self.accept()
+    
+    def get_job_data(self):
+        use_cron = self.mode_combo.currentIndex() == 1
+        return {
+            'name': self.name_input.text().strip(),
+            'command': self.command_input.text().strip(),
+            'interval': 0 if use_cron else self.interval_input.value(),
+            'cron': self.cron_input.text().strip() if use_cron else '',
+            'jitter': self.jitter_input.value(),
+            'overlap': self.overlap_combo.currentData(),
+            'output_file': self.output_input.text().strip(),
+            'enabled': self.enabled_check.isChecked(),
+            'limits': self.limits,
+        }
 
 
 class LetYouHandApp(QMainWindow):
@@ -333,26 +4253,132 @@ class LetYouHandApp(QMainWindow):
         super().__init__()
         self.current_os = platform.system()
         self.dark_mode = False
+        self.command_load_errors = []
         self.custom_commands = self.load_custom_commands()
+        self.command_packs = CommandPackRegistry()
+        self.pack_scanner = None
+        self.packs_listed = False
+        self.scheduler = CommandScheduler(self)
+        self.scheduler.job_finished.connect(self.scheduled_job_finished)
+        self.load_scheduled_jobs()
+        self.watchdog = StallWatchdog(self)
+        if os.environ.get('QUICKCMD_STALL_DEBUG'):
+            self.watchdog.acquire()
+        self.control_server = ControlServer(self)
+        self.preset_commands = {}
+        self.builtin_commands = {}
         self.init_ui()
+        if self.command_load_errors:
+            self.report_command_load_errors()
     
     def load_custom_commands(self):
-        """加载自定义命令"""
+        """加载自定义命令
+        
+        格式错误的条目被跳过，此时原文件先备份为 .bak，之后保存时不会丢失这些条目的原文。
+        """
         config_file = 'custom_commands.json'
-        if os.path.exists(config_file):
+        if not os.path.exists(config_file):
+            return []
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                commands, errors = parse_command_list(json.load(f))
+        except (OSError, ValueError) as e:
+            commands, errors = [], [(None, str(e))]
+        if errors:
             try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+                shutil.copyfile(config_file, config_file + '.bak')
+            except OSError:
+                pass
+        self.command_load_errors = errors
+        return commands
     
-    def save_custom_commands(self):
-        """保存自定义命令"""
+    def report_command_load_errors(self):
+        """在输出区域列出加载时跳过的命令"""
+        self.append_output(f"⚠️ custom_commands.json 中有 {len(self.command_load_errors)} 处格式错误，"
+                           f"相应内容已跳过，原文件已备份为 custom_commands.json.bak")
+        for index, error in self.command_load_errors[:20]:
+            self.append_output(f"  第 {index + 1} 条: {error}" if index is not None else f"  {error}")
+    
+    def save_custom_commands(self, text=None):
+        """保存自定义命令；text 是已经序列化好的内容（导入时在后台线程中生成）"""
+        if text is None:
+            text = dump_commands(self.custom_commands)
         with open('custom_commands.json', 'w', encoding='utf-8') as f:
-            json.dump(self.custom_commands, f, ensure_ascii=False, indent=2)
+            f.write(text)
+    
+    def load_scheduled_jobs(self):
+        """加载定时任务"""
+        config_file = 'scheduled_jobs.json'
+        if not os.path.exists(config_file):
+            return
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        max_concurrent = data.get('max_concurrent', 4)
+        if isinstance(max_concurrent, int) and not isinstance(max_concurrent, bool):
+            self.scheduler.set_max_concurrent(max_concurrent)
+        jobs = data.get('jobs', [])
+        for job_data in jobs if isinstance(jobs, list) else []:
+            if not isinstance(job_data, dict):
+                continue
+            try:
+                self.scheduler.add_job(ScheduledJob(job_data))
+            except (ValueError, TypeError, AttributeError):
+                # 字段类型错误（如 cron 不是字符串）的任务同样跳过
+                continue
+    
+    def save_scheduled_jobs(self):
+        """保存定时任务"""
+        data = {
+            'max_concurrent': self.scheduler.max_concurrent,
+            'jobs': [job.to_dict() for job in self.scheduler.jobs],
+        }
+        with open('scheduled_jobs.json', 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    
+    # 自定义命令的编辑 / 删除按钮，通过 role 属性匹配，不再逐个设置样式表
+    ROLE_STYLESHEET = """
+        QMainWindow[theme] QPushButton[role="edit"] {
+            background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                stop:0 #10b981, stop:1 #059669);
+        }
+        QMainWindow[theme] QPushButton[role="edit"]:hover {
+            background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                stop:0 #059669, stop:1 #047857);
+        }
+        QMainWindow[theme] QPushButton[role="delete"] {
+            background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                stop:0 #ef4444, stop:1 #dc2626);
+        }
+        QMainWindow[theme] QPushButton[role="delete"]:hover {
+            background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                stop:0 #dc2626, stop:1 #b91c1c);
+        }
+    """
     
-    def get_light_theme(self):
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def get_app_stylesheet(cls):
+        """日间、夜间两套主题合并为一份应用级样式表
+        
+        每条规则都限定在 QMainWindow[theme="..."] 之下，切换主题只需修改主窗口的
+        theme 属性并重新 polish，Qt 不必重新解析样式表。
+        """
+        def scope(sheet, theme):
+            prefix = f'QMainWindow[theme="{theme}"]'
+            def scope_selectors(match):
+                selectors = [selector.strip() for selector in match.group(1).split(',')]
+                return ", ".join(prefix if selector == 'QMainWindow' else f"{prefix} {selector}"
+                                 for selector in selectors) + " {"
+            return re.sub(r'^\s*([^{}\n]+?)\s*\{', scope_selectors, sheet, flags=re.MULTILINE)
+        return scope(cls.get_light_theme(), 'light') + scope(cls.get_dark_theme(), 'dark') + cls.ROLE_STYLESHEET
+    
+    @staticmethod
+    def get_light_theme():
         return """
             QMainWindow {
                 background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
@@ -428,7 +4454,8 @@ class LetYouHandApp(QMainWindow):
             }
         """
     
-    def get_dark_theme(self):
+    @staticmethod
+    def get_dark_theme():
         return """
             QMainWindow {
                 background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
@@ -511,7 +4538,8 @@ class LetYouHandApp(QMainWindow):
     def init_ui(self):
         self.setWindowTitle("一键命令 QuickCmd v1.0 build 00001")
         self.setGeometry(100, 100, 1000, 750)
-        self.setStyleSheet(self.get_light_theme())
+        self.setProperty('theme', 'light')
+        QApplication.instance().setStyleSheet(self.get_app_stylesheet())
         
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -564,6 +4592,14 @@ class LetYouHandApp(QMainWindow):
         self.theme_btn.clicked.connect(self.toggle_theme)
         top_bar.addWidget(self.theme_btn)
         
+        # 卡顿检测面板
+        debug_btn = QPushButton("🩺")
+        debug_btn.setMaximumWidth(50)
+        debug_btn.setMinimumHeight(35)
+        debug_btn.setToolTip("卡顿检测 (Ctrl+Shift+D)")
+        debug_btn.clicked.connect(self.open_stall_debug)
+        top_bar.addWidget(debug_btn)
+        
         layout.addLayout(top_bar)
         
         # 标签页
@@ -572,6 +4608,10 @@ class LetYouHandApp(QMainWindow):
         self.tabs.addTab(self.create_linux_tab(), "🐧 Linux")
         self.tabs.addTab(self.create_mac_tab(), "🍎 macOS")
         self.tabs.addTab(self.create_custom_tab(), "⚡ 自定义命令")
+        self.packs_page = self.create_packs_tab()
+        self.tabs.addTab(self.packs_page, "📦 命令包")
+        self.schedule_tab = self.create_schedule_tab()
+        self.tabs.addTab(self.schedule_tab, "⏰ 定时任务")
         
         # 根据当前系统选择默认标签
         if self.current_os == "Windows":
@@ -581,6 +4621,13 @@ class LetYouHandApp(QMainWindow):
         elif self.current_os == "Darwin":
             self.tabs.setCurrentIndex(2)
         
+        self.previous_outputs = OrderedDict()
+        self.diff_workers = set()
+        self.stale_theme_pages = set()
+        self.repolish_batches = None
+        self.repolish_page = None
+        self.tabs.currentChanged.connect(self.repolish_stale_page)
+        self.tabs.currentChanged.connect(self.ensure_packs_scanned)
         layout.addWidget(self.tabs)
         
         # 输出区域
@@ -589,28 +4636,225 @@ class LetYouHandApp(QMainWindow):
         output_label.setStyleSheet("font-weight: bold; padding: 5px; font-size: 13px;")
         output_header.addWidget(output_label)
         
+        self.table_btn = QPushButton("📊 表格")
+        self.table_btn.setCheckable(True)
+        self.table_btn.setMaximumWidth(80)
+        self.table_btn.setMinimumHeight(30)
+        self.table_btn.setToolTip("以表格显示 ps、df、ss、tasklist、netstat、wmic 等命令的输出")
+        self.table_btn.toggled.connect(self.show_output_page)
+        output_header.addWidget(self.table_btn)
+        
+        full_btn = QPushButton("💾 完整输出")
+        full_btn.setMaximumWidth(110)
+        full_btn.setMinimumHeight(30)
+        full_btn.setToolTip("保存上一次执行的完整输出（包括未显示的行）")
+        full_btn.clicked.connect(self.save_full_output)
+        output_header.addWidget(full_btn)
+        
+        self.diff_btn = QPushButton("🔀 对比")
+        self.diff_btn.setCheckable(True)
+        self.diff_btn.setMaximumWidth(80)
+        self.diff_btn.setMinimumHeight(30)
+        self.diff_btn.setToolTip("再次执行同一命令时，只显示与上次结果相比新增和删除的行")
+        output_header.addWidget(self.diff_btn)
+        
         clear_btn = QPushButton("🗑️ 清空")
         clear_btn.setMaximumWidth(80)
         clear_btn.setMinimumHeight(30)
-        clear_btn.clicked.connect(lambda: self.output_text.clear())
+        clear_btn.clicked.connect(self.clear_output)
         output_header.addWidget(clear_btn)
         
         layout.addLayout(output_header)
         
+        # 搜索栏
+        search_bar = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔍 搜索输出 (Ctrl+F)")
+        self.search_input.textChanged.connect(lambda: self.search_timer.start())
+        self.search_input.returnPressed.connect(lambda: self.find_match(1))
+        search_bar.addWidget(self.search_input)
+        
+        self.search_regex_check = QCheckBox("正则")
+        self.search_regex_check.toggled.connect(self.apply_search)
+        search_bar.addWidget(self.search_regex_check)
+        
+        self.search_case_check = QCheckBox("区分大小写")
+        self.search_case_check.toggled.connect(self.apply_search)
+        search_bar.addWidget(self.search_case_check)
+        
+        prev_btn = QPushButton("⬆️")
+        prev_btn.setMaximumWidth(50)
+        prev_btn.setMinimumHeight(30)
+        prev_btn.setToolTip("上一个 (Shift+F3)")
+        prev_btn.clicked.connect(lambda: self.find_match(-1))
+        search_bar.addWidget(prev_btn)
+        
+        next_btn = QPushButton("⬇️")
+        next_btn.setMaximumWidth(50)
+        next_btn.setMinimumHeight(30)
+        next_btn.setToolTip("下一个 (F3)")
+        next_btn.clicked.connect(lambda: self.find_match(1))
+        search_bar.addWidget(next_btn)
+        
+        self.search_status = QLabel("")
+        self.search_status.setStyleSheet("color: #64748b; padding: 5px; font-size: 12px;")
+        search_bar.addWidget(self.search_status)
+        
+        self.filter_check = QCheckBox("仅显示匹配行")
+        self.filter_check.toggled.connect(self.toggle_filter_view)
+        search_bar.addWidget(self.filter_check)
+        
+        layout.addLayout(search_bar)
+        
         self.output_text = QTextEdit()
         self.output_text.setReadOnly(True)
-        self.output_text.setMaximumHeight(200)
-        layout.addWidget(self.output_text)
+        self.output_renderer = AnsiTextRenderer(self.output_text)
+        # 每次执行使用自己的流控（见 execute_command），这里保存最近一次执行的，供 "💾 完整输出" 使用
+        self.output_flow = OutputFlowController()
+        self.running_executors = set()
+        self.output_buffer = OutputBuffer()
+        self.output_search = OutputSearch(self.output_buffer, self)
+        self.output_search.matches_changed.connect(self.search_progress)
+        self.output_text.verticalScrollBar().valueChanged.connect(self.update_search_highlights)
+        self.match_index = -1
+        
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.apply_search)
+        
+        # 过滤视图只保存匹配的行号
+        self.filter_model = FilteredLinesModel(self.output_search, self)
+        self.filter_view = QListView()
+        self.filter_view.setModel(self.filter_model)
+        self.filter_view.setUniformItemSizes(True)
+        self.filter_view.setFont(QFont("Consolas", 10))
+        self.filter_view.doubleClicked.connect(self.filter_line_activated)
+        
+        self.output_stack = QStackedWidget()
+        self.output_stack.setMaximumHeight(200)
+        self.output_stack.addWidget(self.output_text)
+        self.output_stack.addWidget(self.filter_view)
+        self.table_parser = None
+        self.table_panel = TableViewPanel(self)
+        self.table_model = self.table_panel.model
+        self.table_view = self.table_panel.view
+        self.output_stack.addWidget(self.table_panel)
+        layout.addWidget(self.output_stack)
+        
+        QShortcut(QKeySequence.StandardKey.Find, self, self.focus_search)
+        QShortcut(QKeySequence("F3"), self, lambda: self.find_match(1))
+        QShortcut(QKeySequence("Shift+F3"), self, lambda: self.find_match(-1))
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self.open_stall_debug)
+    
+    def bring_to_front(self):
+        """显示并激活窗口（由单实例控制通道调用）"""
+        if self.isMinimized():
+            self.showNormal()
+        self.show()
+        self.raise_()
+        self.activateWindow()
     
+    def command_names(self):
+        """当前系统上可以按名称执行的命令"""
+        os_tab = {"Windows": 0, "Linux": 1, "Darwin": 2}.get(self.current_os)
+        presets = [name for registry in (self.preset_commands, self.builtin_commands)
+                   for name, entries in registry.items() if any(tab == os_tab for tab, _ in entries)]
+        return {'presets': presets,
+                'custom': [cmd_data.name for cmd_data in self.custom_commands]}
+    
+    def resolve_named_command(self, name, variables=None):
+        """按名称查找自定义命令、预置命令或命令包中的命令，返回 (名称, 命令, 资源限制)；名称可以省略开头的图标
+        
+        预置命令只查找当前系统对应标签页中的，其他系统的同名命令不会执行；
+        内置查看器返回的"命令"是打开它的函数。变量未给出时使用默认值。
+        """
+        def plain(text):
+            text = text.strip()
+            head, _, rest = text.partition(' ')
+            return rest.strip() if rest and not any(ch.isalnum() for ch in head) else text
+        
+        wanted = plain(name)
+        for cmd_data in self.custom_commands:
+            if cmd_data.name == name or plain(cmd_data.name) == wanted:
+                return cmd_data.name, fill_command(cmd_data, variables), cmd_data.limits
+        os_tab = {"Windows": 0, "Linux": 1, "Darwin": 2}.get(self.current_os)
+        for registry in (self.preset_commands, self.builtin_commands):
+            for preset, commands in registry.items():
+                if preset == name or plain(preset) == wanted:
+                    command = next((command for tab, command in commands if tab == os_tab), None)
+                    if command is not None:
+                        return preset, command, None
+        # 最后才查找命令包，只有这时才需要加载包内容
+        cmd_data = self.command_packs.find(lambda pack_name: pack_name == name or plain(pack_name) == wanted)
+        if cmd_data is not None:
+            return cmd_data.name, fill_command(cmd_data, variables), cmd_data.limits
+        return None
+    
+    def open_stall_debug(self):
+        """打开卡顿检测面板"""
+        dialog = StallDebugDialog(self, self.watchdog)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+    
+    REPOLISH_BATCH = 150
+    
+    @timed_slot
     def toggle_theme(self):
-        """切换主题"""
+        """切换主题：只修改 theme 属性，样式表已在启动时解析
+        
+        窗口框架立即重新匹配样式；当前标签页分批处理，不阻塞事件循环；
+        其他标签页推迟到切换过去时再处理。
+        """
         self.dark_mode = not self.dark_mode
-        if self.dark_mode:
-            self.setStyleSheet(self.get_dark_theme())
-            self.theme_btn.setText("☀️ 日间模式")
-        else:
-            self.setStyleSheet(self.get_light_theme())
-            self.theme_btn.setText("🌙 夜间模式")
+        self.setProperty('theme', 'dark' if self.dark_mode else 'light')
+        self.theme_btn.setText("☀️ 日间模式" if self.dark_mode else "🌙 夜间模式")
+        self.stale_theme_pages = {self.tabs.widget(i) for i in range(self.tabs.count())}
+        for _ in self.repolish(self, skip=self.stale_theme_pages):
+            pass
+        self.repolish_stale_page(self.tabs.currentIndex())
+        self.output_renderer.clear_cache()
+    
+    def repolish(self, root, skip=()):
+        """属性变化后重新匹配样式规则（包括以本窗口为父窗口的对话框），跳过 skip 中的子树
+        
+        生成器，每处理 REPOLISH_BATCH 个控件暂停一次，便于分批执行。
+        """
+        style = root.style()
+        pending = [root]
+        count = 0
+        while pending:
+            widget = pending.pop()
+            style.unpolish(widget)
+            style.polish(widget)
+            children = widget.findChildren(QWidget, options=Qt.FindChildOption.FindDirectChildrenOnly)
+            # 倒序入栈，按从上到下的顺序处理，先处理可见区域
+            pending.extend(child for child in reversed(children) if child not in skip)
+            count += 1
+            if count % self.REPOLISH_BATCH == 0:
+                yield
+    
+    def repolish_stale_page(self, index):
+        page = self.tabs.widget(index)
+        if page not in self.stale_theme_pages:
+            return
+        self.stale_theme_pages.discard(page)
+        batches = self.repolish(page)
+        
+        def next_batch():
+            if self.repolish_batches is not batches:
+                return
+            if next(batches, StopIteration) is StopIteration:
+                self.repolish_batches = self.repolish_page = None
+            else:
+                QTimer.singleShot(0, next_batch)
+        # 新的任务取代尚未完成的任务，被取代的页面重新标记为待处理；
+        # 被取代的就是本页时（处理过程中再次切换主题）本页会从头处理，不再标记
+        if self.repolish_page is not None and self.repolish_page is not page:
+            self.stale_theme_pages.add(self.repolish_page)
+        self.repolish_batches = batches
+        self.repolish_page = page
+        next_batch()
     
     def create_windows_tab(self):
         widget = QWidget()
@@ -672,6 +4916,11 @@ class LetYouHandApp(QMainWindow):
         for i, (name, cmd) in enumerate(commands):
             btn = self.create_command_button(name, cmd)
             file_layout.addWidget(btn, i // 3, i % 3)
+        # Windows 没有 du，使用内置扫描
+        for i, (name, mode) in enumerate([("📊 目录大小", 0), ("🔍 大文件查找", 1), ("🔎 最近文件", 2)]):
+            btn = self.create_builtin_button(name, lambda checked=False, m=mode: self.open_directory_scan(m),
+                                             "内置扫描当前目录")
+            file_layout.addWidget(btn, 2, i)
         file_group.setLayout(file_layout)
         layout.addWidget(file_group)
         
@@ -736,7 +4985,7 @@ class LetYouHandApp(QMainWindow):
             ("📶 WiFi信息", "nmcli dev wifi list 2>/dev/null || iwconfig 2>/dev/null"),
         ]
         for i, (name, cmd) in enumerate(commands):
-            btn = self.create_command_button(name, cmd)
+            btn = self.create_proc_button(name, cmd)
             net_layout.addWidget(btn, i // 3, i % 3)
         net_group.setLayout(net_layout)
         layout.addWidget(net_group)
@@ -754,7 +5003,7 @@ class LetYouHandApp(QMainWindow):
             ("🌡️ 系统温度", "sensors 2>/dev/null || echo '请安装 lm-sensors'"),
         ]
         for i, (name, cmd) in enumerate(commands):
-            btn = self.create_command_button(name, cmd)
+            btn = self.create_proc_button(name, cmd)
             proc_layout.addWidget(btn, i // 3, i % 3)
         proc_group.setLayout(proc_layout)
         layout.addWidget(proc_group)
@@ -765,14 +5014,19 @@ class LetYouHandApp(QMainWindow):
         file_layout.setSpacing(10)
         commands = [
             ("📂 当前目录", "ls -lah"),
-            ("🔍 大文件查找", "du -h --max-depth=1 | sort -hr | head -10"),
+            ("🔍 大文件查找", 1),
             ("🗑️ 清理缓存", "sudo apt clean 2>/dev/null || sudo yum clean all 2>/dev/null || echo '请手动清理'"),
             ("👤 用户目录", "cd ~ && pwd && ls -lah"),
-            ("📊 目录大小", "du -sh * | sort -hr | head -10"),
-            ("🔎 最近文件", "find . -type f -mtime -1 2>/dev/null | head -20"),
+            ("📊 目录大小", 0),
+            ("🔎 最近文件", 2),
         ]
         for i, (name, cmd) in enumerate(commands):
-            btn = self.create_command_button(name, cmd)
+            if isinstance(cmd, int):
+                # 内置并行扫描，替代 du / find
+                btn = self.create_builtin_button(name, lambda checked=False, m=cmd: self.open_directory_scan(m),
+                                                 "内置扫描当前目录")
+            else:
+                btn = self.create_command_button(name, cmd)
             file_layout.addWidget(btn, i // 3, i % 3)
         file_group.setLayout(file_layout)
         layout.addWidget(file_group)
@@ -850,13 +5104,17 @@ class LetYouHandApp(QMainWindow):
         commands = [
             ("📂 打开Finder", "open ."),
             ("📋 当前目录", "ls -lah"),
-            ("🔍 大文件查找", "du -h -d 1 | sort -hr | head -10"),
+            ("🔍 大文件查找", 1),
             ("👤 用户目录", "open ~"),
             ("📥 下载目录", "open ~/Downloads"),
             ("🗑️ 清空废纸篓", "rm -rf ~/.Trash/*"),
         ]
         for i, (name, cmd) in enumerate(commands):
-            btn = self.create_command_button(name, cmd)
+            if isinstance(cmd, int):
+                btn = self.create_builtin_button(name, lambda checked=False, m=cmd: self.open_directory_scan(m),
+                                                 "内置扫描当前目录")
+            else:
+                btn = self.create_command_button(name, cmd)
             file_layout.addWidget(btn, i // 3, i % 3)
         file_group.setLayout(file_layout)
         layout.addWidget(file_group)
@@ -883,6 +5141,16 @@ class LetYouHandApp(QMainWindow):
         refresh_btn.clicked.connect(self.refresh_custom_commands)
         top_bar.addWidget(refresh_btn)
         
+        import_btn = QPushButton("📥 导入")
+        import_btn.setMaximumWidth(150)
+        import_btn.clicked.connect(self.import_command_library)
+        top_bar.addWidget(import_btn)
+        
+        export_btn = QPushButton("📤 导出")
+        export_btn.setMaximumWidth(150)
+        export_btn.clicked.connect(self.export_command_library)
+        top_bar.addWidget(export_btn)
+        
         top_bar.addStretch()
         layout.addLayout(top_bar)
         
@@ -902,19 +5170,48 @@ class LetYouHandApp(QMainWindow):
         
         return widget
     
+    def import_command_library(self):
+        """从 JSON Lines 文件导入命令库"""
+        dialog = CommandImportDialog(self, lambda: self.custom_commands)
+        dialog.import_ready.connect(self.apply_import)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+    
+    def apply_import(self, result):
+        """一次性应用导入结果，只保存和刷新一次"""
+        self.custom_commands = result['commands']
+        self.save_custom_commands(result['json'])
+        self.refresh_custom_commands()
+    
+    def export_command_library(self):
+        """把自定义命令导出为 JSON Lines 文件"""
+        if not self.custom_commands:
+            QMessageBox.warning(self, "提示", "还没有自定义命令")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "导出命令库", "commands.jsonl",
+                                              "JSON Lines (*.jsonl);;所有文件 (*)")
+        if path:
+            try:
+                export_command_library(path, self.custom_commands)
+            except OSError as e:
+                QMessageBox.warning(self, "错误", f"导出失败: {e}")
+                return
+            QMessageBox.information(self, "成功", f"已导出 {len(self.custom_commands)} 条命令")
+    
     def add_custom_command(self):
         """添加自定义命令"""
         dialog = AddCommandDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            cmd_data = dialog.get_command()
-            if cmd_data['name'] and cmd_data['command']:
+            cmd_data = CommandRecord.from_dict(dialog.get_command())
+            if cmd_data.name and cmd_data.command:
                 self.custom_commands.append(cmd_data)
                 self.save_custom_commands()
                 self.refresh_custom_commands()
-                QMessageBox.information(self, "成功", f"已添加命令: {cmd_data['name']}")
+                QMessageBox.information(self, "成功", f"已添加命令: {cmd_data.name}")
             else:
                 QMessageBox.warning(self, "错误", "命令名称和内容不能为空！")
     
+    @timed_slot
     def refresh_custom_commands(self):
         """刷新自定义命令列表"""
         # 清空现有按钮
@@ -934,46 +5231,34 @@ class LetYouHandApp(QMainWindow):
                 btn_layout = QHBoxLayout()
                 
                 # 执行按钮
-                has_vars = len(cmd_data.get('variables', [])) > 0
-                btn_text = f"⚡ {cmd_data['name']}"
+                has_vars = len(cmd_data.variables) > 0
+                btn_text = f"⚡ {cmd_data.name}"
                 if has_vars:
                     btn_text += " 📝"
                 
                 exec_btn = QPushButton(btn_text)
                 exec_btn.clicked.connect(lambda checked, idx=i: self.execute_custom_command(idx))
-                exec_btn.setToolTip(f"命令: {cmd_data['command']}")
+                exec_btn.setToolTip(f"命令: {cmd_data.command}")
                 exec_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+                exec_btn.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+                exec_btn.customContextMenuRequested.connect(
+                    lambda pos, idx=i, btn=exec_btn: self.show_command_menu(
+                        btn, pos, self.custom_commands[idx].name,
+                        fill_command(self.custom_commands[idx]),
+                        self.custom_commands[idx].limits))
                 btn_layout.addWidget(exec_btn, 3)
                 
                 # 编辑按钮
                 edit_btn = QPushButton("✏️")
                 edit_btn.setMaximumWidth(50)
-                edit_btn.setStyleSheet("""
-                    QPushButton {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                            stop:0 #10b981, stop:1 #059669);
-                    }
-                    QPushButton:hover {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                            stop:0 #059669, stop:1 #047857);
-                    }
-                """)
+                edit_btn.setProperty('role', 'edit')
                 edit_btn.clicked.connect(lambda checked, idx=i: self.edit_custom_command(idx))
                 btn_layout.addWidget(edit_btn, 1)
                 
                 # 删除按钮
                 del_btn = QPushButton("🗑️")
                 del_btn.setMaximumWidth(50)
-                del_btn.setStyleSheet("""
-                    QPushButton {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                            stop:0 #ef4444, stop:1 #dc2626);
-                    }
-                    QPushButton:hover {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                            stop:0 #dc2626, stop:1 #b91c1c);
-                    }
-                """)
+                del_btn.setProperty('role', 'delete')
                 del_btn.clicked.connect(lambda checked, idx=i: self.delete_custom_command(idx))
                 btn_layout.addWidget(del_btn, 1)
                 
@@ -985,75 +5270,77 @@ class LetYouHandApp(QMainWindow):
         """执行自定义命令"""
         if 0 <= index < len(self.custom_commands):
             cmd_data = self.custom_commands[index]
-            command = cmd_data['command']
-            variables = cmd_data.get('variables', [])
+            var_values = self.prompt_variables(cmd_data.variables)
+            if var_values is None:
+                return  # 用户取消
+            self.execute_command(fill_command(cmd_data, var_values), cmd_data.name,
+                                 cmd_data.limits)
+    
+    def prompt_variables(self, variables):
+        """依次弹出输入对话框询问变量的值，用户取消时返回 None"""
+        var_values = {}
+        for var in variables:
+            dialog = QDialog(self)
+            dialog.setWindowTitle(f"输入变量: {var.name}")
+            dialog.setModal(True)
+            dialog.setMinimumWidth(400)
             
-            # 如果有变量，弹出输入对话框
-            if variables:
-                var_values = {}
-                for var in variables:
-                    dialog = QDialog(self)
-                    dialog.setWindowTitle(f"输入变量: {var['name']}")
-                    dialog.setModal(True)
-                    dialog.setMinimumWidth(400)
-                    
-                    layout = QVBoxLayout(dialog)
-                    
-                    # 变量描述
-                    if var.get('description'):
-                        desc_label = QLabel(f"📝 {var['description']}")
-                        desc_label.setStyleSheet("font-size: 13px; color: #64748b; padding: 5px;")
-                        layout.addWidget(desc_label)
-                    
-                    # 输入框
-                    input_label = QLabel(f"请输入 {var['name']} 的值:")
-                    input_label.setStyleSheet("font-weight: bold;")
-                    layout.addWidget(input_label)
-                    
-                    var_input = QLineEdit()
-                    if var.get('default'):
-                        var_input.setText(var['default'])
-                        var_input.setPlaceholderText(f"默认: {var['default']}")
-                    var_input.setStyleSheet("padding: 8px; font-size: 13px;")
-                    layout.addWidget(var_input)
-                    
-                    buttons = QDialogButtonBox(
-                        QDialogButtonBox.StandardButton.Ok | 
-                        QDialogButtonBox.StandardButton.Cancel
-                    )
-                    buttons.accepted.connect(dialog.accept)
-                    buttons.rejected.connect(dialog.reject)
-                    layout.addWidget(buttons)
-                    
-                    if dialog.exec() == QDialog.DialogCode.Accepted:
-                        var_values[var['name']] = var_input.text() or var.get('default', '')
-                    else:
-                        return  # 用户取消
-                
-                # 替换命令中的变量
-                for var_name, var_value in var_values.items():
-                    command = command.replace(f"{{{var_name}}}", var_value)
+            layout = QVBoxLayout(dialog)
+            
+            # 变量描述
+            if var.description:
+                desc_label = QLabel(f"📝 {var.description}")
+                desc_label.setStyleSheet("font-size: 13px; color: #64748b; padding: 5px;")
+                layout.addWidget(desc_label)
+            
+            # 输入框
+            input_label = QLabel(f"请输入 {var.name} 的值:")
+            input_label.setStyleSheet("font-weight: bold;")
+            layout.addWidget(input_label)
+            
+            var_input = QLineEdit()
+            if var.default:
+                var_input.setText(var.default)
+                var_input.setPlaceholderText(f"默认: {var.default}")
+            var_input.setStyleSheet("padding: 8px; font-size: 13px;")
+            layout.addWidget(var_input)
+            
+            buttons = QDialogButtonBox(
+                QDialogButtonBox.StandardButton.Ok | 
+                QDialogButtonBox.StandardButton.Cancel
+            )
+            buttons.accepted.connect(dialog.accept)
+            buttons.rejected.connect(dialog.reject)
+            layout.addWidget(buttons)
             
-            self.execute_command(command, cmd_data['name'])
+            if dialog.exec() != QDialog.DialogCode.Accepted:
+                return None
+            var_values[var.name] = var_input.text() or var.default
+        return var_values
     
     def edit_custom_command(self, index):
         """编辑自定义命令"""
         if 0 <= index < len(self.custom_commands):
-            dialog = AddCommandDialog(self, edit_mode=True, command_data=self.custom_commands[index])
+            old_data = self.custom_commands[index]
+            dialog = AddCommandDialog(self, edit_mode=True, command_data=old_data.to_dict())
             if dialog.exec() == QDialog.DialogCode.Accepted:
-                cmd_data = dialog.get_command()
-                if cmd_data['name'] and cmd_data['command']:
+                # 对话框中没有的字段（说明、未知字段）保持不变
+                cmd_data = old_data.to_dict()
+                cmd_data.pop('limits', None)
+                cmd_data.update(dialog.get_command())
+                cmd_data = CommandRecord.from_dict(cmd_data)
+                if cmd_data.name and cmd_data.command:
                     self.custom_commands[index] = cmd_data
                     self.save_custom_commands()
                     self.refresh_custom_commands()
-                    QMessageBox.information(self, "成功", f"已更新命令: {cmd_data['name']}")
+                    QMessageBox.information(self, "成功", f"已更新命令: {cmd_data.name}")
                 else:
                     QMessageBox.warning(self, "错误", "命令名称和内容不能为空！")
     
     def delete_custom_command(self, index):
         """删除自定义命令"""
         if 0 <= index < len(self.custom_commands):
-            cmd_name = self.custom_commands[index]['name']
+            cmd_name = self.custom_commands[index].name
             reply = QMessageBox.question(
                 self, 
                 "确认删除", 
@@ -1066,48 +5353,875 @@ class LetYouHandApp(QMainWindow):
                 self.refresh_custom_commands()
     
     def create_command_button(self, name, command):
+        # 标签页按顺序创建，此时 tabs.count() 就是按钮所在标签页的序号
+        self.preset_commands.setdefault(name, []).append((self.tabs.count(), command))
         btn = QPushButton(name)
         btn.clicked.connect(lambda: self.execute_command(command, name))
         btn.setToolTip(f"执行命令: {command}")
         btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        btn.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        btn.customContextMenuRequested.connect(
+            lambda pos: self.show_command_menu(btn, pos, name, command))
         return btn
     
-    def execute_command(self, command, name):
+    def create_builtin_button(self, name, handler, tooltip):
+        """内置功能按钮（不经过 shell 执行）"""
+        self.builtin_commands.setdefault(name, []).append((self.tabs.count(), handler))
+        btn = QPushButton(name)
+        btn.clicked.connect(handler)
+        btn.setToolTip(tooltip)
+        btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        return btn
+    
+    def open_directory_scan(self, mode):
+        """打开内置目录扫描"""
+        dialog = DirectoryScanDialog(self, '.', mode)
+        dialog.report_ready.connect(self.show_builtin_report)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+    
+    def create_proc_button(self, name, command):
+        """有 /proc 时，进程、端口和连接类 Linux 预设改用内置查看器"""
+        viewers = {
+            "🔗 网络连接": (SocketInspector, lambda: self.open_socket_inspector(False)),
+            "🔌 端口占用": (SocketInspector, lambda: self.open_socket_inspector(True)),
+            "📋 进程列表": (ProcessSampler, lambda: self.open_process_viewer()),
+            "📈 系统负载": (ProcessSampler, lambda: self.open_process_viewer()),
+        }
+        viewer = viewers.get(name)
+        if viewer is None or not viewer[0].available():
+            return self.create_command_button(name, command)
+        return self.create_builtin_button(name, viewer[1], "内置查看器（读取 /proc）")
+    
+    def open_socket_inspector(self, listening_only):
+        """打开内置网络连接查看器"""
+        dialog = SocketInspectorDialog(self, listening_only)
+        dialog.report_ready.connect(self.show_builtin_report)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+    
+    def open_process_viewer(self):
+        """打开内置进程列表"""
+        dialog = ProcessViewerDialog(self)
+        dialog.report_ready.connect(self.show_builtin_report)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+    
+    def open_benchmark(self, name, command, limits=None):
+        """打开命令性能测试"""
+        dialog = BenchmarkDialog(self, name, command, limits)
+        dialog.report_ready.connect(self.show_builtin_report)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+    
+    def show_builtin_report(self, name, report):
+        """把内置功能的结果写入输出区域"""
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.append_output(f"\n{'='*60}")
+        self.append_output(f"🔧 执行命令: {name}")
+        self.append_output(f"⏰ 时间: {current_time}")
+        self.append_output(f"{'='*60}\n")
+        key = f"builtin:{name}"
+        previous = self.previous_outputs.get(key) if self.diff_btn.isChecked() else None
+        if previous is None:
+            self.update_output(report)
+        self.record_output(key, report, previous)
+    
+    MAX_DIFF_HISTORY = 32
+    MAX_DIFF_BYTES = 16 * 1024 * 1024
+    
+    def record_output(self, key, text, previous=None):
+        """保存本次结果供下次对比；previous 不为空时在后台比较并显示差异"""
+        text = AnsiParser.ESCAPE_RE.sub('', text) if '\x1b' in text else text
+        if previous is not None:
+            worker = OutputDiffWorker(previous[1], text, previous[0])
+            worker.finished_signal.connect(self.update_output)
+            self.diff_workers.add(worker)
+            worker.finished.connect(lambda worker=worker: self.diff_workers.discard(worker))
+            worker.start()
+        data = text.encode('utf-8', 'surrogatepass')
+        if len(data) > self.MAX_DIFF_BYTES:
+            self.previous_outputs.pop(key, None)
+            return
+        self.previous_outputs[key] = (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), data)
+        self.previous_outputs.move_to_end(key)
+        while len(self.previous_outputs) > self.MAX_DIFF_HISTORY:
+            self.previous_outputs.popitem(last=False)
+    
+    def show_command_menu(self, btn, pos, name, command, limits=None):
+        """命令按钮右键菜单"""
+        menu = QMenu(btn)
+        schedule_action = menu.addAction("⏰ 定时执行...")
+        benchmark_action = menu.addAction("⏱️ 性能测试...")
+        action = menu.exec(btn.mapToGlobal(pos))
+        if action == schedule_action:
+            self.add_scheduled_job({'name': name, 'command': command, 'limits': limits})
+        elif action == benchmark_action:
+            self.open_benchmark(name, command, limits)
+    
+    def create_packs_tab(self):
+        """创建命令包标签页：第一次切换到这里时才扫描插件目录"""
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setSpacing(15)
+        
+        top_bar = QHBoxLayout()
+        rescan_btn = QPushButton("🔄 重新扫描")
+        rescan_btn.setMaximumWidth(150)
+        rescan_btn.clicked.connect(lambda: self.refresh_packs(force=True))
+        top_bar.addWidget(rescan_btn)
+        self.packs_status = QLabel(f"插件目录: {self.command_packs.pack_dir}")
+        self.packs_status.setStyleSheet("color: #64748b; padding: 5px; font-size: 12px;")
+        top_bar.addWidget(self.packs_status, 1)
+        layout.addLayout(top_bar)
+        
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.pack_list = QListWidget()
+        self.pack_list.currentItemChanged.connect(self.show_pack)
+        splitter.addWidget(self.pack_list)
+        
+        right = QWidget()
+        right_layout = QVBoxLayout(right)
+        right_layout.setContentsMargins(0, 0, 0, 0)
+        self.pack_description = QLabel()
+        self.pack_description.setWordWrap(True)
+        self.pack_description.setStyleSheet("color: #64748b; padding: 5px; font-size: 12px;")
+        right_layout.addWidget(self.pack_description)
+        self.pack_filter = QLineEdit()
+        self.pack_filter.setPlaceholderText("🔍 筛选命令...")
+        self.pack_filter.textChanged.connect(self.filter_pack_commands)
+        right_layout.addWidget(self.pack_filter)
+        self.pack_command_list = QListWidget()
+        self.pack_command_list.setUniformItemSizes(True)
+        self.pack_command_list.itemDoubleClicked.connect(self.run_pack_command)
+        self.pack_command_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.pack_command_list.customContextMenuRequested.connect(self.show_pack_command_menu)
+        right_layout.addWidget(self.pack_command_list)
+        splitter.addWidget(right)
+        splitter.setSizes([250, 550])
+        layout.addWidget(splitter)
+        
+        return widget
+    
+    def ensure_packs_scanned(self, index):
+        # --run 查找命令时可能已经扫描过，但列表还没有填充
+        if self.tabs.widget(index) is self.packs_page and not self.packs_listed:
+            self.refresh_packs()
+    
+    def refresh_packs(self, force=False):
+        """在后台线程中扫描命令包，完成后列出（只用到索引中的元数据）"""
+        if self.pack_scanner is not None:
+            return
+        if self.command_packs.packs is not None and not force:
+            self.show_packs()
+            return
+        self.packs_status.setText(f"⏳ 正在扫描命令包 · 插件目录: {self.command_packs.pack_dir}")
+        self.pack_scanner = CommandPackScanner(self.command_packs)
+        self.pack_scanner.finished_signal.connect(self.packs_scanned)
+        self.pack_scanner.start()
+    
+    def packs_scanned(self, result):
+        self.pack_scanner.wait()
+        self.pack_scanner = None
+        self.command_packs.apply_scan(result)
+        self.show_packs()
+    
+    def show_packs(self):
+        self.packs_listed = True
+        packs = self.command_packs.packs
+        self.pack_list.clear()
+        self.pack_command_list.clear()
+        self.pack_description.clear()
+        for key, info in packs.items():
+            item = QListWidgetItem()
+            item.setData(Qt.ItemDataRole.UserRole, key)
+            self.pack_list.addItem(item)
+            self.update_pack_item(item, info)
+        status = f"📦 {len(packs)} 个命令包 · 插件目录: {self.command_packs.pack_dir}"
+        errors = self.command_packs.errors
+        if errors:
+            status += f" · ⚠️ {len(errors)} 个包无法读取"
+        self.packs_status.setText(status)
+        self.packs_status.setToolTip("\n".join(f"{key}: {error}" for key, error in errors.items()))
+    
+    def update_pack_item(self, item, info):
+        text = f"📦 {info['name']}"
+        if info.get('count') is not None:
+            text += f" ({info['count']})"
+        tooltip = [info['description']] if info['description'] else []
+        if info['version']:
+            tooltip.append(f"版本: {info['version']}")
+        if info['platforms'] and self.current_os not in info['platforms']:
+            text += " · 不适用于当前系统"
+            item.setForeground(QColor('#94a3b8'))
+        if info['platforms']:
+            tooltip.append(f"系统: {', '.join(info['platforms'])}")
+        tooltip.append(f"来源: {item.data(Qt.ItemDataRole.UserRole)}")
+        item.setText(text)
+        item.setToolTip("\n".join(tooltip))
+    
+    def show_pack(self, item, previous=None):
+        """选中命令包时才加载其中的命令"""
+        self.pack_command_list.clear()
+        if item is None:
+            self.pack_description.clear()
+            return
+        key = item.data(Qt.ItemDataRole.UserRole)
+        info = self.command_packs.packs[key]
+        try:
+            commands = self.command_packs.commands(key)
+        except Exception as e:
+            self.pack_description.setText(f"❌ 加载失败: {e}")
+            return
+        self.update_pack_item(item, info)
+        self.pack_description.setText(info['description'] or info['name'])
+        for row, cmd_data in enumerate(commands):
+            cmd_item = QListWidgetItem(cmd_data.name)
+            cmd_item.setData(Qt.ItemDataRole.UserRole, row)
+            cmd_item.setToolTip(cmd_data.description or cmd_data.command)
+            self.pack_command_list.addItem(cmd_item)
+        self.filter_pack_commands(self.pack_filter.text())
+    
+    def filter_pack_commands(self, text):
+        text = text.strip().lower()
+        for row in range(self.pack_command_list.count()):
+            item = self.pack_command_list.item(row)
+            item.setHidden(bool(text) and text not in item.text().lower()
+                           and text not in item.toolTip().lower())
+    
+    def pack_command(self, item):
+        key = self.pack_list.currentItem().data(Qt.ItemDataRole.UserRole)
+        return self.command_packs.commands(key)[item.data(Qt.ItemDataRole.UserRole)]
+    
+    def run_pack_command(self, item):
+        """执行命令包中的命令"""
+        cmd_data = self.pack_command(item)
+        var_values = self.prompt_variables(cmd_data.variables)
+        if var_values is not None:
+            self.execute_command(fill_command(cmd_data, var_values), cmd_data.name,
+                                 cmd_data.limits)
+    
+    def show_pack_command_menu(self, pos):
+        item = self.pack_command_list.itemAt(pos)
+        if item is not None:
+            cmd_data = self.pack_command(item)
+            self.show_command_menu(self.pack_command_list.viewport(), pos,
+                                   cmd_data.name, fill_command(cmd_data), cmd_data.limits)
+    
+    def create_schedule_tab(self):
+        """创建定时任务标签页"""
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setSpacing(15)
+        
+        top_bar = QHBoxLayout()
+        
+        add_btn = QPushButton("➕ 添加任务")
+        add_btn.setMaximumWidth(150)
+        add_btn.clicked.connect(lambda: self.add_scheduled_job())
+        top_bar.addWidget(add_btn)
+        
+        run_btn = QPushButton("▶️ 立即执行")
+        run_btn.setMaximumWidth(150)
+        run_btn.clicked.connect(self.run_scheduled_job_now)
+        top_bar.addWidget(run_btn)
+        
+        toggle_btn = QPushButton("⏸️ 启用/停用")
+        toggle_btn.setMaximumWidth(150)
+        toggle_btn.clicked.connect(self.toggle_scheduled_job)
+        top_bar.addWidget(toggle_btn)
+        
+        del_btn = QPushButton("🗑️ 删除任务")
+        del_btn.setMaximumWidth(150)
+        del_btn.clicked.connect(self.delete_scheduled_job)
+        top_bar.addWidget(del_btn)
+        
+        top_bar.addStretch()
+        
+        top_bar.addWidget(QLabel("最大并发:"))
+        concurrent_input = QSpinBox()
+        concurrent_input.setRange(1, 64)
+        concurrent_input.setValue(self.scheduler.max_concurrent)
+        concurrent_input.valueChanged.connect(self.set_schedule_concurrency)
+        top_bar.addWidget(concurrent_input)
+        
+        layout.addLayout(top_bar)
+        
+        self.schedule_list = QListWidget()
+        layout.addWidget(self.schedule_list)
+        
+        self.scheduler.jobs_changed.connect(self.refresh_scheduled_jobs)
+        self.scheduler.job_started.connect(lambda job: self.refresh_scheduled_jobs())
+        self.refresh_scheduled_jobs()
+        
+        return widget
+    
+    def refresh_scheduled_jobs(self):
+        """刷新定时任务列表"""
+        current_row = self.schedule_list.currentRow()
+        self.schedule_list.clear()
+        for job in self.scheduler.jobs:
+            if job.executor is not None:
+                status = "🔄 运行中"
+            elif not job.enabled:
+                status = "⏸️ 已停用"
+            else:
+                status = "⏳ 等待中"
+            text = f"{status}  {job.name}  |  {job.describe()}"
+            if job.enabled and job.next_run:
+                text += f"  |  下次: {datetime.fromtimestamp(job.next_run).strftime('%m-%d %H:%M:%S')}"
+            if job.last_run:
+                result = "✅" if job.last_success else ("⚠️" if job.last_success is False else "…")
+                text += f"  |  上次: {datetime.fromtimestamp(job.last_run).strftime('%H:%M:%S')} {result}"
+            if job.missed or job.skipped:
+                text += f"  |  合并 {job.missed} 次 / 跳过 {job.skipped} 次"
+            item = QListWidgetItem(text)
+            item.setToolTip(f"命令: {job.command}")
+            self.schedule_list.addItem(item)
+        if 0 <= current_row < self.schedule_list.count():
+            self.schedule_list.setCurrentRow(current_row)
+    
+    def selected_scheduled_job(self):
+        row = self.schedule_list.currentRow()
+        if 0 <= row < len(self.scheduler.jobs):
+            return self.scheduler.jobs[row]
+        QMessageBox.warning(self, "提示", "请先选择一个定时任务")
+        return None
+    
+    def add_scheduled_job(self, job_data=None):
+        """添加定时任务"""
+        dialog = ScheduleJobDialog(self, job_data)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.scheduler.add_job(ScheduledJob(dialog.get_job_data()))
+            self.save_scheduled_jobs()
+            self.tabs.setCurrentWidget(self.schedule_tab)
+    
+    def run_scheduled_job_now(self):
+        job = self.selected_scheduled_job()
+        if job:
+            self.scheduler.run_now(job)
+    
+    def toggle_scheduled_job(self):
+        job = self.selected_scheduled_job()
+        if job:
+            self.scheduler.set_enabled(job, not job.enabled)
+            self.save_scheduled_jobs()
+    
+    def delete_scheduled_job(self):
+        job = self.selected_scheduled_job()
+        if job:
+            reply = QMessageBox.question(
+                self,
+                "确认删除",
+                f"确定要删除定时任务 '{job.name}' 吗？",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                self.scheduler.remove_job(job)
+                self.save_scheduled_jobs()
+    
+    def set_schedule_concurrency(self, value):
+        self.scheduler.set_max_concurrent(value)
+        self.save_scheduled_jobs()
+    
+    def scheduled_job_finished(self, job, success):
+        """定时任务完成后在输出区域提示"""
+        finished_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        result = "完成" if success else "失败"
+        self.append_output(f"⏰ 定时任务 [{job.name}] {result} ({finished_time})")
+        if job.output_file:
+            self.append_output(f"💾 输出已保存到: {job.output_file}")
+        else:
+            for line in job.output:
+                self.append_output(line)
+            self.output_renderer.reset()
+        scrollbar = self.output_text.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+    
+    def execute_command(self, command, name, limits=None):
         from datetime import datetime
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        limits = ResourceLimits(limits)
+        
+        self.append_output(f"\n{'='*60}")
+        self.append_output(f"🔧 执行命令: {name}")
+        self.append_output(f"💻 命令内容: {command}")
+        self.append_output(f"⏰ 时间: {current_time}")
+        if limits:
+            self.append_output(f"🚧 资源限制: {limits.describe()}")
+            unsupported = limits.unsupported()
+            if unsupported:
+                self.append_output(f"⚠️ 当前系统不支持: {', '.join(ResourceLimits.FIELDS[key] for key in unsupported)}")
+        self.append_output(f"{'='*60}\n")
         
-        self.output_text.append(f"\n{'='*60}")
-        self.output_text.append(f"🔧 执行命令: {name}")
-        self.output_text.append(f"💻 命令内容: {command}")
-        self.output_text.append(f"⏰ 时间: {current_time}")
-        self.output_text.append(f"{'='*60}\n")
+        # 表格视图只显示最近一条可解析命令的结果
+        table_parser = create_table_parser(command)
+        if table_parser:
+            self.table_parser = table_parser
+            self.table_model.reset()
+        previous = self.previous_outputs.get(command) if self.diff_btn.isChecked() else None
+        if previous:
+            self.append_output(f"🔀 对比模式：执行完成后显示与上次结果（{previous[0]}）的差异\n")
+        # 同时运行的命令各自使用一个流控，互不清空对方的完整输出
+        output_flow = OutputFlowController()
+        output_flow.render_ready.connect(self.update_output)
+        output_flow.start_run(display=previous is None)
+        self.output_flow = output_flow
         
-        self.executor = CommandExecutor(command)
-        self.executor.output_signal.connect(self.update_output)
-        self.executor.finished_signal.connect(self.command_finished)
+        self.executor = create_executor(command, limits)
+        self.executor.output_flow = output_flow
+        self.executor.table_parser = table_parser
+        self.executor.diff_key = command
+        self.executor.diff_base = previous
+        self.executor.enable_backpressure()
+        self.executor.output_signal.connect(
+            lambda text, executor=self.executor: self.receive_output(executor, text))
+        self.executor.finished_signal.connect(
+            lambda success, executor=self.executor: self.command_finished(executor, success))
+        # 保留线程引用直到线程真正结束
+        self.running_executors.add(self.executor)
+        self.executor.finished.connect(
+            lambda executor=self.executor: self.running_executors.discard(executor))
         self.executor.start()
+        return self.executor
+    
+    @timed_slot
+    def receive_output(self, executor, text):
+        """接收执行器输出：完整输出交给表格解析，显示交给流控"""
+        if executor.table_parser is not None and executor.table_parser is self.table_parser:
+            self.parse_table_output(AnsiParser.ESCAPE_RE.sub('', text) if '\x1b' in text else text)
+        executor.output_flow.feed(text)
+        executor.output_consumed()
+    
+    def save_full_output(self):
+        """保存上一次执行的完整输出"""
+        if not self.output_flow.captured:
+            QMessageBox.warning(self, "提示", "还没有可保存的输出")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "保存完整输出", "output.txt",
+                                              "文本文件 (*.txt *.log);;所有文件 (*)")
+        if path:
+            try:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(self.output_flow.full_output())
+            except OSError as e:
+                QMessageBox.warning(self, "错误", f"保存失败: {e}")
+    
+    def append_output(self, text):
+        """向输出区域追加文本，同时更新搜索索引，返回去掉转义序列后的文本"""
+        plain = self.output_renderer.append(text)
+        self.output_buffer.append(plain)
+        self.output_search.notify_appended()
+        return plain
+    
+    def clear_output(self):
+        self.output_renderer.clear()
+        self.output_buffer.clear()
+        self.output_search.reset()
+        self.match_index = -1
+    
+    def focus_search(self):
+        self.search_input.setFocus()
+        self.search_input.selectAll()
+    
+    def apply_search(self):
+        """根据搜索栏重新搜索"""
+        self.search_timer.stop()
+        self.match_index = -1
+        try:
+            self.output_search.set_pattern(self.search_input.text(),
+                                           self.search_regex_check.isChecked(),
+                                           self.search_case_check.isChecked())
+        except re.error:
+            self.output_search.set_pattern('')
+            self.search_status.setText("⚠️ 正则无效")
+    
+    def search_progress(self):
+        """搜索结果更新"""
+        self.filter_model.sync()
+        count = len(self.output_search.lines)
+        if self.output_search.regex is None:
+            self.search_status.setText("")
+        elif self.match_index >= 0:
+            self.search_status.setText(f"{self.match_index + 1}/{count}")
+        else:
+            suffix = "" if self.output_search.is_complete() else "…"
+            self.search_status.setText(f"{count} 处匹配{suffix}")
+        self.update_search_highlights()
+    
+    def find_match(self, step):
+        """跳转到下一个/上一个匹配"""
+        if self.search_timer.isActive():
+            self.apply_search()
+        count = len(self.output_search.lines)
+        if not count:
+            return
+        if self.match_index < 0:
+            # 从当前可见区域开始查找
+            line = self.output_text.cursorForPosition(QPoint(0, 0)).blockNumber()
+            index = bisect.bisect_left(self.output_search.lines, line)
+            self.match_index = index if step > 0 else index - 1
+        else:
+            self.match_index += step
+        self.goto_match(self.match_index % count)
     
+    def goto_match(self, index):
+        self.match_index = index
+        if self.filter_check.isChecked():
+            self.filter_check.setChecked(False)
+        search = self.output_search
+        block = self.output_text.document().findBlockByNumber(search.lines[index])
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + search.cols[index])
+        cursor.setPosition(block.position() + search.cols[index] + search.lengths[index],
+                           QTextCursor.MoveMode.KeepAnchor)
+        self.output_text.setTextCursor(cursor)
+        self.output_text.ensureCursorVisible()
+        self.search_status.setText(f"{index + 1}/{len(search.lines)}")
+        self.update_search_highlights()
+    
+    def update_search_highlights(self):
+        """只高亮当前可见区域内的匹配"""
+        search = self.output_search
+        if search.regex is None or not search.lines:
+            if self.output_text.extraSelections():
+                self.output_text.setExtraSelections([])
+            return
+        viewport = self.output_text.viewport()
+        first = self.output_text.cursorForPosition(QPoint(0, 0)).blockNumber()
+        last = self.output_text.cursorForPosition(QPoint(0, viewport.height())).blockNumber()
+        start = bisect.bisect_left(search.lines, first)
+        end = min(bisect.bisect_right(search.lines, last), start + 500)
+        
+        match_format = QTextCharFormat()
+        match_format.setBackground(QColor('#854d0e'))
+        match_format.setForeground(QColor('#ffffff'))
+        current_format = QTextCharFormat(match_format)
+        current_format.setBackground(QColor('#f97316'))
+        
+        document = self.output_text.document()
+        selections = []
+        block = None
+        for i in range(start, end):
+            if block is None or block.blockNumber() != search.lines[i]:
+                block = document.findBlockByNumber(search.lines[i])
+            cursor = QTextCursor(block)
+            cursor.setPosition(block.position() + search.cols[i])
+            cursor.setPosition(block.position() + search.cols[i] + search.lengths[i],
+                               QTextCursor.MoveMode.KeepAnchor)
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = cursor
+            selection.format = current_format if i == self.match_index else match_format
+            selections.append(selection)
+        self.output_text.setExtraSelections(selections)
+    
+    def toggle_filter_view(self, checked):
+        self.show_output_page()
+    
+    def show_output_page(self):
+        """在完整输出、匹配行过滤视图和表格视图之间切换"""
+        if self.table_btn.isChecked():
+            self.output_stack.setCurrentIndex(2)
+        elif self.filter_check.isChecked():
+            self.output_stack.setCurrentIndex(1)
+        else:
+            self.output_stack.setCurrentIndex(0)
+    
+    def parse_table_output(self, text):
+        """把新输出逐行交给表格解析器"""
+        parser = self.table_parser
+        rows = []
+        for line in text.split('\n'):
+            values = parser.feed(line)
+            if parser.headers and parser.headers != self.table_model.headers:
+                self.table_model.add_rows(rows)
+                rows = []
+                self.table_model.set_headers(parser.headers)
+            if values is not None:
+                rows.append(values)
+        self.table_model.add_rows(rows)
+    
+    def filter_line_activated(self, index):
+        """双击过滤视图中的行，回到完整输出并定位"""
+        line = self.filter_model.line_number(index.row())
+        match = bisect.bisect_left(self.output_search.lines, line)
+        if match < len(self.output_search.lines):
+            self.goto_match(match)
+    
+    @timed_slot
     def update_output(self, text):
-        self.output_text.append(text)
+        self.append_output(text)
         # 自动滚动到底部
         scrollbar = self.output_text.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
     
-    def command_finished(self, success):
+    @timed_slot
+    def command_finished(self, executor, success):
+        executor.output_flow.finish()
+        self.output_renderer.reset()
+        # 对比基准和记录的结果都取自结束的这次执行，不受同时运行的其它命令影响
+        if not executor.killed:
+            self.record_output(executor.diff_key, executor.output_flow.full_output(), executor.diff_base)
+        if executor.table_parser is not None and executor.table_parser is self.table_parser:
+            self.table_parser = None
+            self.table_model.apply_sort()
+            self.table_view.resizeColumnsToContents()
         if success:
-            self.output_text.append("\n✅ 命令执行完成\n")
+            self.append_output("\n✅ 命令执行完成\n")
         else:
-            self.output_text.append("\n⚠️ 命令执行可能存在问题\n")
+            self.append_output("\n⚠️ 命令执行可能存在问题\n")
         
         # 自动滚动到底部
         scrollbar = self.output_text.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
 
 
+def control_server_name():
+    """单实例控制通道的名称：POSIX 下是 Unix 套接字路径，Windows 下是命名管道名"""
+    if platform.system() == "Windows":
+        return f"QuickCMD-{os.environ.get('USERNAME', 'user')}"
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or private_temp_dir()
+    return os.path.join(runtime_dir, f"quickcmd-{os.getuid()}.sock")
+
+
+def private_temp_dir():
+    """临时目录下当前用户私有（0700）的 quickcmd-<uid> 目录
+    
+    /tmp 对所有用户可写，套接字不能直接放在那里：别的用户可以抢先创建同名文件冒充实例。
+    目录已存在但不属于当前用户、是符号链接或其他用户可以访问时抛出 OSError。
+    """
+    path = os.path.join(tempfile.gettempdir(), f"quickcmd-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} 不是当前用户私有的目录")
+    return path
+
+
+def send_control_request(request):
+    """连接正在运行的实例并发送一条请求，逐条返回响应事件
+    
+    只使用标准库，脚本也可以照此实现；没有正在运行的实例时抛出 OSError。
+    """
+    name = control_server_name()
+    if platform.system() == "Windows":
+        stream = open(rf"\\.\pipe\{name}", 'r+b', buffering=0)
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(name)
+        except OSError:
+            sock.close()
+            raise
+        stream = sock.makefile('rwb', buffering=0)
+        sock.close()
+    with stream:
+        stream.write(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+        buffer = b''
+        while True:
+            data = stream.read(65536)
+            if not data:
+                break
+            buffer += data
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class ControlServer(QObject):
+    """单实例控制通道（QLocalServer）
+    
+    协议为 UTF-8 的 JSON Lines，每个连接发送一条请求:
+        {"action": "show"}                                  显示并激活窗口
+        {"action": "list"}                                  列出可执行的命令名称
+        {"action": "run", "name": "...", "variables": {}}   按名称执行预置或自定义命令
+        {"action": "run", "command": "..."}                 执行任意命令
+    run 请求加上 "stream": true 时，依次返回 output 事件和带 exit_code 的 finished 事件，
+    否则返回 started 事件后关闭连接；出错时返回 error 事件。
+    """
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.accept_connections)
+    
+    def listen(self):
+        """开始监听；通道已被正在运行的实例占用或无法安全创建时返回 False"""
+        try:
+            name = control_server_name()
+        except OSError:
+            return False
+        if not self.server.listen(name):
+            if self.server.serverError() != QAbstractSocket.SocketError.AddressInUseError or self.instance_alive(name):
+                return False
+            # 连接不上，说明是上次异常退出残留的套接字文件
+            QLocalServer.removeServer(name)
+            self.server.listen(name)
+        return self.server.isListening()
+    
+    @staticmethod
+    def instance_alive(name):
+        """尝试连接通道，判断是否有实例在监听（实例忙碌时连接同样会成功）"""
+        probe = QLocalSocket()
+        probe.connectToServer(name)
+        alive = probe.waitForConnected(1000)
+        probe.abort()
+        return alive
+    
+    def accept_connections(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            connection.readyRead.connect(lambda connection=connection: self.read_request(connection))
+            connection.disconnected.connect(connection.deleteLater)
+    
+    def send(self, connection, event):
+        if connection.state() == QLocalSocket.LocalSocketState.ConnectedState:
+            connection.write(json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n')
+    
+    def close(self, connection, event=None):
+        if event is not None:
+            self.send(connection, event)
+        connection.flush()
+        connection.disconnectFromServer()
+    
+    def read_request(self, connection):
+        if not connection.canReadLine():
+            return
+        connection.readyRead.disconnect()
+        try:
+            request = json.loads(bytes(connection.readLine()).decode('utf-8'))
+            action = request.get('action')
+        except (ValueError, AttributeError):
+            self.close(connection, {'event': 'error', 'message': '请求不是合法的 JSON 对象'})
+            return
+        
+        if action == 'show':
+            self.window.bring_to_front()
+            self.close(connection, {'event': 'ok'})
+        elif action == 'list':
+            self.close(connection, {'event': 'commands', **self.window.command_names()})
+        elif action == 'run':
+            self.run_request(connection, request)
+        else:
+            self.close(connection, {'event': 'error', 'message': f"未知的 action: {action}"})
+    
+    def run_request(self, connection, request):
+        if request.get('command'):
+            name, command, limits = request.get('name') or request['command'], request['command'], None
+        else:
+            resolved = self.window.resolve_named_command(request.get('name', ''), request.get('variables'))
+            if resolved is None:
+                self.close(connection, {'event': 'error', 'message': f"找不到命令: {request.get('name', '')}"})
+                return
+            name, command, limits = resolved
+        if callable(command):
+            if request.get('stream'):
+                self.close(connection, {'event': 'error', 'message': f"{name} 是内置查看器，只能在窗口中打开"})
+                return
+            self.window.bring_to_front()
+            command()
+            self.close(connection, {'event': 'started', 'name': name, 'command': ''})
+            return
+        if request.get('show'):
+            self.window.bring_to_front()
+        executor = self.window.execute_command(command, name, limits)
+        if not request.get('stream'):
+            self.close(connection, {'event': 'started', 'name': name, 'command': command})
+            return
+        
+        self.send(connection, {'event': 'started', 'name': name, 'command': command})
+        alive = [True]
+        connection.disconnected.connect(lambda: alive.__setitem__(0, False))
+        
+        def forward_output(text):
+            if alive[0]:
+                self.send(connection, {'event': 'output', 'text': text})
+        
+        def forward_finished(success):
+            if alive[0]:
+                stats = executor.stats or {}
+                self.close(connection, {'event': 'finished', 'success': success,
+                                        'exit_code': stats.get('returncode'), 'killed': executor.killed})
+        
+        executor.output_signal.connect(forward_output)
+        executor.finished_signal.connect(forward_finished)
+
+
+def forward_to_running_instance(args):
+    """把命令行请求转发给已运行的实例，返回退出码；没有正在运行的实例时返回 None"""
+    if args.run:
+        variables = dict(item.split('=', 1) for item in args.var)
+        request = {'action': 'run', 'name': args.run, 'variables': variables,
+                   'stream': args.wait, 'show': not args.wait}
+    else:
+        request = {'action': 'show'}
+    try:
+        for event in send_control_request(request):
+            kind = event.get('event')
+            if kind == 'error':
+                print(event.get('message', ''), file=sys.stderr)
+                return 1
+            if kind == 'output':
+                print(event['text'], flush=True)
+            elif kind == 'finished':
+                code = event.get('exit_code')
+                return code if code is not None else (0 if event.get('success') else 1)
+    except OSError:
+        return None
+    except ValueError:
+        # 通道另一端不是 QuickCMD
+        return None
+    return 0
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="一键命令 QuickCmd")
+    parser.add_argument('--run', metavar='NAME', help="执行指定名称的预置命令或自定义命令")
+    parser.add_argument('--var', metavar='KEY=VALUE', action='append', default=[],
+                        help="自定义命令的变量值，可重复")
+    parser.add_argument('--wait', action='store_true',
+                        help="等待命令结束，把输出打印到终端并以命令的退出码退出")
+    parser.add_argument('--new-instance', action='store_true', help="不转发给已运行的实例")
+    parser.add_argument('--executor', choices=sorted(EXECUTOR_BACKENDS), default=executor_backend,
+                        help="命令执行方式：process 在主线程事件循环中读取所有命令的输出，"
+                             "thread（默认）为每条命令创建一个线程")
+    args, _ = parser.parse_known_args(argv)
+    for item in args.var:
+        if '=' not in item:
+            parser.error(f"--var 需要 KEY=VALUE 格式: {item}")
+    return args
+
+
 def main():
+    if sys.argv[1:2] == [LIMITS_LAUNCHER_FLAG]:
+        run_limits_launcher()
+    args = parse_arguments(sys.argv[1:])
+    if not args.new_instance:
+        # 已有实例在运行时，转发请求后直接退出，不再创建窗口
+        code = forward_to_running_instance(args)
+        if code is not None:
+            sys.exit(code)
+    
+    global executor_backend
+    executor_backend = args.executor
     app = QApplication(sys.argv)
     window = LetYouHandApp()
     window.show()
+    if not args.new_instance:
+        window.control_server.listen()
+    if args.run:
+        resolved = window.resolve_named_command(args.run, dict(item.split('=', 1) for item in args.var))
+        if resolved is None:
+            QMessageBox.warning(window, "错误", f"找不到命令: {args.run}")
+        elif callable(resolved[1]):
+            resolved[1]()
+        else:
+            window.execute_command(resolved[1], resolved[0], resolved[2])
     sys.exit(app.exec())
 
 
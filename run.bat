@@ -5,5 +5,5 @@ echo    一键命令 QuickCmd v2.0
 echo ========================================
 echo.
 echo 正在启动...
-python main.py
+python main.py %*
 pause
@@ -1,3 +1,3 @@
 #!/bin/bash
 echo "正在启动 QuickCmd..."
-python3 main.py
+python3 main.py "$@"
@@ -0,0 +1,59 @@
+from QuickCMD import AnsiParser
+
+DEFAULT = AnsiParser.DEFAULT_STATE
+
+
+def style(fg=None, bg=None, bold=False):
+    """(前景, 背景, 粗体, 斜体, 下划线, 反显)"""
+    return (fg, bg, bold, False, False, False)
+
+
+def test_plain_text():
+    assert AnsiParser().parse("hello") == [("hello", DEFAULT)]
+
+
+def test_sgr_color_then_reset():
+    runs = AnsiParser().parse("\x1b[31mred\x1b[0m plain")
+    assert runs == [("red", style(AnsiParser.BASIC_COLORS[1])), (" plain", DEFAULT)]
+
+
+def test_style_persists_between_chunks():
+    parser = AnsiParser()
+    assert parser.parse("\x1b[1;32m") == []
+    assert parser.parse("bold green") == [("bold green", style(AnsiParser.BASIC_COLORS[2], bold=True))]
+
+
+def test_incomplete_escape_is_kept_for_next_chunk():
+    parser = AnsiParser()
+    assert parser.parse("a\x1b[3") == [("a", DEFAULT)]
+    assert parser.parse("1mb") == [("b", style(AnsiParser.BASIC_COLORS[1]))]
+
+
+def test_256_and_true_color():
+    parser = AnsiParser()
+    assert parser.parse("\x1b[38;5;196mx")[0][1][0] == '#ff0000'
+    assert parser.parse("\x1b[38;5;244my")[0][1][0] == '#808080'
+    assert parser.parse("\x1b[48;2;1;2;3mz")[0][1][1] == '#010203'
+
+
+def test_non_sgr_sequences_are_removed():
+    # 窗口标题、清屏和光标移动都不显示
+    assert AnsiParser().parse("\x1b]0;title\x07\x1b[2J\x1b[Hdone\x1b[K") == [("done", DEFAULT)]
+
+
+def test_runs_with_equal_style_are_merged():
+    assert AnsiParser().parse("a\x1b[0mb\x1b[39mc") == [("abc", DEFAULT)]
+
+
+def test_charset_and_keypad_escapes_are_removed():
+    # tput sgr0 在 xterm 下输出 ESC ( B ESC [ m
+    runs = AnsiParser().parse("\x1b[31mred\x1b(B\x1b[m plain\x1b=\x1b7\x1b8")
+    assert runs == [("red", style(AnsiParser.BASIC_COLORS[1])), (" plain", DEFAULT)]
+
+
+def test_truncated_charset_escape_waits_for_next_chunk():
+    parser = AnsiParser()
+    assert parser.parse("a\x1b(") == [("a", DEFAULT)]
+    assert parser.parse("Bb") == [("b", DEFAULT)]
+    assert parser.parse("c\x1b") == [("c", DEFAULT)]
+    assert parser.parse("]0;title\x07d") == [("d", DEFAULT)]
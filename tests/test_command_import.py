@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from QuickCMD import CommandLibraryImporter, CommandRecord
+
+
+def existing_commands():
+    return [CommandRecord.from_dict({'name': 'ping', 'command': 'ping example.com'}),
+            CommandRecord.from_dict({'name': 'disk', 'command': 'df -h'})]
+
+
+def run_import(tmp_path, records, **kwargs):
+    path = tmp_path / 'commands.jsonl'
+    path.write_text(''.join((record if isinstance(record, str) else json.dumps(record)) + '\n'
+                            for record in records), encoding='utf-8')
+    importer = CommandLibraryImporter(str(path), existing_commands(), **kwargs)
+    results = []
+    importer.finished_signal.connect(results.append)
+    importer.run()
+    return results[0]
+
+
+def names(result):
+    return [cmd_data.name for cmd_data in result['commands']]
+
+
+def test_skip_policy_keeps_existing(tmp_path):
+    result = run_import(tmp_path, [{'name': 'ping', 'command': 'ping other'},
+                                   {'name': 'uptime', 'command': 'uptime'}])
+    assert result['skipped'] == 1
+    assert names(result) == ['ping', 'disk', 'uptime']
+    assert result['commands'][0].command == 'ping example.com'
+
+
+def test_replace_policy_overwrites_in_place(tmp_path):
+    result = run_import(tmp_path, [{'name': 'ping', 'command': 'ping other'}], policy='replace')
+    assert list(result['replaced']) == [0]
+    assert names(result) == ['ping', 'disk']
+    assert result['commands'][0].command == 'ping other'
+
+
+def test_rename_policy_picks_free_name(tmp_path):
+    result = run_import(tmp_path, [{'name': 'ping', 'command': 'ping a'},
+                                   {'name': 'ping', 'command': 'ping b'}], policy='rename')
+    assert result['renamed'] == 2
+    assert names(result) == ['ping', 'disk', 'ping (2)', 'ping (3)']
+
+
+def test_duplicate_content_is_skipped(tmp_path):
+    result = run_import(tmp_path, [{'name': 'free space', 'command': 'df -h'},
+                                   {'name': 'a', 'command': 'ls'},
+                                   {'name': 'b', 'command': 'ls'}])
+    assert result['duplicates'] == 2
+    assert names(result) == ['ping', 'disk', 'a']
+
+
+def test_skipped_record_does_not_mark_content_seen(tmp_path):
+    result = run_import(tmp_path, [{'name': 'ping', 'command': 'ping other'},
+                                   {'name': 'ping other', 'command': 'ping other'}])
+    assert result['skipped'] == 1 and result['duplicates'] == 0
+    assert names(result) == ['ping', 'disk', 'ping other']
+
+
+def test_invalid_lines_are_reported(tmp_path):
+    result = run_import(tmp_path, ['{not json', {'name': 'x'}, {'name': 'ok', 'command': 'true'}])
+    assert [line_no for line_no, _ in result['errors']] == [1, 2]
+    assert names(result) == ['ping', 'disk', 'ok']
+
+
+def test_read_error_applies_nothing(tmp_path, monkeypatch):
+    import builtins
+    real_open = builtins.open
+
+    class FailingFile:
+        def __init__(self, f):
+            self.f = f
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.f.close()
+
+        def __iter__(self):
+            yield json.dumps({'name': 'a', 'command': 'true'}).encode() + b'\n'
+            raise OSError("disk error")
+
+    def fake_open(path, mode='r', *args, **kwargs):
+        f = real_open(path, mode, *args, **kwargs)
+        return FailingFile(f) if str(path).endswith('.jsonl') and 'b' in mode else f
+
+    monkeypatch.setattr(builtins, 'open', fake_open)
+    result = run_import(tmp_path, [{'name': 'a', 'command': 'true'}])
+    assert result['failed']
+    assert 'commands' not in result
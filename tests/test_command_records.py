@@ -0,0 +1,59 @@
+from QuickCMD import CommandRecord, CommandVariable, ResourceLimits, parse_command_list
+
+
+def test_round_trip_keeps_unknown_fields():
+    data = {
+        'name': "测试网络",
+        'command': "ping -c {count} {host}",
+        'variables': [{'name': 'count', 'description': "次数", 'default': '4'},
+                      {'name': 'host', 'description': "主机", 'default': 'example.com'}],
+        'limits': {'cpu_seconds': 60},
+        'description': "说明",
+        'color': 'red',
+    }
+    record = CommandRecord.from_dict(data)
+    assert record.variables[0] == CommandVariable('count', "次数", '4')
+    assert record.extra == {'color': 'red'}
+    assert record.to_dict() == data
+    assert CommandRecord.from_dict(record.to_dict()) == record
+
+
+def test_minimal_record_round_trip():
+    record = CommandRecord.from_dict({'name': 'a', 'command': 'echo a'})
+    assert record.limits is None and record.extra is None
+    assert record.to_dict() == {'name': 'a', 'command': 'echo a', 'variables': []}
+
+
+def test_identical_variables_are_shared():
+    variables = [{'name': 'host', 'description': '', 'default': 'localhost'}]
+    first = CommandRecord.from_dict({'name': 'a', 'command': 'ping {host}', 'variables': variables})
+    second = CommandRecord.from_dict({'name': 'b', 'command': 'ssh {host}', 'variables': variables})
+    assert first.variables is second.variables
+
+
+def test_parse_skips_only_malformed_entries():
+    data = [
+        {'name': 'a', 'command': 'echo a'},
+        5,
+        {'name': 'b', 'command': 'echo b', 'variables': 5},
+        {'name': 'c', 'command': ''},
+        {'name': 'd', 'command': 'echo d', 'limits': {'cpu_seconds': -1}},
+        {'name': 'e', 'command': 'echo {v}', 'variables': [{'name': 'v', 'default': '1'}]},
+    ]
+    commands, errors = parse_command_list(data)
+    assert [cmd_data.name for cmd_data in commands] == ['a', 'd', 'e']
+    assert [index for index, _ in errors] == [1, 2, 3]
+
+
+def test_off_schema_limits_do_not_drop_the_command():
+    limits = {'cpu_seconds': 2.5, 'memory_mb': 'lots', 'gpu_seconds': 10}
+    commands, errors = parse_command_list([{'name': 'a', 'command': 'echo a', 'limits': limits}])
+    assert errors == []
+    # 原样保存，生效时只取能识别的值
+    assert commands[0].limits == limits
+    assert ResourceLimits(commands[0].limits).values == {'cpu_seconds': 2}
+
+
+def test_parse_rejects_non_list_root():
+    commands, errors = parse_command_list({'name': 'a', 'command': 'echo a'})
+    assert commands == [] and errors == [(None, "文件内容不是列表")]
@@ -0,0 +1,38 @@
+import os
+import stat
+
+import pytest
+
+from QuickCMD import control_server_name, private_temp_dir
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason="POSIX only")
+
+
+@pytest.fixture
+def temp_root(tmp_path, monkeypatch):
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    return tmp_path
+
+
+def test_socket_lives_in_private_directory(temp_root):
+    name = control_server_name()
+    directory = os.path.dirname(name)
+    assert directory == str(temp_root / f"quickcmd-{os.getuid()}")
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+
+def test_directory_open_to_others_is_refused(temp_root):
+    path = temp_root / f"quickcmd-{os.getuid()}"
+    path.mkdir(mode=0o755)
+    path.chmod(0o777)
+    with pytest.raises(PermissionError):
+        private_temp_dir()
+
+
+def test_symlink_is_refused(temp_root):
+    target = temp_root / 'elsewhere'
+    target.mkdir(mode=0o700)
+    (temp_root / f"quickcmd-{os.getuid()}").symlink_to(target)
+    with pytest.raises(PermissionError):
+        private_temp_dir()
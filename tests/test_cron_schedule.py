@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from QuickCMD import CronSchedule
+
+
+def next_run(expr, after):
+    return datetime.fromtimestamp(CronSchedule(expr).next_after(after.timestamp()))
+
+
+def test_step_minutes():
+    assert next_run('*/15 * * * *', datetime(2024, 3, 1, 10, 7)) == datetime(2024, 3, 1, 10, 15)
+
+
+def test_strictly_after():
+    assert next_run('30 10 * * *', datetime(2024, 3, 1, 10, 30)) == datetime(2024, 3, 2, 10, 30)
+
+
+def test_weekdays_skip_weekend():
+    # 2024-03-01 是星期五
+    assert next_run('0 9 * * 1-5', datetime(2024, 3, 1, 10, 0)) == datetime(2024, 3, 4, 9, 0)
+
+
+def test_sunday_as_seven():
+    schedule = CronSchedule('0 0 * * 7')
+    assert schedule.weekdays == {0}
+    assert next_run('0 0 * * 7', datetime(2024, 3, 1)) == datetime(2024, 3, 3)
+
+
+def test_day_or_weekday_when_both_restricted():
+    # 与 cron 一致：13 号或星期五都会触发
+    assert next_run('0 0 13 * 5', datetime(2024, 3, 2)) == datetime(2024, 3, 8)
+    assert next_run('0 0 13 * 5', datetime(2024, 3, 9)) == datetime(2024, 3, 13)
+
+
+def test_stepped_wildcard_does_not_widen_the_other_field():
+    # */2 日 与 星期一：只在星期一且是奇数日时触发，而不是任意奇数日或任意星期一
+    # 2024-03-04 是星期一（偶数日），下一个奇数日的星期一是 03-11
+    assert next_run('0 0 */2 * 1', datetime(2024, 3, 2)) == datetime(2024, 3, 11)
+    # 星期字段写成 */1 时同样按 “任意星期” 处理，只看日
+    assert next_run('0 0 13 * */1', datetime(2024, 3, 2)) == datetime(2024, 3, 13)
+
+
+def test_month_and_list():
+    assert next_run('0 8 1 1,7 *', datetime(2024, 3, 1)) == datetime(2024, 7, 1, 8, 0)
+
+
+def test_leap_day():
+    assert next_run('0 0 29 2 *', datetime(2024, 3, 1)) == datetime(2028, 2, 29)
+
+
+@pytest.mark.parametrize('expr', ['* * * *', '60 * * * *', '*/0 * * * *', '5-1 * * * *', 'a * * * *'])
+def test_invalid_expressions(expr):
+    with pytest.raises(ValueError):
+        CronSchedule(expr)
+
+
+def test_never_fires():
+    with pytest.raises(ValueError):
+        CronSchedule('0 0 30 2 *').next_after(datetime(2024, 1, 1).timestamp())
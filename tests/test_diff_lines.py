@@ -0,0 +1,48 @@
+import random
+
+from QuickCMD import diff_lines
+
+
+def reference_lcs(a, b):
+    """动态规划求最长公共子序列长度，用来检查 diff_lines 的结果是否最小"""
+    row = [0] * (len(b) + 1)
+    for x in a:
+        new_row = [0]
+        for j, y in enumerate(b):
+            new_row.append(row[j] + 1 if x == y else max(row[j + 1], new_row[j]))
+        row = new_row
+    return row[-1]
+
+
+def assert_valid_blocks(a, b, blocks):
+    end_a = end_b = 0
+    for i, j, size in blocks:
+        assert i >= end_a and j >= end_b
+        assert a[i:i + size] == b[j:j + size]
+        end_a, end_b = i + size, j + size
+
+
+def test_trivial_inputs():
+    assert diff_lines(['a', 'b'], ['a', 'b']) == [(0, 0, 2)]
+    assert diff_lines([], ['a']) == []
+    assert diff_lines(['a'], []) == []
+
+
+def test_one_insert_one_delete():
+    assert diff_lines(['a', 'b', 'c', 'd'], ['a', 'x', 'b', 'd']) == [(0, 0, 1), (1, 2, 1), (3, 3, 1)]
+
+
+def test_matches_lcs_on_random_inputs():
+    rng = random.Random(42)
+    for _ in range(200):
+        a = rng.choices('abcde', k=rng.randint(0, 30))
+        b = rng.choices('abcde', k=rng.randint(0, 30))
+        blocks = diff_lines(a, b)
+        assert_valid_blocks(a, b, blocks)
+        assert sum(size for _, _, size in blocks) == reference_lcs(a, b)
+
+
+def test_single_change_in_long_output():
+    old = [f"line {i}" for i in range(50000)]
+    new = old[:25000] + ["changed"] + old[25001:]
+    assert diff_lines(old, new) == [(0, 0, 25000), (25001, 25001, 24999)]
@@ -0,0 +1,61 @@
+import re
+
+import pytest
+
+from QuickCMD import AnsiTextRenderer, OutputBuffer
+
+
+def search_all(buffer, pattern):
+    regex = re.compile(pattern, re.MULTILINE)
+    lines, cols, lengths = [], [], []
+    line = 0
+    while line < buffer.line_count:
+        line = buffer.search_block(regex, line, lines, cols, lengths)
+    return list(zip(lines, cols, lengths))
+
+
+def test_append_splits_lines():
+    buffer = OutputBuffer()
+    buffer.append("first")
+    buffer.append("second\nthird")
+    assert buffer.line_count == 3
+    assert [buffer.line(i) for i in range(3)] == ["first", "second", "third"]
+
+
+def test_lines_across_blocks():
+    buffer = OutputBuffer()
+    count = OutputBuffer.BLOCK_LINES * 2 + 10
+    buffer.append('\n'.join(f"line {i}" for i in range(count)))
+    assert buffer.line_count == count
+    for number in (0, OutputBuffer.BLOCK_LINES - 1, OutputBuffer.BLOCK_LINES, count - 1):
+        assert buffer.line(number) == f"line {number}"
+
+
+def test_search_reports_character_columns():
+    buffer = OutputBuffer()
+    buffer.append("中文 error\nok\n😀 error here")
+    assert search_all(buffer, "error") == [(0, 3, 5), (2, 2, 5)]
+
+
+@pytest.fixture
+def renderer(qapp):
+    from PyQt6.QtWidgets import QTextEdit
+    edit = QTextEdit()
+    yield AnsiTextRenderer(edit)
+    edit.deleteLater()
+
+
+@pytest.mark.parametrize('text', [
+    "10%\r50%\r100%",
+    "a\r\nb\r\nc",
+    "a b c",
+    "\x1b[31mred\r\x1b[0mplain",
+])
+def test_buffer_lines_match_document_blocks(renderer, text):
+    buffer = OutputBuffer()
+    for chunk in ("header", text, "footer"):
+        buffer.append(renderer.append(chunk))
+    document = renderer.text_edit.document()
+    assert buffer.line_count == document.blockCount()
+    for number in range(buffer.line_count):
+        assert buffer.line(number) == document.findBlockByNumber(number).text()
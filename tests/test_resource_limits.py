@@ -0,0 +1,49 @@
+import os
+import signal
+
+import pytest
+
+from QuickCMD import ResourceLimits
+
+posix_only = pytest.mark.skipif(os.name != 'posix', reason="POSIX only")
+
+
+def test_normalization():
+    limits = ResourceLimits({'cpu_seconds': 0, 'memory_mb': -5, 'nice': 40, 'ionice': 'fast', 'open_files': 64})
+    # 无效值被丢弃，nice 截断到 19
+    assert limits.values == {'nice': 19, 'open_files': 64}
+    assert not ResourceLimits({})
+    assert ResourceLimits({'cpu_seconds': 5, 'ionice': 'idle'}).describe() == "CPU 时间 5 秒 · I/O 优先级 空闲"
+
+
+def test_successful_run_is_never_blamed():
+    assert ResourceLimits({'cpu_seconds': 1}).fired(0, {'user': 5}, "Too many open files") is None
+
+
+@posix_only
+def test_cpu_limit_detected():
+    limits = ResourceLimits({'cpu_seconds': 2})
+    assert limits.fired(-signal.SIGXCPU, {}, '') == 'cpu_seconds'
+    # shell 报告的 128 + 信号
+    assert limits.fired(128 + signal.SIGXCPU, {}, '') == 'cpu_seconds'
+    # 软限制之后的 SIGKILL 只在 CPU 时间确实用满时才算
+    assert limits.fired(-signal.SIGKILL, {'user': 1.5, 'sys': 0.6}, '') == 'cpu_seconds'
+    assert limits.fired(-signal.SIGKILL, {'user': 0.1, 'sys': 0.0}, '') is None
+
+
+@posix_only
+def test_memory_limit_detected():
+    assert ResourceLimits({'memory_mb': 64}).fired(1, {}, "MemoryError") == 'memory_mb'
+    assert ResourceLimits({'memory_mb': 64}).fired(-signal.SIGSEGV, {}, '') == 'memory_mb'
+
+
+def test_only_configured_limits_are_reported():
+    assert ResourceLimits({'open_files': 16}).fired(1, {}, "sh: Too many open files") == 'open_files'
+    assert ResourceLimits({'memory_mb': 64}).fired(1, {}, "Too many open files") is None
+
+
+@posix_only
+def test_launcher_used_only_for_process_limits():
+    assert ResourceLimits({'max_output_bytes': 100}).popen_args('echo hi') == ('echo hi', {'shell': True})
+    args, kwargs = ResourceLimits({'open_files': 16}).popen_args('echo hi')
+    assert args[-1] == 'echo hi' and 'preexec_fn' not in kwargs
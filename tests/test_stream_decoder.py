@@ -0,0 +1,54 @@
+import codecs
+
+import pytest
+
+from QuickCMD import StreamDecoder
+
+
+def decode_all(chunks, fallback='gbk'):
+    """把所有块喂给解码器，返回拼接后的输出和检测到的编码"""
+    decoder = StreamDecoder(fallback)
+    text = ''.join(decoder.feed(chunk) for chunk in chunks) + decoder.finish()
+    return text, decoder.encoding
+
+
+def test_partial_line_is_held_back():
+    decoder = StreamDecoder('utf-8')
+    assert decoder.feed(b'abc') == ''
+    assert decoder.feed(b'def\ngh') == 'abcdef'
+    assert decoder.finish() == 'gh'
+
+
+def test_crlf_becomes_lf():
+    text, encoding = decode_all([b'one\r\ntwo\r\n'])
+    # 纯 ASCII 输出不会确定编码
+    assert text == 'one\ntwo' and encoding is None
+
+
+@pytest.mark.parametrize('split', range(1, 12))
+def test_multibyte_character_split_anywhere(split):
+    data = '中文输出\n'.encode('utf-8')
+    assert decode_all([data[:split], data[split:]]) == ('中文输出', 'utf-8')
+
+
+def test_gbk_output_uses_fallback():
+    assert decode_all(['中文输出\n'.encode('gbk')]) == ('中文输出', 'gbk')
+
+
+def test_ascii_lines_do_not_decide_the_encoding():
+    # 前面的纯 ASCII 行不能把编码定为 UTF-8
+    assert decode_all([b'ascii\n', '错误\n'.encode('gbk')]) == ('ascii错误', 'gbk')
+
+
+def test_utf16_bom_split_across_chunks():
+    data = codecs.BOM_UTF16_LE + 'hello\n世界\n'.encode('utf-16-le')
+    assert decode_all([data[:7], data[7:]]) == ('hello\n世界', 'utf-16')
+
+
+def test_utf16_detected_without_bom():
+    assert decode_all(['dir listing\n'.encode('utf-16-le')]) == ('dir listing', 'utf-16-le')
+
+
+def test_undecodable_bytes_are_replaced():
+    decoder = StreamDecoder('utf-8')
+    assert decoder.feed(b'\xe4\xb8\xadok\xff\n') == '中ok�'
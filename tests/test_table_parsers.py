@@ -0,0 +1,64 @@
+from QuickCMD import FixedWidthTableParser, NetstatTableParser, create_table_parser
+
+
+def feed_lines(parser, text):
+    rows = []
+    for line in text.splitlines():
+        row = parser.feed(line)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def test_ps_command_column_keeps_arguments():
+    parser = create_table_parser('ps aux | head -25')
+    rows = feed_lines(parser, "USER PID %CPU COMMAND\n"
+                              "root 1 0.0 /sbin/init splash\n")
+    assert parser.headers == ['USER', 'PID', '%CPU', 'COMMAND']
+    assert rows == [['root', '1', '0.0', '/sbin/init splash']]
+
+
+def test_df_mounted_on_is_one_column():
+    parser = create_table_parser('df -h')
+    rows = feed_lines(parser, "Filesystem Size Used Avail Use% Mounted on\n"
+                              "/dev/sda1 50G 20G 30G 40% /\n")
+    assert parser.headers == ['Filesystem', 'Size', 'Used', 'Avail', 'Use%', 'Mounted_on']
+    assert rows == [['/dev/sda1', '50G', '20G', '30G', '40%', '/']]
+
+
+def test_missing_trailing_values_are_empty():
+    assert feed_lines(create_table_parser('ps -ef'), "UID PID CMD\nroot 1\n") == [['root', '1', '']]
+
+
+def test_netstat_udp_row_has_empty_state():
+    parser = NetstatTableParser()
+    rows = feed_lines(parser, "Active Connections\n\n"
+                              "  Proto  Local Address          Foreign Address        State           PID\n"
+                              "  TCP    0.0.0.0:135            0.0.0.0:0              LISTENING       1000\n"
+                              "  UDP    0.0.0.0:123            *:*                                    2000\n")
+    assert parser.headers == ['Proto', 'Local_Address', 'Foreign_Address', 'State', 'PID']
+    assert rows[1] == ['UDP', '0.0.0.0:123', '*:*', '', '2000']
+
+
+def test_tasklist_columns_follow_separator_line():
+    parser = FixedWidthTableParser()
+    rows = feed_lines(parser, "Image Name                     PID Session Name        Session#    Mem Usage\n"
+                              "========================= ======== ================ =========== ============\n"
+                              "System Idle Process              0 Services                   0          8 K\n")
+    assert parser.headers == ['Image Name', 'PID', 'Session Name', 'Session#', 'Mem Usage']
+    assert rows == [['System Idle Process', '0', 'Services', '0', '8 K']]
+
+
+def test_other_commands_are_not_tabulated():
+    assert create_table_parser('echo hello') is None
+
+
+def test_netstat_chinese_headers():
+    parser = NetstatTableParser()
+    rows = feed_lines(parser, "活动连接\n\n"
+                              "  协议  本地地址          外部地址        状态           PID\n"
+                              "  TCP    0.0.0.0:135            0.0.0.0:0              LISTENING       1000\n"
+                              "  UDP    0.0.0.0:123            *:*                                    2000\n")
+    assert parser.headers == ['协议', '本地地址', '外部地址', '状态', 'PID']
+    assert rows == [['TCP', '0.0.0.0:135', '0.0.0.0:0', 'LISTENING', '1000'],
+                    ['UDP', '0.0.0.0:123', '*:*', '', '2000']]